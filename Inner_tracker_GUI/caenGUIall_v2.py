@@ -1,7 +1,11 @@
 #!/bin/env python3
 import sys
-import socket
+import os
 import json
+import threading
+from concurrent.futures import wait
+
+import numpy as np
 
 from PyQt5.QtWidgets import (
     QApplication,
@@ -17,87 +21,49 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import pyqtSlot, QTimer, QThread, pyqtSignal, Qt
 from PyQt5.QtGui import QFont
 
-BUFFER_SIZE = 100000
-
-
-class tcp_util:
-    """Utility class for TCP communication with the CAEN server."""
-
-    def __init__(self, ip, port):
-        self.ip = ip
-        self.port = port
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.settimeout(0.5)
-        self.headerBytes = 4
-        
-        self.connectSocket()
-        pass    
-
-    def __del__(self):
-        """Destructor, closes socket
-        """
-        try:
-            self.closeSocket()
-        except Exception:
-            pass
-
-    def connectSocket(self):
-        """Connects socket
-        """
-        self.socket.connect((self.ip, self.port))
-        pass
-
-    def closeSocket(self):
-        """Closes socket connection
-        """
-        self.socket.close()
-        pass
-
-    def sendMessage(self, message):
-        """Encodes message and sends it on socket
-        """
-        encodedMessage = self.encodeMessage(message)
-        self.socket.send(encodedMessage)
-        pass
-
-    def encodeMessage(self, message):
-        """
-        Encodes message adding 8-byte header:
-        [4 bytes: total length] [4 bytes: reserved/0] [payload]
-        """
-        messageLength = len(message) + self.headerBytes + 4
-        N = 0
-        encodedMessage = (
-            messageLength.to_bytes(4, byteorder="big")
-            + N.to_bytes(4, byteorder="big")
-            + message.encode("utf-8")
-        )
-        return encodedMessage
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from caen.caen_client import decode_text
+from caen.command_queue import get_command_queue
+from caen.caen_status import get_status_poller, parse_status
+from caen.channel_display import ChannelDisplay, init_led, set_led
 
 
 class CAENQueryThread(QThread):
     """
     Thread class for handling CAEN queries.
-    Uses internal queues so GUI can enqueue multiple commands.
+    Commands go through the priority queue shared by all the views of the server.
     """
 
-    dataReady = pyqtSignal(dict)  # Emitted when parsed data is ready
+    dataReady = pyqtSignal(object)  # Emitted when parsed data is ready
     error = pyqtSignal(str)       # Emitted when an error occurs
 
     def __init__(self, ip="192.168.0.45", port=7000):
         super().__init__()
         self.ip = ip
         self.port = port
-        self.message = None
-        self.receive = False
         self.running = True
-        self.queue = []         # list of messages to send
-        self.receiveQueue = []  # list of booleans: whether to read a reply
+        self.commands = get_command_queue(ip, port)
+        self._pending = []      # futures not waited for by run() yet
+        self._lock = threading.Lock()
 
     def setup_query(self, message, receive=False):
-        """Queue a new query to be executed by the thread."""
-        self.queue.append(message)
-        self.receiveQueue.append(receive)
+        """Queue a new query, returns the Future of its CommandResult."""
+        future = self.commands.submit(message, decode=parse_status if receive else decode_text, expect_reply=receive)
+        with self._lock:
+            self._pending = [pending for pending in self._pending if not pending.done()]
+            self._pending.append(future)
+        future.add_done_callback(lambda future, receive=receive: self._finished(future, receive))
+        return future
+
+    def _finished(self, future, receive):
+        """Emit the parsed status or the error of a query, from the thread completing it"""
+        try:
+            result = future.result()
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        if receive:
+            self.dataReady.emit(result.reply)
 
     def stop(self):
         """Stop the thread"""
@@ -105,42 +71,13 @@ class CAENQueryThread(QThread):
         self.wait()
         
     def run(self):
-        """Thread's main method : Process the queued messages."""
-        while self.queue:
-            #create lock
-            self.message = self.queue.pop(0)
-            self.receive = self.receiveQueue.pop(0)
-            try:
-                tcpClass = tcp_util(ip=self.ip, port=self.port)
-                tcpClass.sendMessage(self.message)
-                if self.receive:
-                    data = b""
-                    while True:
-                        try:
-                            chunk = tcpClass.socket.recv(BUFFER_SIZE)
-                            if not chunk:
-                                break
-                            data += chunk
-                        except Exception:
-                            break
-
-                    # Strip 8-byte header
-                    data = data[8:]
-                    data = data.decode("utf-8")
-
-                    parsedData = {}
-                    for token in data.split(","):
-                        if token.startswith("caen"):
-                            key, value = token.split(":")
-                            value = float(value)
-                            parsedData[key] = value
-
-                    self.dataReady.emit(parsedData)
-
-                tcpClass.closeSocket()
-
-            except Exception as e:
-                self.error.emit(str(e))
+        """Thread's main method : wait for the queued queries, their replies are emitted as they arrive."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, []
+            wait(pending)
 
 
 class caenGUI8LV(QWidget):
@@ -153,10 +90,13 @@ class caenGUI8LV(QWidget):
     - Current setpoint QLineEdit + 'Set I' button
     """
 
+    # The shared status poller calls from its thread, the signals queue the snapshots to the GUI thread
+    statusReady = pyqtSignal(object)
+    statusError = pyqtSignal(str)
+
     def __init__(self, ip="192.168.0.45", port=7000):
         super().__init__()
     
-        # Create timer for periodic update
         self.channels = []
         self.led = {}
         self.label = {}
@@ -169,15 +109,16 @@ class caenGUI8LV(QWidget):
         self.queryThread.dataReady.connect(self.handle_query_response)
         self.queryThread.error.connect(self.handle_query_error)
 
-        # Timer to periodically request status
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_status)
-        
         # build the UI
         self.initUI()
-        
-        #start periodic status update
-        self.timer.start(2000)  # ms
+
+        # Periodic status from the poller shared with the other CAEN views
+        self.statusReady.connect(self.handle_query_response)
+        self.statusError.connect(self.handle_query_error)
+        self._on_status = self.statusReady.emit
+        self._on_status_error = self.statusError.emit
+        self.poller = get_status_poller(ip, port)
+        self.poller.subscribe(self._on_status, self._on_status_error)
 
     def change_host(self, ip, port):
         """
@@ -193,6 +134,9 @@ class caenGUI8LV(QWidget):
         self.queryThread = CAENQueryThread(ip=ip, port=port)
         self.queryThread.dataReady.connect(self.handle_query_response)
         self.queryThread.error.connect(self.handle_query_error)
+        self.poller.unsubscribe(self._on_status)
+        self.poller = get_status_poller(ip, port)
+        self.poller.subscribe(self._on_status, self._on_status_error)
 
     def initUI(self):
         self.setWindowTitle("Inner Tracker CAEN GUI - 8 LV Channels")
@@ -260,9 +204,10 @@ class caenGUI8LV(QWidget):
             self.led[channel] = QFrame(self)
             self.led[channel].setFrameShape(QFrame.Box)
             self.led[channel].setFixedSize(25, 25)
-            self.led[channel].setStyleSheet("background-color: red")
+            init_led(self.led[channel])
             hlayout.addWidget(self.led[channel])
 
+        self.display = ChannelDisplay(self.channels)
         self.show()
         
     def toggle_current_setting(self, state):
@@ -273,63 +218,28 @@ class caenGUI8LV(QWidget):
         for btn in self.setI_buttons.values():
             btn.setEnabled(enabled)
         
-    # ---------------- Periodic status update ----------------
-
-    @pyqtSlot()
-    def update_status(self):
-        """
-        Periodic update method:
-        ask the server for the status of all channels.
-        """
-        print("Update")
-        
-        message = "GetStatus,PowerSupplyId:caen"
-        self.queryThread.setup_query(message, True)
-
-        if not self.queryThread.isRunning():
-            self.queryThread.start()
-        else:
-            # If it is still running, we just queued the command
-            # and it will be handled in the same run loop.
-            print("Query thread already running, skipping update")
-            pass
-
     # ---------------- Handle responses / errors ----------------
 
     def handle_query_response(self, ret):
         """
         Called when a GetStatus response is received and parsed.
-        ret: dict of caen_* keys with float values.
+        ret: CAENStatus, the IsOn/Voltage/Current columns are read for all channels at once.
         """
-        self.last_response = ret.copy()
+        self.last_response = ret
         try:
-            for channel in self.channels:
-                try:
-                    # ON/OFF LED
-                    is_on = ret.get(f"caen_{channel}_IsOn", 0.0)
-                    if is_on > 0.5:
-                        self.led[channel].setStyleSheet("background-color: green")
-                    else:
-                        self.led[channel].setStyleSheet("background-color: red")
-
-                    # Voltage & Current
-                    v_key = f"caen_{channel}_Voltage"
-                    i_key = f"caen_{channel}_Current"
-                    if v_key in ret and i_key in ret:
-                        V = ret[v_key]
-                        I = ret[i_key]
-                        P = V * I
-                        self.label[channel].setText(
-                            f"V: {V:4.1f} V  |  I: {I:4.2f} A  ({P:4.1f} W)"
-                        )
-                    else:
-                        self.label[channel].setText(
-                            f'V: {ret["caen_"+channel+"_Voltage"]:3.1f}V\nI: {ret["caen_"+channel+"_Current"]:1.2f}uA'
-                        )
-                        # self.label[channel].setText("n/a")
-
-                except Exception:
+            # Only the channels whose values moved since the last status are redrawn
+            for channel, (is_on, V, I) in self.display.changed(ret):
+                # ON/OFF LED, a channel without status is shown off
+                set_led(self.led[channel], "on" if is_on > 0.5 else "off")
+
+                # Voltage & Current
+                if np.isnan(V) or np.isnan(I):
                     print("No info for", channel)
+                    continue
+                P = V * I
+                self.display.set_text(
+                    channel, self.label[channel], f"V: {V:4.1f} V  |  I: {I:4.2f} A  ({P:4.1f} W)"
+                )
         except Exception:
             print("Cannot parse CAEN data")
 
@@ -3,112 +3,80 @@
 import sys
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QTextEdit, QHBoxLayout, QFrame, QLabel
 from PyQt5.QtCore import pyqtSlot, QTimer, QThread, pyqtSignal, QObject
-import socket
+import os
 import json
-BUFFER_SIZE = 100000
+import threading
+from concurrent.futures import wait
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from caen.caen_client import decode_text
+from caen.command_queue import get_command_queue
+from caen.caen_status import get_status_poller, parse_status
+from caen.channel_display import ChannelDisplay, init_led, set_led
+
+MAX_AWAITING_ACK = 256
 
 class CAENQueryThread(QThread):
     """Thread class for handling CAEN queries"""
-    dataReady = pyqtSignal(dict)  # Signal to emit when data is received
+    dataReady = pyqtSignal(object)  # Signal to emit when data is received
     error = pyqtSignal(str)  # Signal to emit when error occurs
 
     def __init__(self, ip='192.168.0.45', port=7000):
         super().__init__()
         self.ip = ip
         self.port = port
-        self.message = None
-        self.receive = False
         self.running = True
+        # Queries go through the priority queue shared by all the views of the server,
+        # a TurnOff is sent before any queued command or status poll
+        self.commands = get_command_queue(ip, port)
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def setup_query(self, message, receive=False, trace=None):
+        """Queue a query, returns the Future of its CommandResult.
+
+        trace gets a "send" span once the message leaves the host.
+        """
+        future = self.commands.submit(message, decode=parse_status if receive else decode_text, expect_reply=receive, trace=trace)
+        with self._lock:
+            self._pending = [pending for pending in self._pending if not pending.done()]
+            self._pending.append(future)
+        future.add_done_callback(lambda future, receive=receive: self._finished(future, receive))
+        return future
+
+    def _finished(self, future, receive):
+        """Emit the parsed status or the error of a query, from the thread completing it"""
+        try:
+            result = future.result()
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        if receive:
+            self.dataReady.emit(result.reply)
 
-    def setup_query(self, message, receive=False):
-        """Setup the query to be executed"""
-        self.message = message
-        self.receive = receive
-        
     def stop(self):
         """Stop the thread"""
         self.running = False
         self.wait()
 
     def run(self):
-        """Thread's main method"""
-        if not self.message:
-            return
-
-        try:
-            tcpClass = tcp_util(ip=self.ip, port=self.port)
-            tcpClass.sendMessage(self.message)
-            
-            if self.receive:
-                data = tcpClass.socket.recv(BUFFER_SIZE)
-                length = data[3] | (data[2] << 8) | (data[1] << 16) | (data[0] << 24)
-                while len(data) < length :
-                    print("wait for more data",len(data), length)
-                    chunk=tcpClass.socket.recv(BUFFER_SIZE)
-                    if not chunk:
-                        break
-                    data+=chunk
-                data=data[8:].decode("utf-8")
-
-                parsedData = {}
-                for token in data.split(','):
-                    if token.startswith('caen'):
-                        key, value = token.split(":")
-                        value = float(value)
-                        parsedData[key] = value
-                self.dataReady.emit(parsedData)
-            
-            tcpClass.closeSocket()
-            
-        except Exception as e:
-            self.error.emit(str(e))
-
-class tcp_util():
-    """Utility class for tcp
-    comunication management. """
-    def __init__(self, ip, port):
-        self.ip          = ip
-        self.port        = port
-        self.socket      = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.headerBytes = 4
-
-        self.connectSocket()
-        pass
-
-    def __del__ (self):
-        """Desctuctor, closes socket"""
-        try:
-            self.closeSocket()
-        except:
-            pass
-
-    def connectSocket(self):
-        """Connects socket"""
-        self.socket.connect((self.ip,self.port))
-        pass
-
-    def closeSocket(self):
-        """Closes socket connection"""
-        self.socket.close()
-        pass
-
-    def sendMessage(self,message):
-        """Encodes message and sends it on socket"""
-        encodedMessage = self.encodeMessage(message)
-        self.socket.send(encodedMessage)
-        pass
-
-    def encodeMessage(self,message):
-        """Encodes message adding 4 bytes header"""
-        messageLength = len(message) + self.headerBytes +4
-        N=0
-        encodedMessage = (messageLength).to_bytes(4, byteorder='big') + N.to_bytes(4, byteorder='big') + message.encode('utf-8')
-        return encodedMessage
+        """Thread's main method, waits for the queued queries, their replies are emitted as they arrive"""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, []
+            wait(pending)
 
 from argparse import Namespace
 
 class CAENControl(QObject):
     """CAEN control logic without UI elements"""
+    # The shared status poller calls from its thread, the signals queue the snapshots to the GUI thread
+    statusReady = pyqtSignal(object)
+    statusError = pyqtSignal(str)
+
     def __init__(self, ui):
         super().__init__()
         self.ui = ui
@@ -121,6 +89,10 @@ class CAENControl(QObject):
             'LV': self.ui.lvLabel,
             'HV': self.ui.hvLabel
         }
+        for led in self.led.values():
+            init_led(led)
+        # Labels are only set when their text changes
+        self.display = ChannelDisplay(self.channels)
         
         # Create query thread
         self.queryThread = CAENQueryThread()
@@ -133,17 +105,26 @@ class CAENControl(QObject):
         self.ui.hvOnButton.clicked.connect(lambda: self.on(self.channels["HV"] ))
         self.ui.hvOffButton.clicked.connect(lambda: self.off(self.channels["HV"] ))
 
-        # Create timer for periodic update
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update)
-        self.timer.start(2000)
         self.lv_off_when_hv_off=False
 
-    def safe_lv_off(self):
+        # Traced commands waiting for the status to show their channels off, trace -> channels
+        self.tracer = None
+        self._awaiting_ack = {}
+        self._ack_lock = threading.Lock()
+
+        # Periodic status from the poller shared with the other CAEN views
+        self.statusReady.connect(self.handle_query_response)
+        self.statusError.connect(self.handle_query_error)
+        self._on_status = self.statusReady.emit
+        self._on_status_error = self.statusError.emit
+        self.poller = get_status_poller(self.queryThread.ip, self.queryThread.port)
+        self.poller.subscribe(self._on_status, self._on_status_error)
+
+    def safe_lv_off(self, trace=None):
 
         if self.lv_off_when_hv_off : # if the user insists we switch off
-            self.off(self.channels["LV"])
-        self.off(self.channels["HV"])
+            self.off(self.channels["LV"], trace)
+        self.off(self.channels["HV"], trace)
         self.lv_off_when_hv_off=True 
 
     def setLV(self,channel_name):
@@ -154,43 +135,55 @@ class CAENControl(QObject):
 
     def __del__(self):
         """Cleanup when widget is destroyed"""
+        self.poller.unsubscribe(self._on_status)
         self.queryThread.stop()
 
-    @pyqtSlot()
-    def update(self):
-        """Periodic update method"""
-        self.queryThread.setup_query('GetStatus,PowerSupplyId:caen', True)
-        self.queryThread.start()
+    def acknowledge(self, data):
+        """Finish the traces whose channels are all reported off"""
+        with self._ack_lock:
+            for trace, channels in list(self._awaiting_ack.items()):
+                pending = list(channels)
+                # A channel missing from the reply reads NaN and is not acknowledged
+                is_on = data.select(pending, ("IsOn",))[:, 0]
+                channels.difference_update(
+                    [channel for channel, on in zip(pending, is_on) if on < 0.5]
+                )
+                if not channels:
+                    del self._awaiting_ack[trace]
+                    trace.mark("ack")
+                    if self.tracer is not None:
+                        self.tracer.finish(trace)
 
     def handle_query_response(self, data):
         """Handle the response from query thread"""
+        self.acknowledge(data)
         try:
-            if data['caen_'+self.channels["LV"]+'_IsOn'] < 0.5:
+            values = dict(zip(self.channels, data.select(list(self.channels.values()))))
+            if np.isnan(values["LV"]).any() or np.isnan(values["HV"]).any():
+                raise KeyError(f"no status for {self.channels['LV']} or {self.channels['HV']}")
+            if values["LV"][0] < 0.5:
                         self.lv_off_when_hv_off = False
                         
-            for hl,channel in self.channels.items():
+            for hl, (is_on, voltage, current) in values.items():
                 if self.lv_off_when_hv_off :
-                        self.led[hl].setStyleSheet("background-color: yellow")
+                        set_led(self.led[hl], "warn")
                 else:
-                    if data['caen_'+channel+'_IsOn'] > 0.5:
-                        self.led[hl].setStyleSheet("background-color: green")
-                    else:
-                        self.led[hl].setStyleSheet("background-color: red")
+                    set_led(self.led[hl], "on" if is_on > 0.5 else "off")
                 if hl=="HV":
-                    self.label[hl].setText(
-                    f'V: {data["caen_"+channel+"_Voltage"]:3.1f}V '
-                    f'C: {data["caen_"+channel+"_Current"]:2.1f}uA '
+                    self.display.set_text(hl, self.label[hl],
+                    f'V: {voltage:3.1f}V '
+                    f'C: {current:2.1f}uA '
                     )
                     # Check if we need to turn off LV based on HV voltage
-                    if self.lv_off_when_hv_off and data["caen_"+channel+"_Voltage"] <= 10.0:
+                    if self.lv_off_when_hv_off and voltage <= 10.0:
                         print("Switching OFF LV ")
                         self.off(self.channels["LV"])
                         
                 else:
-                    self.label[hl].setText(
-                    f'V: {data["caen_"+channel+"_Voltage"]:2.1f}V '
-                    f'C: {data["caen_"+channel+"_Current"]:1.1f}A '
-                    f'P: {data["caen_"+channel+"_Voltage"]*data["caen_"+channel+"_Current"]:1.1f}W'
+                    self.display.set_text(hl, self.label[hl],
+                    f'V: {voltage:2.1f}V '
+                    f'C: {current:1.1f}A '
+                    f'P: {voltage*current:1.1f}W'
                     )
         except Exception as e:
             print(f"Error handling response: {e}")
@@ -206,9 +199,21 @@ class CAENControl(QObject):
         self.queryThread.start()
 
     @pyqtSlot()
-    def off(self, channel):
+    def off(self, channel, trace=None):
         print(f'TurnOff,PowerSupplyId:caen,ChannelId:{channel}')
-        self.queryThread.setup_query(f'TurnOff,PowerSupplyId:caen,ChannelId:{channel}')
+        if trace is not None:
+            with self._ack_lock:
+                self._awaiting_ack.setdefault(trace, set()).add(channel)
+                # Without CAEN answers, give up on the oldest traces rather than growing forever
+                while len(self._awaiting_ack) > MAX_AWAITING_ACK:
+                    stale = next(iter(self._awaiting_ack))
+                    del self._awaiting_ack[stale]
+                    if self.tracer is not None:
+                        self.tracer.finish(stale)
+        if trace is not None:
+            trace.mark("enqueue")
+        # TurnOff jumps ahead of the queued commands and status polls
+        self.queryThread.setup_query(f'TurnOff,PowerSupplyId:caen,ChannelId:{channel}', trace=trace)
         self.queryThread.start()
 
 def main():
@@ -5,40 +5,55 @@ from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QTe
 from PyQt5.QtCore import pyqtSlot
 from PyQt5.QtCore import QTimer
 from PyQt5.QtGui import QFont
-import socket
 import json
-
-BUFFER_SIZE = 100000
-import sys
+import os
+import threading
+from concurrent.futures import wait
+import numpy as np
 from PyQt5.QtWidgets import QApplication, QWidget, QPushButton, QVBoxLayout, QTextEdit, QHBoxLayout, QFrame, QLabel
 from PyQt5.QtCore import pyqtSlot, QTimer, QThread, pyqtSignal, QObject
-import socket
-import json
 
-BUFFER_SIZE = 100000
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from caen.caen_client import decode_text
+from caen.command_queue import get_command_queue
+from caen.caen_status import get_status_poller, parse_status
+from caen.channel_display import ChannelDisplay, init_led, set_led
 
 
 class CAENQueryThread(QThread):
     """Thread class for handling CAEN queries"""
 
-    dataReady = pyqtSignal(dict)  # Signal to emit when data is received
+    dataReady = pyqtSignal(object)  # Signal to emit when data is received
     error = pyqtSignal(str)  # Signal to emit when error occurs
 
     def __init__(self, ip="192.168.0.45", port=7000):
         super().__init__()
         self.ip = ip
         self.port = port
-        self.message = None
-        self.receive = False
         self.running = True
-        self.queue =[]
-        self.receiveQueue = []
+        # Queries go through the priority queue shared by all the views of the server
+        self.commands = get_command_queue(ip, port)
+        self._pending = []
+        self._lock = threading.Lock()
 
     def setup_query(self, message, receive=False):
-        """Setup the query to be executed"""
-        self.queue.append(message)
-        self.receiveQueue.append(receive)
-        
+        """Queue a query, returns the Future of its CommandResult"""
+        future = self.commands.submit(message, decode=parse_status if receive else decode_text, expect_reply=receive)
+        with self._lock:
+            self._pending = [pending for pending in self._pending if not pending.done()]
+            self._pending.append(future)
+        future.add_done_callback(lambda future, receive=receive: self._finished(future, receive))
+        return future
+
+    def _finished(self, future, receive):
+        """Emit the parsed status or the error of a query, from the thread completing it"""
+        try:
+            result = future.result()
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        if receive:
+            self.dataReady.emit(result.reply)
 
     def stop(self):
         """Stop the thread"""
@@ -46,98 +61,23 @@ class CAENQueryThread(QThread):
         self.wait()
 
     def run(self):
-        """Thread's main method"""
-        #        print("Running query thread",self.message)
-
-        while self.queue:
-            #create lock
-            self.message = self.queue.pop(0)
-            self.receive = self.receiveQueue.pop(0)
-            try:
-                tcpClass = tcp_util(ip=self.ip, port=self.port)
-                tcpClass.sendMessage(self.message)
-                if self.receive:
-                    data = b""
-                    while True:
-                        try:
-                            chunk = tcpClass.socket.recv(BUFFER_SIZE)
-                            if not chunk:
-                                break
-                            data += chunk
-                            length = data[3] | (data[2] << 8) | (data[1] << 16) | (data[0] << 24)
-                            if len(data) >= length :
-                                break   
-                        except:
-                            break
-                    data = data[8:]
-                    #        print(data[-10:])
-                    data = data.decode("utf-8")
-
-                    parsedData = {}
-                    for token in data.split(","):
-                        if token.startswith("caen"):
-                            key, value = token.split(":")
-                            value = float(value)
-                            parsedData[key] = value
-                    self.dataReady.emit(parsedData)
-
-                tcpClass.closeSocket()
-
-            except Exception as e:
-                self.error.emit(str(e))
-
-
-class tcp_util:
-    """Utility class for tcp
-    comunication management."""
-
-    def __init__(self, ip, port):
-        self.ip = ip
-        self.port = port
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-#        self.socket.settimeout(0.5)
-        self.headerBytes = 4
-
-        self.connectSocket()
-        pass
-
-    def __del__(self):
-        """Desctuctor, closes socket"""
-        try:
-            self.closeSocket()
-        except:
-            pass
-
-    def connectSocket(self):
-        """Connects socket"""
-        self.socket.connect((self.ip, self.port))
-        pass
-
-    def closeSocket(self):
-        """Closes socket connection"""
-        self.socket.close()
-        pass
-
-    def sendMessage(self, message):
-        """Encodes message and sends it on socket"""
-        encodedMessage = self.encodeMessage(message)
-        self.socket.send(encodedMessage)
-        pass
-
-    def encodeMessage(self, message):
-        """Encodes message adding 4 bytes header"""
-        messageLength = len(message) + self.headerBytes + 4
-        N = 0
-        encodedMessage = (
-            (messageLength).to_bytes(4, byteorder="big") + N.to_bytes(4, byteorder="big") + message.encode("utf-8")
-        )
-        return encodedMessage
+        """Thread's main method, waits for the queued queries, their replies are emitted as they arrive"""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, []
+            wait(pending)
 
 
 from argparse import Namespace
 
 
 class caenGUIall(QWidget):
+    # The shared status poller calls from its thread, the signals queue the snapshots to the GUI thread
+    statusReady = pyqtSignal(object)
+    statusError = pyqtSignal(str)
+
     def __init__(self, ip="192.168.0.45", port=7000):
         super().__init__()
         self.initUI()
@@ -148,16 +88,22 @@ class caenGUIall(QWidget):
         self.queryThread.dataReady.connect(self.handle_query_response)
         self.queryThread.error.connect(self.handle_query_error)
 
-        # Create timer for periodic update
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update)
-        self.timer.start(2000)
+        # Periodic status from the poller shared with the other CAEN views
+        self.statusReady.connect(self.handle_query_response)
+        self.statusError.connect(self.handle_query_error)
+        self._on_status = self.statusReady.emit
+        self._on_status_error = self.statusError.emit
+        self.poller = get_status_poller(ip, port)
+        self.poller.subscribe(self._on_status, self._on_status_error)
 
     def change_host(self, ip, port):
         """Change host IP and port"""
         self.queryThread = CAENQueryThread(ip=ip, port=port)
         self.queryThread.dataReady.connect(self.handle_query_response)
         self.queryThread.error.connect(self.handle_query_error)
+        self.poller.unsubscribe(self._on_status)
+        self.poller = get_status_poller(ip, port)
+        self.poller.subscribe(self._on_status, self._on_status_error)
 
     def initUI(self):
         self.setWindowTitle("CAEN GUI")
@@ -176,6 +122,7 @@ class caenGUIall(QWidget):
 
         self.led = {}
         self.label = {}
+        self.display = ChannelDisplay(self.channels)
         # add buttons for On and Off, a status led and a voltage value for each channel in a new horizontal layour
         # object then add the horizontal layout to the main vertical layout
         for i, channel in enumerate(self.channels):
@@ -205,53 +152,28 @@ class caenGUIall(QWidget):
             self.led[channel].setFrameShape(QFrame.Box)
             self.led[channel].setFixedSize(30, 30)
 
-            self.led[channel].setStyleSheet("background-color: red")
+            init_led(self.led[channel])
 
             hlayout.addWidget(self.led[channel])
 
-        # create timer for periodic update of the GUI with info from caen
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update)
-        self.timer.start(2000)
-
         self.show()
 
-    @pyqtSlot()
-    def update(self):
-        """Periodic update method"""
-        print("Update")
-            
-        self.queryThread.setup_query("GetStatus,PowerSupplyId:caen", True)
-        # if thread not running, start it
-        if not self.queryThread.isRunning():
-            self.queryThread.start()
-        else:
-            print("Query thread already running, skipping update")
-
     def handle_query_response(self, ret):
-        self.last_response = ret.copy()
+        self.last_response = ret
         try:
-            for channel in self.channels:
-                # self.led[channel].setOn(ret['caen_'+channel+'_IsOn']>0.5)
-                try:
-                    if ret["caen_" + channel + "_IsOn"] > 0.5:
-                        self.led[channel].setStyleSheet("background-color: green")
-                    else:
-                        self.led[channel].setStyleSheet("background-color: red")
-                    #            self.label[channel].setText(str(ret['caen_'+channel+'_Voltage']))
-                    # set label to Voltage, Current, Power
-                    #            self.label[channel].setText('V: '+str(ret['caen_'+channel+'_Voltage'])+' C: '+str(ret['caen_'+channel+'_Current']))
-                    if "LV" in channel:
-                        self.label[channel].setText(
-                            f'V: {ret["caen_"+channel+"_Voltage"]:1.1f}V\n I: {ret["caen_"+channel+"_Current"]:1.1f}A ({ret["caen_"+channel+"_Voltage"]*ret["caen_"+channel+"_Current"]:1.1f}W)'
-                        )
-                    else:
-                        self.label[channel].setText(
-                            f'V: {ret["caen_"+channel+"_Voltage"]:3.1f}V\nI: {ret["caen_"+channel+"_Current"]:1.2f}uA'
-                        )
-                except:
+            # Only the channels whose values moved since the last status are redrawn
+            for channel, (is_on, voltage, current) in self.display.changed(ret):
+                if np.isnan(is_on) or np.isnan(voltage) or np.isnan(current):
                     print("No info for", channel)
-        except:
+                    continue
+                set_led(self.led[channel], "on" if is_on > 0.5 else "off")
+                # set label to Voltage, Current, Power
+                if "LV" in channel:
+                    text = f"V: {voltage:1.1f}V\n I: {current:1.1f}A ({voltage*current:1.1f}W)"
+                else:
+                    text = f"V: {voltage:3.1f}V\nI: {current:1.2f}uA"
+                self.display.set_text(channel, self.label[channel], text)
+        except Exception:
             print("Cannot parse")
 
     def handle_query_error(self, error_msg):
@@ -0,0 +1,233 @@
+import collections
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import Future
+
+# [4 bytes: total length including the header] [4 bytes: packet number] [UTF-8 body]
+# The clients of the baseline only read the reply of GetStatus, whether the
+# server also answers TurnOn/TurnOff and the other commands is not known.
+# Commands are therefore sent with expect_reply=False, a reply that still
+# comes back with their packet number is dropped.
+HEADER = struct.Struct(">II")
+# Initial size of the receive buffer, it grows to the largest reply announced by a header
+BUFFER_SIZE = 100000
+
+# Default time for a reply, in s
+DEFAULT_TIMEOUT = 2.0
+CONNECT_TIMEOUT = 1.0
+# Reconnection delays after failed connects, doubled up to the maximum, in s
+MIN_BACKOFF = 0.2
+MAX_BACKOFF = 5.0
+# How often the reader checks the request deadlines while no data arrives, in s
+POLL_INTERVAL = 0.1
+# Packet numbers of requests sent without waiting for a reply, remembered to drop late replies
+MAX_UNANSWERED = 1024
+
+
+def encode_message(message, number=0):
+    """Frame a message with the length and packet number header"""
+    body = message.encode("utf-8")
+    return HEADER.pack(len(body) + HEADER.size, number) + body
+
+
+def decode_text(body):
+    return str(body, "utf-8", errors="replace")
+
+
+class CAENClient:
+    """Persistent, pipelined connection to the CAEN power supply server.
+
+    request() writes a message and returns a Future of the reply body, so
+    several requests can be in flight on the one connection. Replies are
+    matched by packet number, or in order if the server does not echo it.
+    A request without a reply before its deadline fails with TimeoutError,
+    requests sent with expect_reply=False are done once written.
+    The connection is then dropped, because the order of later replies can
+    no longer be trusted. After a failed connect, requests fail at once
+    until a backoff delay has passed, so a dead server never blocks the
+    calling threads. The client is thread safe.
+
+    Replies are received into one reusable buffer. The `decode` callable of
+    a request gets a memoryview of its body in that buffer, valid only
+    during the call, and its result becomes the result of the future.
+    """
+
+    def __init__(self, ip, port, timeout=DEFAULT_TIMEOUT, connect_timeout=CONNECT_TIMEOUT, max_backoff=MAX_BACKOFF):
+        self.ip = ip
+        self.port = port
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._socket = None
+        self._pending = collections.deque()
+        self._unanswered = collections.deque(maxlen=MAX_UNANSWERED)
+        self._number = 0
+        self._backoff = 0.0
+        self._retry_at = 0.0
+
+    @property
+    def connected(self):
+        return self._socket is not None
+
+    def _connect(self):
+        """Current socket, connecting first if needed. Called with the send lock held"""
+        if self._socket is not None:
+            return self._socket
+        now = time.monotonic()
+        if now < self._retry_at:
+            raise ConnectionError(f"CAEN server {self.ip}:{self.port} unavailable, retrying in {self._retry_at - now:.1f} s")
+        try:
+            sock = socket.create_connection((self.ip, self.port), timeout=self.connect_timeout)
+        except OSError:
+            self._backoff = min(self.max_backoff, max(MIN_BACKOFF, 2 * self._backoff))
+            self._retry_at = time.monotonic() + self._backoff
+            raise
+        self._backoff = 0.0
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(POLL_INTERVAL)
+        with self._lock:
+            self._socket = sock
+        threading.Thread(target=self._read_loop, args=(sock,), name="caen-client", daemon=True).start()
+        return sock
+
+    def request(self, message, timeout=None, decode=decode_text, expect_reply=True):
+        """Send a message, returns a Future of the decoded reply.
+
+        With expect_reply=False the future gets None as soon as the message is written.
+        """
+        future = Future()
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._send_lock:
+            sock = None
+            try:
+                sock = self._connect()
+                self._number = (self._number + 1) & 0xFFFFFFFF
+                with self._lock:
+                    if expect_reply:
+                        self._pending.append((self._number, future, deadline, decode))
+                    else:
+                        self._unanswered.append(self._number)
+                sock.sendall(encode_message(message, self._number))
+                if not expect_reply:
+                    future.set_result(None)
+            except OSError as e:
+                if sock is not None:
+                    self._reset(sock, e)
+                if not future.done():
+                    future.set_exception(e)
+        return future
+
+    def call(self, message, timeout=None, decode=decode_text):
+        """Send a message and wait for its reply, raises on errors and timeouts"""
+        timeout = self.timeout if timeout is None else timeout
+        # The reader fails the request at its deadline, the margin only covers a stuck reader
+        return self.request(message, timeout, decode).result(timeout + 1.0)
+
+    def send(self, message):
+        """Send a command without expecting a reply, raises if it could not be written"""
+        future = self.request(message, expect_reply=False)
+        if future.exception() is not None:
+            raise future.exception()
+        return future
+
+    def _resolve(self, number, body):
+        with self._lock:
+            match = next((entry for entry in self._pending if entry[0] == number), None)
+            if match is not None:
+                self._pending.remove(match)
+            elif number in self._unanswered:
+                # Reply to a command sent with expect_reply=False
+                self._unanswered.remove(number)
+            elif self._pending:
+                match = self._pending.popleft()
+        if match is None or match[1].done():
+            return
+        _, future, _, decode = match
+        try:
+            future.set_result(decode(body))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _expired(self):
+        with self._lock:
+            return bool(self._pending) and self._pending[0][2] < time.monotonic()
+
+    def _read_loop(self, sock):
+        # Replies are received in place, [start, end) holds the bytes not parsed yet
+        buffer = bytearray(BUFFER_SIZE)
+        view = memoryview(buffer)
+        start = end = 0
+        try:
+            while self._socket is sock:
+                try:
+                    received = sock.recv_into(view[end:])
+                except socket.timeout:
+                    received = None
+                if received == 0:
+                    raise ConnectionError("CAEN server closed the connection")
+                if received:
+                    end += received
+                    needed = HEADER.size
+                    while end - start >= HEADER.size:
+                        length, number = HEADER.unpack_from(buffer, start)
+                        if length < HEADER.size:
+                            raise ConnectionError(f"Invalid CAEN reply length {length}")
+                        if end - start < length:
+                            needed = length
+                            break
+                        self._resolve(number, view[start + HEADER.size : start + length])
+                        start += length
+                    if start == end:
+                        start = end = 0
+                    elif start + needed > len(buffer):
+                        # Move the partial reply to the front, into a buffer sized from its header if it does not fit
+                        partial = bytes(view[start:end])
+                        if needed > len(buffer):
+                            buffer = bytearray(needed)
+                            view = memoryview(buffer)
+                        buffer[: len(partial)] = partial
+                        start, end = 0, len(partial)
+                if self._expired():
+                    raise TimeoutError(f"No reply from the CAEN server {self.ip}:{self.port}")
+        except Exception as e:
+            self._reset(sock, e)
+
+    def _reset(self, sock, error):
+        """Drop a connection and fail the requests waiting on it"""
+        pending = []
+        with self._lock:
+            # A late error of an old connection must not fail the requests of the current one
+            if self._socket is sock:
+                self._socket = None
+                pending = list(self._pending)
+                self._pending.clear()
+        try:
+            sock.close()
+        except OSError:
+            pass
+        for _, future, _, _ in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self):
+        with self._send_lock:
+            sock = self._socket
+            if sock is not None:
+                self._reset(sock, ConnectionError("CAEN client closed"))
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_caen_client(ip, port):
+    """Shared CAENClient of a server, one connection per (ip, port)"""
+    with _clients_lock:
+        client = _clients.get((ip, port))
+        if client is None:
+            client = _clients[(ip, port)] = CAENClient(ip, port)
+        return client
@@ -0,0 +1,237 @@
+import logging
+import re
+import threading
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+from caen.command_queue import CAENCommandQueue, get_command_queue
+
+logger = logging.getLogger(__name__)
+
+STATUS_MESSAGE = "GetStatus,PowerSupplyId:caen"
+# Seconds between two GetStatus polls of a server
+STATUS_INTERVAL = 2.0
+
+# caen_<channel>_<field>:<value>, the field is after the last underscore
+STATUS_TOKEN = re.compile(rb"caen_([^,:]+)_([^_,:]+):([^,]*)")
+
+
+class CAENStatus(Mapping):
+    """Parsed GetStatus reply, one row per channel and one column per field.
+
+    values[row, col] holds the value of channels[row] and fields[col], NaN
+    where the reply had none. Views read whole columns, e.g.
+    status.column("IsOn")[status.rows(channels)]. The snapshot is shared by
+    all subscribers and read only. As a mapping it still answers the flat
+    "caen_<channel>_<field>" keys of the previous dict format.
+    """
+
+    def __init__(self, channels, fields, values):
+        self.channels = tuple(channels)
+        self.fields = tuple(fields)
+        self.values = values
+        self.values.flags.writeable = False
+        self._rows = {channel: row for row, channel in enumerate(self.channels)}
+        self._cols = {field: col for col, field in enumerate(self.fields)}
+        self._missing = np.full(len(self.channels), np.nan)
+        self._missing.flags.writeable = False
+
+    @classmethod
+    def parse(cls, reply):
+        """Parse a reply body, str or any bytes-like object such as the memoryview of the receive buffer"""
+        if isinstance(reply, str):
+            reply = reply.encode("utf-8")
+        rows = {}
+        cols = {}
+        cells = []
+        for match in STATUS_TOKEN.finditer(reply):
+            channel, field, value = match.groups()
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+            row = rows.setdefault(channel, len(rows))
+            col = cols.setdefault(field, len(cols))
+            cells.append((row, col, value))
+        values = np.full((len(rows), len(cols)), np.nan)
+        if cells:
+            row, col, value = zip(*cells)
+            values[list(row), list(col)] = value
+        return cls((c.decode() for c in rows), (f.decode() for f in cols), values)
+
+    def rows(self, channels):
+        """Row indices of channels, -1 for the ones not in the reply"""
+        return np.array([self._rows.get(channel, -1) for channel in channels], dtype=int)
+
+    def column(self, field):
+        """Values of a field for every channel, all NaN if the reply did not have it"""
+        col = self._cols.get(field)
+        return self._missing if col is None else self.values[:, col]
+
+    def select(self, channels, fields=("IsOn", "Voltage", "Current")):
+        """Values of the fields for the channels, shape (channels, fields), NaN where missing"""
+        rows = self.rows(channels)
+        found = rows >= 0
+        result = np.full((len(rows), len(fields)), np.nan)
+        for col, field in enumerate(fields):
+            result[found, col] = self.column(field)[rows[found]]
+        return result
+
+    def value(self, channel, field, default=None):
+        row = self._rows.get(channel)
+        col = self._cols.get(field)
+        if row is None or col is None or np.isnan(self.values[row, col]):
+            return default
+        return float(self.values[row, col])
+
+    def any_on(self, channels):
+        """True if any of the channels reports IsOn"""
+        rows = self.rows(channels)
+        rows = rows[rows >= 0]
+        return bool((self.column("IsOn")[rows] > 0.5).any())
+
+    def to_dict(self):
+        """{"caen_<channel>_<field>": value}, e.g. for the status store and JSON"""
+        return dict(self.items())
+
+    def _split(self, key):
+        if not isinstance(key, str) or not key.startswith("caen_"):
+            return None, None
+        channel, _, field = key[5:].rpartition("_")
+        return self._rows.get(channel), self._cols.get(field)
+
+    def __getitem__(self, key):
+        row, col = self._split(key)
+        if row is None or col is None or np.isnan(self.values[row, col]):
+            raise KeyError(key)
+        return float(self.values[row, col])
+
+    def __iter__(self):
+        for row, col in zip(*np.nonzero(~np.isnan(self.values))):
+            yield f"caen_{self.channels[row]}_{self.fields[col]}"
+
+    def __len__(self):
+        return int((~np.isnan(self.values)).sum())
+
+
+def parse_status(reply):
+    """CAENStatus of a GetStatus reply"""
+    return CAENStatus.parse(reply)
+
+
+def any_on(status, channels):
+    """True if any of the channels is on in a CAENStatus or a flat caen_<channel>_IsOn dict"""
+    if isinstance(status, CAENStatus):
+        return status.any_on(channels)
+    return any(bool(status.get(f"caen_{channel}_IsOn", False)) for channel in channels)
+
+
+class CAENStatusPoller:
+    """One GetStatus poll loop per CAEN server, shared by all its views.
+
+    A background thread polls the server every `interval` seconds through
+    its shared command queue, behind any pending command, parses the reply once and passes the same CAENStatus
+    to every subscriber. Subscribers must not modify it. Errors go to
+    the subscribers' on_error callables. The server sees one poll per
+    interval however many widgets are subscribed, and none without any.
+    Callbacks run on the poll thread, Qt widgets subscribe a signal's emit.
+    """
+
+    def __init__(self, ip, port, interval=STATUS_INTERVAL, client=None):
+        self.ip = ip
+        self.port = port
+        self.interval = interval
+        # A client given for tests gets its own queue
+        self.commands = CAENCommandQueue(client) if client is not None else get_command_queue(ip, port)
+        self.client = self.commands.client
+        self.latest = None
+        self.updated_at = None
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback, on_error=None):
+        """Call callback(snapshot) after every poll, starts polling with the first subscriber"""
+        with self._lock:
+            self._subscribers.append((callback, on_error))
+        if self.latest is not None:
+            self._notify(callback, self.latest)
+        self.start()
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [entry for entry in self._subscribers if entry[0] != callback]
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"caen-status-{self.ip}:{self.port}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.client.timeout + 2.0)
+
+    def refresh(self):
+        """Poll now instead of waiting for the end of the interval, e.g. after a command"""
+        self._wake.set()
+
+    def poll(self):
+        """Query the status once and fan it out, returns the snapshot or None on errors"""
+        try:
+            future = self.commands.submit(STATUS_MESSAGE, decode=parse_status)
+            snapshot = future.result(self.client.timeout + 1.0).reply
+        except Exception as e:
+            logger.debug(f"CAEN status poll of {self.ip}:{self.port} failed: {e}")
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for _, on_error in subscribers:
+                if on_error is not None:
+                    self._notify(on_error, str(e))
+            return None
+        self.latest = snapshot
+        self.updated_at = time.time()
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback, _ in subscribers:
+            self._notify(callback, snapshot)
+        return snapshot
+
+    def _notify(self, callback, value):
+        try:
+            callback(value)
+        except Exception as e:
+            logger.error(f"Error in CAEN status subscriber {callback}: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            with self._lock:
+                active = bool(self._subscribers)
+            if active:
+                self.poll()
+            self._wake.wait(max(0.0, self.interval - (time.monotonic() - started)))
+            self._wake.clear()
+
+
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+def get_status_poller(ip, port, interval=None):
+    """Shared CAENStatusPoller of a server, interval changes the polling rate of all its views"""
+    with _pollers_lock:
+        poller = _pollers.get((ip, port))
+        if poller is None:
+            poller = _pollers[(ip, port)] = CAENStatusPoller(ip, port)
+        if interval is not None:
+            poller.interval = interval
+        return poller
@@ -2,47 +2,12 @@
 import sys
 import datetime
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
-import socket
+import os
 
-BUFFER_SIZE = 100000
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from caen.caen_client import get_caen_client
 
 
-class tcp_util:
-    """Utility class for tcp communication management."""
-    def __init__(self, ip, port):
-        self.ip = ip
-        self.port = port
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.headerBytes = 4
-        self.connectSocket()
-
-    def __del__(self):
-        """Destructor, closes socket"""
-        try:
-            self.closeSocket()
-        except:
-            pass
-
-    def connectSocket(self):
-        """Connects socket"""
-        self.socket.connect((self.ip, self.port))
-
-    def closeSocket(self):
-        """Closes socket connection"""
-        self.socket.close()
-
-    def sendMessage(self, message):
-        """Encodes message and sends it on socket"""
-        encodedMessage = self.encodeMessage(message)
-        self.socket.send(encodedMessage)
-
-    def encodeMessage(self, message):
-        """Encodes message adding 4 bytes header"""
-        messageLength = len(message) + self.headerBytes + 4
-        N = 0
-        encodedMessage = (messageLength).to_bytes(4, byteorder='big') + N.to_bytes(4, byteorder='big') + message.encode('utf-8')
-        return encodedMessage
-
 class caen:
     def on(self, channel, verbose=True):
         self.send('TurnOn,PowerSupplyId:caen,ChannelId:' + channel, verbose=verbose)
@@ -52,11 +17,14 @@ class caen:
 
     def send(self, message, receive=False, verbose=True):
         if verbose: print(str(datetime.datetime.now()), message)
-        tcpClass = tcp_util(ip='192.168.0.45', port=7000)
-        tcpClass.sendMessage(message)
+        client = get_caen_client('192.168.0.45', 7000)
         if receive:
-            data = tcpClass.socket.recv(BUFFER_SIZE)[8:].decode("utf-8")
+            # Waits for the reply so a dead server fails the query instead of hanging
+            data = client.call(message)
             if verbose: print(data)
+        else:
+            # Commands are not answered, they succeed once written
+            client.send(message)
 
 if __name__ == "__main__":
     parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
@@ -73,9 +41,13 @@ if __name__ == "__main__":
         sys.exit(1)
 
     caen_controller = caen()
-    if args.action == "on":
-        caen_controller.on(args.channel)
-    elif args.action == "off":
-        caen_controller.off(args.channel)
+    try:
+        if args.action == "on":
+            caen_controller.on(args.channel)
+        elif args.action == "off":
+            caen_controller.off(args.channel)
+    except Exception as e:
+        print(f"CAEN command failed: {e}")
+        sys.exit(1)
     
     print("DONE")
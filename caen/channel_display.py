@@ -0,0 +1,61 @@
+import numpy as np
+
+# Parsed once per LED, the colour then follows the "led" property
+LED_STYLE = (
+    'QFrame[led="on"] { background-color: green; }'
+    'QFrame[led="off"] { background-color: red; }'
+    'QFrame[led="warn"] { background-color: yellow; }'
+)
+
+
+def init_led(frame, state="off"):
+    """Give a QFrame used as a LED the precomputed style, its colour is then switched with set_led"""
+    frame.setStyleSheet(LED_STYLE)
+    frame.setProperty("led", state)
+
+
+def set_led(frame, state):
+    """Switch a LED to "on", "off" or "warn", returns False without touching it if unchanged"""
+    if frame.property("led") == state:
+        return False
+    frame.setProperty("led", state)
+    # Re-evaluate the property selectors of this widget only
+    frame.style().unpolish(frame)
+    frame.style().polish(frame)
+    return True
+
+
+class ChannelDisplay:
+    """Last rendered state of the channels of a CAEN panel.
+
+    changed() compares the IsOn/Voltage/Current columns of a CAENStatus with
+    those of the previous one and returns only the channels whose values
+    moved, set_text() skips labels already showing the same text. A panel
+    refreshed every poll then only touches the widgets that really change.
+    """
+
+    def __init__(self, channels, fields=("IsOn", "Voltage", "Current")):
+        self.channels = list(channels)
+        self.fields = tuple(fields)
+        self.values = np.full((len(self.channels), len(self.fields)), np.nan)
+        self._text = {}
+
+    def changed(self, status):
+        """[(channel, values)] of the channels whose values differ from the last status"""
+        values = status.select(self.channels, self.fields)
+        same = (values == self.values) | (np.isnan(values) & np.isnan(self.values))
+        rows = np.flatnonzero(~same.all(axis=1))
+        self.values = values
+        return [(self.channels[row], values[row]) for row in rows]
+
+    def set_text(self, key, label, text):
+        """Set a label text unless it already shows it, returns True if it was set"""
+        if self._text.get(key) == text:
+            return False
+        label.setText(text)
+        self._text[key] = text
+        return True
+
+    def reset(self, channels=None):
+        """Forget what was rendered, e.g. after the channels of the panel change"""
+        self.__init__(self.channels if channels is None else channels, self.fields)
@@ -0,0 +1,185 @@
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from caen.caen_client import decode_text, get_caen_client
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_SAFETY = 0
+PRIORITY_COMMAND = 1
+PRIORITY_STATUS = 2
+
+# Requests written to the server and not answered yet. The server answers in
+# order, so this bounds how long a safety command waits behind older requests
+MAX_IN_FLIGHT = 2
+
+# reply: decoded reply (None without one), wait: s spent in the queue, round_trip: s from send to reply or write
+CommandResult = collections.namedtuple("CommandResult", ["reply", "wait", "round_trip"])
+
+
+def command_priority(message):
+    """TurnOff commands first, then other commands, status polls last"""
+    if message.startswith("TurnOff"):
+        return PRIORITY_SAFETY
+    if message.startswith("GetStatus"):
+        return PRIORITY_STATUS
+    return PRIORITY_COMMAND
+
+
+def command_target(message):
+    """(PowerSupplyId, ChannelId) of a command, None for the missing ones"""
+    fields = dict(token.split(":", 1) for token in message.split(",")[1:] if ":" in token)
+    return fields.get("PowerSupplyId"), fields.get("ChannelId")
+
+
+def superseded_by(message, turn_off):
+    """True if a queued command must not be sent after turn_off, which overtakes it in the queue"""
+    supply, channel = command_target(turn_off)
+    other_supply, other_channel = command_target(message)
+    return supply == other_supply and (channel is None or channel == other_channel)
+
+
+class CAENCommandQueue:
+    """Thread-safe priority queue of the commands sent to one CAEN server.
+
+    submit() returns a Future of a CommandResult. A worker thread sends the
+    queued commands by priority, TurnOff first, and keeps at most
+    `max_in_flight` of them unanswered on the connection, so a safety
+    command never waits behind a backlog of queued polls. As it overtakes
+    them, a TurnOff fails the commands still queued for its channel, or for
+    the whole supply without ChannelId, so a TurnOn submitted before it
+    cannot switch the channel back on. A GetStatus submitted while an
+    identical one is still queued shares its future instead of being sent
+    twice.
+    """
+
+    def __init__(self, client, max_in_flight=MAX_IN_FLIGHT):
+        self.client = client
+        self._condition = threading.Condition()
+        self._heap = []
+        self._queued = {}
+        self._counter = itertools.count()
+        self._slots = threading.Semaphore(max_in_flight)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"caen-commands-{client.ip}:{client.port}", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        with self._condition:
+            return len(self._heap)
+
+    def submit(self, message, decode=decode_text, priority=None, trace=None, expect_reply=None):
+        """Queue a message, returns a Future of its CommandResult.
+
+        Only GetStatus waits for a reply unless expect_reply says otherwise,
+        other commands are done once written and do not hold an in-flight
+        slot. trace gets a "send" span once the message is written.
+        """
+        priority = command_priority(message) if priority is None else priority
+        if expect_reply is None:
+            expect_reply = priority == PRIORITY_STATUS
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("CAEN command queue closed")
+            key = (message, decode)
+            if priority == PRIORITY_STATUS and trace is None and key in self._queued:
+                return self._queued[key][1]
+            future = Future()
+            entry = (message, future, decode, trace, time.monotonic(), expect_reply)
+            if priority == PRIORITY_STATUS:
+                self._queued[key] = entry
+            superseded = self._drop_superseded(message) if message.startswith("TurnOff") else []
+            heapq.heappush(self._heap, (priority, next(self._counter), entry))
+            self._condition.notify()
+        for queued_message, queued_future in superseded:
+            if queued_future.set_running_or_notify_cancel():
+                queued_future.set_exception(RuntimeError(f"{queued_message} superseded by {message}"))
+        return future
+
+    def _drop_superseded(self, turn_off):
+        """Remove the queued commands turn_off supersedes, returns their (message, future), with the lock held"""
+        kept = []
+        superseded = []
+        for item in self._heap:
+            priority, _, (message, future, _, _, _, _) = item
+            if priority == PRIORITY_COMMAND and superseded_by(message, turn_off):
+                superseded.append((message, future))
+            else:
+                kept.append(item)
+        if superseded:
+            heapq.heapify(kept)
+            self._heap = kept
+        return superseded
+
+    def _next(self):
+        with self._condition:
+            while not self._heap and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None
+            _, _, entry = heapq.heappop(self._heap)
+            message, _, decode, _, _, _ = entry
+            if self._queued.get((message, decode)) is entry:
+                del self._queued[(message, decode)]
+            return entry
+
+    def _run(self):
+        while True:
+            self._slots.acquire()
+            entry = self._next()
+            if entry is None:
+                self._slots.release()
+                return
+            message, future, decode, trace, queued, expect_reply = entry
+            if not future.set_running_or_notify_cancel():
+                self._slots.release()
+                continue
+            sent = time.monotonic()
+            try:
+                request = self.client.request(message, decode=decode, expect_reply=expect_reply)
+            except Exception as e:
+                self._slots.release()
+                future.set_exception(e)
+                continue
+            if trace is not None and not (request.done() and request.exception() is not None):
+                trace.mark("send")
+            request.add_done_callback(lambda request, future=future, queued=queued, sent=sent: self._done(request, future, queued, sent))
+
+    def _done(self, request, future, queued, sent):
+        self._slots.release()
+        error = request.exception()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(CommandResult(request.result(), sent - queued, time.monotonic() - sent))
+
+    def close(self):
+        """Stop the worker, the queued commands fail"""
+        with self._condition:
+            self._closed = True
+            pending = [entry for _, _, entry in self._heap]
+            self._heap.clear()
+            self._queued.clear()
+            self._condition.notify_all()
+        for _, future, _, _, _, _ in pending:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("CAEN command queue closed"))
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_command_queue(ip, port):
+    """Shared CAENCommandQueue of a server, on its shared CAENClient"""
+    with _queues_lock:
+        queue = _queues.get((ip, port))
+        if queue is None:
+            queue = _queues[(ip, port)] = CAENCommandQueue(get_caen_client(ip, port))
+        return queue
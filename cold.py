@@ -5,8 +5,9 @@ import yaml
 import argparse
 import logging
 import time
+import threading
 from PyQt5 import QtWidgets, uic, QtGui
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
 from coldroom.system import System
 from coldroom.thermal_camera_gui import ThermalCameraTab
 from coldroom.modules_list_gui import ModulesListTab
@@ -20,7 +21,9 @@ from coldroom.safety import (
     check_light_safe_to_turn_on,
     check_marta_safe,
 )
+from coldroom.interlock import MODULES, default_interlock_rules, lv_off_action, module_channels
 from caen.caenGUIall import caenGUIall
+from caen.command_queue import get_command_queue
 from Inner_tracker_GUI.caenGUIall_v2 import caenGUI8LV
 from db.module_db import ModuleDB
 from db.utils import *
@@ -30,6 +33,18 @@ from db.utils import *
 logger = logging.getLogger("integration")
 
 
+class StatusSignals(QObject):
+    """Carries status store change events to the GUI thread"""
+
+    changed = pyqtSignal(object)
+
+
+class ModuleSignals(QObject):
+    """Carries the module endpoints fetched in the background to the GUI thread"""
+
+    endpoints = pyqtSignal(str, object, object)
+
+
 class MainApp(QtWidgets.QMainWindow):
     def __init__(self):
         super(MainApp, self).__init__()
@@ -38,13 +53,19 @@ class MainApp(QtWidgets.QMainWindow):
         self.system = System()
         self.mounted_modules = None
         self.number_of_modules = 0  # Add this line
+        self.module_signals = ModuleSignals()
+        self.module_signals.endpoints.connect(self.on_module_endpoints)
         # Set up the main UI
         self.setup_ui()
 
         # Connect signals and slots
         self.connect_signals()
 
-        # Setup update timer
+        # Status widgets update on change, the timer only refreshes elapsed times and derived safety state
+        self.setup_status_bindings()
+        # The CAEN status reaches status["caen"] and its MQTT topic whether or not the interlock is enabled
+        self.system.start_caen_status(self.caen_tab.queryThread.ip, self.caen_tab.queryThread.port)
+        self.start_interlock()
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_ui)
         self.update_timer.start(1000)  # Update every second
@@ -61,6 +82,8 @@ class MainApp(QtWidgets.QMainWindow):
             if hasattr(self, "update_timer"):
                 self.update_timer.stop()
                 logger.debug("Stopped update timer")
+            if hasattr(self, "status_signals"):
+                self.system.status_store.remove_listener(self._status_listener)
 
             # Cleanup Thermal Camera tab if it exists
             if hasattr(self, "thermal_camera_tab"):
@@ -68,9 +91,8 @@ class MainApp(QtWidgets.QMainWindow):
                 logger.debug("Cleaned up Thermal Camera tab")
 
             # Cleanup MQTT connection
-            if hasattr(self, "system") and hasattr(self.system, "mqtt_client"):
-                self.system.mqtt_client.disconnect()
-                self.system.mqtt_client.loop_stop()
+            if hasattr(self, "system") and hasattr(self.system, "mqtt"):
+                self.system.mqtt.disconnect()
                 logger.debug("Disconnected MQTT client")
 
             # Cleanup MARTA Cold Room client
@@ -216,6 +238,7 @@ class MainApp(QtWidgets.QMainWindow):
             self.modules_list_tab.populate_from_config(
                 self.caen_tab, self.mounted_modules, self.number_of_modules, self.thermal_camera_tab
             )
+            self.module_temperatures_tab.set_module_roi(self.modules_list_tab.module_roi)
         return self.ring_id
 
     def setup_ring_id(self):
@@ -235,6 +258,7 @@ class MainApp(QtWidgets.QMainWindow):
             self.message_box.setText("Invalid ring ID format. Must start with L1_, L2_, or L3_.")
             self.message_box.exec_()
         self.modules_list_tab.populate_from_config(self.caen_tab, self.mounted_modules, self.number_of_modules)
+        self.module_temperatures_tab.set_module_roi(self.modules_list_tab.module_roi)
 
     def save_ring_id(self):
         ring_history_file = os.path.join(os.path.dirname(__file__), "ring_history.txt")
@@ -243,25 +267,42 @@ class MainApp(QtWidgets.QMainWindow):
         logger.info(f"Ring ID {self.ring_id} saved successfully.")
 
     def get_mounted_modules(self):
-        self.mounted_modules = get_modules_on_ring(self.ring_id, db_url=self.module_db.db_url)
-        for module_name in self.mounted_modules:
-            self.mounted_modules[module_name].update(get_module_endpoints(module_name, db_url=self.module_db.db_url))
-            self.mounted_modules[module_name].update(
-                {"speed": get_module_speed(module_name, db_url=self.module_db.db_url)}
-            )
-            self.mounted_modules[module_name].update(
-                {"fuseId": get_module_fuse_id(module_name, db_url=self.module_db.db_url)}
-            )
-            self.mounted_modules[module_name].update(
-                {
-                    "temperature_offsets": get_module(module_name, db_url=self.module_db.db_url).get(
-                        "temperature_offsets", {}
-                    )
-                }
-            )
+        """Load the modules of the ring, their endpoints follow in the background"""
+        self.mounted_modules = get_modules_on_ring(self.ring_id, db_url=self.module_db.db_url) or {}
+        # The ring query returns the module documents, speed, fuse ID and offsets need no further request
+        for module in self.mounted_modules.values():
+            module.update(get_module_details(module))
+        self.publish_module_channels()
+        threading.Thread(
+            target=self.fetch_module_endpoints, args=(dict(self.mounted_modules),), daemon=True
+        ).start()
         logger.debug(f"Mounted modules for ring {self.ring_id}: {self.mounted_modules}")
         return self.mounted_modules
 
+    def fetch_module_endpoints(self, modules):
+        """Fetch the module snapshots concurrently, handing each result to the GUI thread"""
+        try:
+            for module_name, endpoints in iter_module_endpoints(modules, db_url=self.module_db.db_url):
+                self.module_signals.endpoints.emit(module_name, modules[module_name], endpoints)
+        except Exception as e:
+            logger.error(f"Error fetching module endpoints: {e}")
+
+    def on_module_endpoints(self, module_name, module, endpoints):
+        """Fill the FC7, LV and HV of a module once its snapshot arrives"""
+        try:
+            # Results of a ring that is no longer loaded are dropped
+            if not endpoints or self.mounted_modules.get(module_name) is not module:
+                return
+            module.update(endpoints)
+            self.publish_module_channels()
+            self.modules_list_tab.update_module_endpoints(module_name)
+        except Exception as e:
+            logger.error(f"Error updating endpoints of {module_name}: {e}")
+
+    def publish_module_channels(self):
+        """Put the CAEN channels of the mounted modules in the status store, the interlock rules depend on them"""
+        self.system.update_status({MODULES: module_channels(self.mounted_modules)})
+
     def load_settings_to_ui(self):
         # Fill settings UI with current values
         self.settings_tab.brokerLineEdit.setText(self.system.settings["mqtt"]["broker"])
@@ -551,8 +592,204 @@ class MainApp(QtWidgets.QMainWindow):
             self.statusBar().showMessage(error_msg)
             logger.error(error_msg)
 
+    def setup_status_bindings(self):
+        """Resolve the status widgets once and map every (subsystem, key) to the setters of its widgets"""
+        central = self.marta_coldroom_tab
+
+        def label(name, fmt="{}"):
+            widget = central.findChild(QtWidgets.QLabel, name)
+
+            def set_text(value):
+                if value is not None:
+                    widget.setText(fmt.format(value))
+
+            return set_text if widget else None
+
+        def led(name, on="green", off="black"):
+            widget = central.findChild(QtWidgets.QFrame, name)
+
+            def set_color(value):
+                widget.setStyleSheet(f"background-color: {on if value else off};")
+
+            return set_color if widget else None
+
+        def mapped(setter, convert):
+            return (lambda value: setter(convert(value))) if setter else None
+
+        def field(setter, key):
+            # Nested status, e.g. coldroom ch_temperature {"value", "status", "setpoint"}
+            return mapped(setter, lambda value: (value or {}).get(key))
+
+        bindings = {
+            ("cleanroom", "temperature"): [label("cleanroom_temp_value_label", "{:.1f}")],
+            ("cleanroom", "humidity"): [label("cleanroom_humidity_value_label", "{:.1f}")],
+            ("cleanroom", "dewpoint"): [label("cleanroom_dewpoint_value_label", "{:.1f}")],
+            ("cleanroom", "pressure"): [label("cleanroom_pressure_value_label", "{:.1f}")],
+            ("cleanroom", "last_update"): [label("cleanroom_last_update_value_label")],
+            ("coldroom", "ch_temperature"): [
+                field(label("coldroom_temp_value_label", "{:.1f}"), "value"),
+                field(led("ctrl_temp_LED"), "status"),
+                field(label("coldroom_temp_set_point_label", "{:.1f}"), "setpoint"),
+            ],
+            ("coldroom", "ch_humidity"): [
+                field(label("coldroom_humidity_value_label", "{:.1f}"), "value"),
+                field(led("ctrl_humidity_LED"), "status"),
+                field(label("coldroom_humidity_set_point_label", "{:.1f}"), "setpoint"),
+            ],
+            ("coldroom", "dew_point_c"): [label("coldroom_dewpoint_value_label", "{:.1f}")],
+            ("coldroom", "light"): [led("light_LED", on="yellow")],
+            ("coldroom", "CmdDoorUnlock_Reff"): [
+                mapped(label("coldroom_door_state_label"), lambda value: "OPEN" if value else "CLOSED")
+            ],
+            ("coldroom", "running"): [
+                mapped(label("coldroom_run_state_label"), lambda value: "Running" if value else "Stopped")
+            ],
+            ("coldroom", "dry_air_status"): [led("dryair_LED", off="red")],
+            ("coldroomair", "air_bypass_status"): [led("dryair_bypass_LED", off="red")],
+            ("co2_sensor", "CO2"): [self.update_co2_label],
+            ("alarm", None): [label("alarm_value")],
+            ("marta", "fsm_state"): [label("marta_state_label"), self.update_marta_state],
+            ("marta", "alarm_message"): [self.update_marta_alarm_message],
+            ("marta", "TT05_CO2"): [label("marta_temp_supply_value_label", "{:.1f}")],
+            ("marta", "TT06_CO2"): [label("marta_temp_return_value_label", "{:.1f}")],
+            ("marta", "temperature_setpoint"): [label("marta_temp_set_point_label", "{:.1f}")],
+            ("marta", "PT05_CO2"): [label("marta_pressure_supply_value_label", "{:.3f}")],
+            ("marta", "PT06_CO2"): [label("marta_pressure_return_value_label", "{:.3f}")],
+            ("marta", "LP_speed"): [label("marta_speed_value_label", "{:.1f}")],
+            ("marta", "speed_setpoint"): [label("marta_speed_set_point_label", "{:.1f}")],
+            ("marta", "set_flow_active"): [led("marta_flow_flag_LED")],
+            ("marta", "flow_setpoint"): [label("marta_flow_set_point_label", "{:.1f}")],
+        }
+        self.status_bindings = {
+            item: [setter for setter in setters if setter is not None] for item, setters in bindings.items()
+        }
+        self.co2_label = central.findChild(QtWidgets.QLabel, "coldroom_co2_value_label")
+        self.dryair_bypass_led = central.findChild(QtWidgets.QFrame, "dryair_bypass_LED")
+        if self.dryair_bypass_led:
+            # Unknown until the first bypass message
+            self.dryair_bypass_led.setStyleSheet("background-color: yellow;")
+
+        # Widgets of the periodic update_ui tick
+        self.cleanroom_elapsed_label = central.findChild(QtWidgets.QLabel, "cleanroom_last_update_value_label_2")
+        self.setpoint_lineedits = {
+            name: central.findChild(QtWidgets.QLineEdit, name)
+            for name in ("coldroom_temp_LE", "coldroom_humidity_LE", "marta_temp_LE")
+        }
+        self.light_on_button = central.findChild(QtWidgets.QPushButton, "coldroom_light_on_PB")
+        self.safe_to_open_led = central.findChild(QtWidgets.QFrame, "safe_to_open_LED")
+        self.door_safety_msg_label = central.findChild(QtWidgets.QLabel, "door_safety_msg")
+        self.door_safe = None  # state shown by safe_to_open_LED, restyled only when it flips
+
+        # Change events are emitted on the MQTT thread, the signal queues them to the GUI thread
+        self.status_signals = StatusSignals()
+        self.status_signals.changed.connect(self.on_status_changed)
+        self._status_listener = self.status_signals.changed.emit
+        self.system.status_store.add_listener(self._status_listener)
+        self.on_status_changed(self.system.status_store.snapshot())
+
+    def start_interlock(self):
+        """Register the soft interlock rules switching the CAEN LV channels off and start the engine"""
+        if not self.system.settings.get("Interlock", {}).get("enabled", True):
+            logger.warning("Soft interlock disabled in the settings")
+            return
+        # The rules see the CAEN status fed into the status store by start_caen_status
+        # and the module channels from publish_module_channels
+        interlock = self.system.interlock
+        action = lv_off_action(
+            self.send_caen_command, lambda: interlock.status, lambda message: self.system.mqtt.publish("/alarm", message)
+        )
+        for rule in default_interlock_rules(action):
+            interlock.add_rule(rule)
+        interlock.start()
+
+    def send_caen_command(self, message):
+        """Queue a command on the shared CAEN command queue without waiting for the reply, callable from any thread
+
+        TurnOff commands are sent ahead of everything else queued.
+        """
+        def report(future):
+            if future.exception() is not None:
+                logger.error(f"CAEN command {message} failed: {future.exception()}")
+
+        get_command_queue(self.caen_tab.queryThread.ip, self.caen_tab.queryThread.port).submit(message).add_done_callback(report)
+
+    def on_status_changed(self, changes):
+        """Update only the widgets bound to the changed status keys"""
+        for change in changes:
+            for setter in self.status_bindings.get((change.subsystem, change.key), ()):
+                try:
+                    setter(change.new)
+                except Exception as e:
+                    logger.error(f"Error updating UI for {change.subsystem} {change.key}: {e}")
+
+    def update_co2_label(self, co2_value):
+        label = self.co2_label
+        if label is None or co2_value is None:
+            return
+        label.setText(f"{co2_value:.1f}")
+
+        # Optional: common styling for visibility
+        base_style = """
+            QLabel {
+                font-weight: bold;
+                padding: 2px 6px;
+                border-radius: 4px;
+            }
+        """
+
+        if 800 < co2_value <= 1000:
+            label.setStyleSheet(base_style + """
+                QLabel {
+                    color: #ffb6c1;
+                    background-color: #4a1f2a;
+                }
+            """)
+        elif 1000 < co2_value <= 2500:
+            label.setStyleSheet(base_style + """
+                QLabel {
+                    color: #ffa500;
+                    background-color: #3a2600;
+                }
+            """)
+        elif co2_value > 2500:
+            label.setStyleSheet(base_style + """
+                QLabel {
+                    color: #ff4d4d;
+                    background-color: #3a0000;
+                }
+            """)
+        else:
+            label.setStyleSheet(base_style + """
+                QLabel {
+                    color: black;
+                    background-color: transparent;
+                }
+            """)
+
+    def update_marta_state(self, fsm_state):
+        if fsm_state is None:
+            return
+        central = self.marta_coldroom_tab
+        alarm_frame = central.findChild(QtWidgets.QFrame, "marta_alarm_frame")
+        if alarm_frame:
+            # Highlight alarm state
+            alarm_frame.setStyleSheet("background-color: red;" if fsm_state == "ALARM" else "")
+        if fsm_state == "ALARM":
+            self.update_marta_alarm_message(self.system.status_store.get("marta", "alarm_message"))
+        self.statusBar().showMessage(f"MARTA State: {fsm_state}")
+        self.update_marta_button_states(fsm_state)
+        logger.debug(f"Updated MARTA state: {fsm_state}")
+
+    def update_marta_alarm_message(self, alarm_message):
+        # The alarm message is only shown while MARTA is in ALARM
+        if alarm_message is None or self.system.status_store.get("marta", "fsm_state") != "ALARM":
+            return
+        alarm_msg = self.marta_coldroom_tab.findChild(QtWidgets.QLabel, "marta_alarm_msg_label")
+        if alarm_msg:
+            alarm_msg.setText(alarm_message)
+
     def update_ui(self):
-        """Update UI with current system status"""
+        """Periodic update of the time-dependent and derived safety state, status values update on change"""
         try:
             self.system._martacoldroom._cleanroom_last_update_elapsed_time = (
                 time.time() - self.system._martacoldroom._cleanroom_last_update_timer
@@ -561,518 +798,61 @@ class MainApp(QtWidgets.QMainWindow):
                 "elapsed_time"
             ] = self.system._martacoldroom._cleanroom_last_update_elapsed_time
             self.modules_list_tab.light_on = check_light_status(self.system.status)
-            # Get the central widget
-            central = self.marta_coldroom_tab
-
-            # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-            # =========================================================================================== CLEANROOM    ===========================================================================================
-            # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-            # Update Cleanroom values from system status
-            if "cleanroom" in self.system.status:
-                cleanroom = self.system.status["cleanroom"]
-                logger.debug(f"Updating Cleanroom UI with status: {cleanroom}")
-
-                # Temperature
-                label = central.findChild(QtWidgets.QLabel, "cleanroom_temp_value_label")
-                if label and "temperature" in cleanroom and cleanroom["temperature"] is not None:
-                    temp_value = cleanroom["temperature"]
-                    label.setText(f"{temp_value:.1f}")
-                    logger.debug(f"Updated Cleanroom temperature: {temp_value}")
-
-                # Humidity
-                label = central.findChild(QtWidgets.QLabel, "cleanroom_humidity_value_label")
-                if label and "humidity" in cleanroom and cleanroom["humidity"] is not None:
-                    humid_value = cleanroom["humidity"]
-                    label.setText(f"{humid_value:.1f}")
-                    logger.debug(f"Updated Cleanroom humidity: {humid_value}")
-
-                # Dewpoint
-                label = central.findChild(QtWidgets.QLabel, "cleanroom_dewpoint_value_label")
-                if label and "dewpoint" in cleanroom and cleanroom["dewpoint"] is not None:
-                    dewpoint = cleanroom["dewpoint"]
-                    label.setText(f"{dewpoint:.1f}")
-                    logger.debug(f"Updated Cleanroom dewpoint: {dewpoint}")
-
-                # Pressure
-                label = central.findChild(QtWidgets.QLabel, "cleanroom_pressure_value_label")
-                if label and "pressure" in cleanroom and cleanroom["pressure"] is not None:
-                    pressure = cleanroom["pressure"]
-                    label.setText(f"{pressure:.1f}")
-                    logger.debug(f"Updated Cleanroom pressure: {pressure}")
-
-                label = central.findChild(QtWidgets.QLabel, "cleanroom_last_update_value_label")
-                if label and "last_update" in cleanroom and cleanroom["last_update"] is not None:
-                    last_update = cleanroom["last_update"]
-                    label.setText(f"{last_update}")
-                    logger.debug(f"Updated Cleanroom last update: {last_update}")
-
-                label = central.findChild(QtWidgets.QLabel, "cleanroom_last_update_value_label_2")
-                if label:
-                    delta_t_update = self.system._martacoldroom._cleanroom_last_update_elapsed_time
-                    delta_t_update = time.strftime("%H:%M:%S", time.gmtime(delta_t_update))
-                    label.setText(delta_t_update)
-                    logger.debug(f"Updated Cleanroom delta t update: {delta_t_update}")
-
-            # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-            # =========================================================================================== COLDROOM    ===========================================================================================
-            # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-            # Update Cold Room values from system status
-            if "coldroom" in self.system.status:
-                coldroom = self.system.status["coldroom"]
-                logger.debug(f"Updating Coldroom UI with status: {coldroom}")
-
-                temp_control_active = coldroom.get("ch_temperature", {}).get("status", False)
-                hum_control_active = coldroom.get("ch_humidity", {}).get("status", False)
-
-                # =========================================================================================== COLDROOM TEMPERATURE PROCESS ===========================================================================================
-
-                # Temperature Current Value
-                if "ch_temperature" in coldroom:
-                    # Current temperature
-                    label = central.findChild(QtWidgets.QLabel, "coldroom_temp_value_label")
-                    if label:
-                        temp_value = coldroom["ch_temperature"].get("value", "?")
-                        label.setText(f"{temp_value:.1f}")
-                        logger.debug(f"Updated temperature: {temp_value}")
-
-                # Temperature control LED
-                if "ch_temperature" in coldroom:
-                    if "status" in coldroom["ch_temperature"]:
-                        # Update Temperature control LED
-                        ctrl_temp_led = central.findChild(QtWidgets.QFrame, "ctrl_temp_LED")
-                        if ctrl_temp_led:
-                            ctrl_temp_led.setStyleSheet(
-                                "background-color: green;"
-                                if coldroom["ch_temperature"]["status"]
-                                else "background-color: black;"
-                            )  # LED is green when ON
-                            logger.debug(
-                                f"Updated temp control LED: {'green' if coldroom['ch_temperature']['status'] else 'black'}"
-                            )
-
-                # Temperature setpoint lineedit
-                lineedit = central.findChild(QtWidgets.QLineEdit, "coldroom_temp_LE")
-                if lineedit:
-                    user_has_entered_value = bool(lineedit.text().strip())
-                    # Case 1: User is actively typing - preserve their input
-                    if lineedit.hasFocus():
-                        pass
-                    # Case 2: User has entered a value - use that value
-                    elif temp_control_active and user_has_entered_value:
-                        coldroom_temp_lE_active_flag = True
-                        setpoint = lineedit.text()
-                        lineedit.setText(str(setpoint))
-                        logger.debug(f"Updated temperature setpoint: {setpoint}")
-                    else:
-                        coldroom_temp_lE_active_flag = False
-                        lineedit.clear()
-                        logger.debug("Cleared temperature setpoint")
-
-                # Temperature setpoint label
-                if "ch_temperature" in coldroom:
-                    if "setpoint" in coldroom["ch_temperature"]:
-                        label = central.findChild(QtWidgets.QLabel, "coldroom_temp_set_point_label")
-                        if label:
-                            temp_setpoint = coldroom["ch_temperature"]["setpoint"]
-                        label.setText(f"{temp_setpoint:.1f}")
-                        logger.debug(f"Updated temperature setpoint: {temp_setpoint}")
-
-                # =========================================================================================== COLDROOM HUMIDITY PROCESS ===========================================================================================
-
-                # Humidity Current Value
-                if "ch_humidity" in coldroom:
-                    # Current humidity
-                    label = central.findChild(QtWidgets.QLabel, "coldroom_humidity_value_label")
-                    if label:
-                        humid_value = coldroom["ch_humidity"].get("value", "?")
-                        label.setText(f"{humid_value:.1f}")
-                        logger.debug(f"Updated humidity: {humid_value}")
-
-                # Humidity control LED
-                if "ch_humidity" in coldroom:
-                    if "status" in coldroom["ch_humidity"]:
-                        # Update Humidity control LED
-                        ctrl_humidity_led = central.findChild(QtWidgets.QFrame, "ctrl_humidity_LED")
-                        if ctrl_humidity_led:
-                            ctrl_humidity_led.setStyleSheet(
-                                "background-color: green;"
-                                if coldroom["ch_humidity"]["status"]
-                                else "background-color: black;"
-                            )  # LED is green when ON
-                            logger.debug(
-                                f"Updated humidity control LED: {'green' if coldroom['ch_humidity']['status'] else 'black'}"
-                            )
-
-                # Humidity setpoint lineedit
-                lineedit = central.findChild(QtWidgets.QLineEdit, "coldroom_humidity_LE")
-                if lineedit:
-                    user_has_entered_value = bool(lineedit.text().strip())
-                    # Case 1: User is actively typing - preserve their input
-                    if lineedit.hasFocus():
-                        pass
-                    # Case 2: User has entered a value - use that value
-                    elif hum_control_active and user_has_entered_value:
-                        coldroom_humidity_lE_active_flag = True
-                        setpoint = lineedit.text()
-                        lineedit.setText(str(setpoint))
-                        logger.debug(f"Updated humidity setpoint: {setpoint}")
-                    else:
-                        coldroom_humidity_lE_active_flag = False
-                        lineedit.clear()
-                        logger.debug("Cleared humidity setpoint")
-
-                # Humidity setpoint label
-                if "ch_humidity" in coldroom:
-                    if "setpoint" in coldroom["ch_humidity"]:
-                        label = central.findChild(QtWidgets.QLabel, "coldroom_humidity_set_point_label")
-                        if label:
-                            humid_setpoint = coldroom["ch_humidity"]["setpoint"]
-                            label.setText(f"{humid_setpoint:.1f}")
-                            logger.debug(f"Updated humidity setpoint: {humid_setpoint}")
-
-                # =========================================================================================== COLDROOM DEWPOINT PROCESS ===========================================================================================
-                # Dewpoint (from coldroom data)
-                label = central.findChild(QtWidgets.QLabel, "coldroom_dewpoint_value_label")
-                if label and "dew_point_c" in coldroom:
-                    dewpoint = coldroom["dew_point_c"]
-                    label.setText(f"{dewpoint:.1f}")
-                    logger.debug(f"Updated dewpoint: {dewpoint}")
-
-                # =========================================================================================== COLDROOM LIGHT PROCESS ===========================================================================================
-                # Light status and LED
-                if "light" in coldroom:
-                    # Update light LED
-                    light_led = central.findChild(QtWidgets.QFrame, "light_LED")
-                    if light_led:
-                        light_led.setStyleSheet(
-                            "background-color: yellow;" if coldroom["light"] else "background-color: black;"
-                        )  # LED is yellow when ON
-                        logger.debug(f"Updated light LED: {'yellow' if coldroom['light'] else 'black'}")
-                        if bool(coldroom["light"]) is False:
-                            logger.debug("Light off, check if it is safe")
-                            used_caen_channels = self.modules_list_tab.get_used_channels()
-                            is_safe = check_light_safe_to_turn_on(
-                                self.system.status, self.caen_tab.last_response, used_caen_channels
-                            )
-                            button = central.findChild(QtWidgets.QPushButton, "coldroom_light_on_PB")
-                            if not is_safe:
-                                logger.debug("not safe")
-                                if button:
-                                    button.setEnabled(False)
-                                    logger.debug("Disabled light button due to safety check")
-                            else:
-                                if button:
-                                    button.setEnabled(True)
-                                    logger.debug("Enabled light button after safety check")
-                # Dry air bypass
-                dryair_bypass_led = central.findChild(QtWidgets.QFrame, "dryair_bypass_LED")
-                coldroom_air = self.system.status.get("coldroomair", {})
-                if dryair_bypass_led:
-                    if "air_bypass_status" in coldroom_air:
-                        dryair_bypass_led.setStyleSheet(
-                            "background-color: green;" if coldroom_air["air_bypass_status"] else "background-color: red;"
-                        )
-                        logger.debug(
-                            f"Updated dry air bypass LED: {'green' if coldroom_air['air_bypass_status'] else 'red'}"
-                        )
+            self.modules_list_tab.marta_safe, self.modules_list_tab.marta_log_msg = check_marta_safe(self.system.status)
+
+            # Time since the last cleanroom update
+            label = self.cleanroom_elapsed_label
+            if label:
+                delta_t_update = self.system._martacoldroom._cleanroom_last_update_elapsed_time
+                label.setText(time.strftime("%H:%M:%S", time.gmtime(delta_t_update)))
+
+            coldroom = self.system.status.get("coldroom", {})
+            temp_control_active = coldroom.get("ch_temperature", {}).get("status", False)
+            hum_control_active = coldroom.get("ch_humidity", {}).get("status", False)
+
+            # Setpoint line edits are cleared when their control is off, unless the user is typing
+            for name, control_active in (
+                ("coldroom_temp_LE", temp_control_active),
+                ("coldroom_humidity_LE", hum_control_active),
+                ("marta_temp_LE", temp_control_active),
+            ):
+                lineedit = self.setpoint_lineedits[name]
+                if lineedit and not lineedit.hasFocus() and not (control_active and lineedit.text().strip()):
+                    lineedit.clear()
+
+            # The light and door safety also depend on the CAEN channels, which are not in the status
+            used_caen_channels = self.modules_list_tab.get_used_channels()
+            if "light" in coldroom and not bool(coldroom["light"]):
+                logger.debug("Light off, check if it is safe")
+                is_safe = check_light_safe_to_turn_on(
+                    self.system.status, self.caen_tab.last_response, used_caen_channels
+                )
+                button = self.light_on_button
+                if button:
+                    button.setEnabled(bool(is_safe))
+                    logger.debug(f"Light button enabled after safety check: {bool(is_safe)}")
+
+            # Update safe to open LED based on door safety check
+            safe_to_open_led = self.safe_to_open_led
+            if "coldroom" in self.system.status and safe_to_open_led:
+                is_safe, door_msg = check_door_safe_to_open(
+                    self.system.status, self.caen_tab.last_response, used_caen_channels
+                )
+                # Check co2 values
+                co2_data = self.system.status.get("co2_sensor", {})
+                if "CO2" in co2_data:
+                    if co2_data["CO2"] > 800:
+                        is_safe = False
+                        door_msg += "CO2 levels safe: False"
                     else:
-                        dryair_bypass_led.setStyleSheet("background-color: yellow;")
-                        logger.debug("Set dry air bypass LED to grey (unknown status)")
-
-                # =========================================================================================== COLDROOM DOOR PROCESS ===========================================================================================
-                # Door status and LED
-                if "CmdDoorUnlock_Reff" in coldroom:
-                    door_status = "OPEN" if coldroom["CmdDoorUnlock_Reff"] else "CLOSED"
-                    label = central.findChild(QtWidgets.QLabel, "coldroom_door_state_label")
-                    if label:
-                        label.setText(door_status)
-                        logger.debug(f"Updated door status: {door_status}")
-
-                # =========================================================================================== COLDROOM RUN PROCESS ===========================================================================================
-                # Update safe to open LED based on door safety check
-                safe_to_open_led = central.findChild(QtWidgets.QFrame, "safe_to_open_LED")
-                if safe_to_open_led:
-                    used_caen_channels = self.modules_list_tab.get_used_channels()
-                    is_safe, door_msg = check_door_safe_to_open(
-                        self.system.status, self.caen_tab.last_response, used_caen_channels
-                    )
-                    # Check co2 values
-                    if "co2_sensor" in self.system.status:
-                        co2_data = self.system.status["co2_sensor"]
-                        if "CO2" in co2_data:
-                            if co2_data["CO2"] > 800:
-                                is_safe = False
-                                door_msg += "CO2 levels safe: False"
-                            else:
-                                door_msg += "CO2 levels safe: True"
+                        door_msg += "CO2 levels safe: True"
+                if bool(is_safe) != self.door_safe:
+                    self.door_safe = bool(is_safe)
                     safe_to_open_led.setStyleSheet("background-color: green;" if is_safe else "background-color: red;")
                     logger.debug(f"Updated safe to open LED: {'green' if is_safe else 'red'} (is_safe={is_safe})")
-                    self.system._martacoldroom.publish_door_safety_status(is_safe)
-                    self.marta_coldroom_tab.findChild(QtWidgets.QLabel, "door_safety_msg").setText(door_msg)
-
-                # =========================================================================================== COLDROOM RUN PROCESS ===========================================================================================
-                # Run status
-                if "running" in coldroom:
-                    label = central.findChild(QtWidgets.QLabel, "coldroom_run_state_label")
-                    if label:
-                        run_text = "Running" if coldroom["running"] else "Stopped"
-                        label.setText(run_text)
-                        logger.debug(f"Updated run state label: {run_text}")
-
-                # =========================================================================================== COLDROOM DRY AIR PROCESS ===========================================================================================
-                # External dry air status
-                if "dry_air_status" in coldroom:
-                    # Update dry air LED
-                    dry_air_led = central.findChild(QtWidgets.QFrame, "dryair_LED")
-                    if dry_air_led:
-                        dry_air_led.setStyleSheet(
-                            "background-color: green;" if coldroom["dry_air_status"] else "background-color: red;"
-                        )
-                        logger.debug(f"Updated dry air LED: {'green' if coldroom['dry_air_status'] else 'red'}")
-
-            # Update CO2 sensor data
-            if "co2_sensor" in self.system.status:
-                co2_data = self.system.status["co2_sensor"]
-                logger.debug(f"Updating CO2 sensor data: {co2_data}")
-
-                # # Update CO2 level
-                # label = central.findChild(QtWidgets.QLabel, "coldroom_co2_value_label")
-                # if label and "CO2" in co2_data:
-                #     co2_value = co2_data["CO2"]
-                #     label.setText(f"{co2_value:.1f}")
-                #     logger.debug(f"Updated CO2 level: {co2_value}")
-                #     if co2_value > 800 and co2_value <= 1000:
-                #         label.setStyleSheet("color: pink;")
-                #     elif co2_value > 1000 and co2_value <= 2500:
-                #         label.setStyleSheet("color: orange;")
-                #     elif co2_value > 2500:
-                #         label.setStyleSheet("color: red;")
-
-                # Update CO2 level
-                label = central.findChild(QtWidgets.QLabel, "coldroom_co2_value_label")
-                if label and "CO2" in co2_data:
-                    co2_value = co2_data["CO2"]
-                    label.setText(f"{co2_value:.1f}")
-                    logger.debug(f"Updated CO2 level: {co2_value}")
-
-                    # Optional: common styling for visibility
-                    base_style = """
-                        QLabel {
-                            font-weight: bold;
-                            padding: 2px 6px;
-                            border-radius: 4px;
-                        }
-                    """
-
-                    if 800 < co2_value <= 1000:
-                        label.setStyleSheet(base_style + """
-                            QLabel {
-                                color: #ffb6c1;
-                                background-color: #4a1f2a;
-                            }
-                        """)
-                    elif 1000 < co2_value <= 2500:
-                        label.setStyleSheet(base_style + """
-                            QLabel {
-                                color: #ffa500;
-                                background-color: #3a2600;
-                            }
-                        """)
-                    elif co2_value > 2500:
-                        label.setStyleSheet(base_style + """
-                            QLabel {
-                                color: #ff4d4d;
-                                background-color: #3a0000;
-                            }
-                        """)
-                    else:
-                        label.setStyleSheet(base_style + """
-                            QLabel {
-                                color: black;
-                                background-color: transparent;
-                            }
-                        """)
-
-            # check alarms
-            if "alarm" in self.system.status:
-                label = central.findChild(QtWidgets.QLabel, "alarm_value")
-                if label:
-                    alarm_value = self.system.status.get("alarm", "None")
-                    label.setText(f"{alarm_value}")
-                    logger.debug(f"Updated alarm value: {alarm_value}")
-
-            # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-            # =========================================================================================== MARTA    ===========================================================================================
-            # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>
-
-            self.modules_list_tab.marta_safe, self.modules_list_tab.marta_log_msg = check_marta_safe(self.system.status)
-            # Update MARTA CO2 Plant values
-            if "marta" in self.system.status:
-                marta = self.system.status["marta"]
-                logger.debug(f"Updating MARTA UI with status: {marta}")
-
-                # =========================================================================================== MARTA FSM STATE PROCESS ===========================================================================================
-                # Update FSM state
-                if "fsm_state" in marta:
-                    state_label = central.findChild(QtWidgets.QLabel, "marta_state_label")
-                    if state_label:
-                        state_label.setText(marta["fsm_state"])
-                        logger.debug(f"Updated MARTA state: {marta['fsm_state']}")
-                    # Update state-specific UI elements
-                    if marta["fsm_state"] == "ALARM":
-                        # Highlight alarm state
-                        alarm_frame = central.findChild(QtWidgets.QFrame, "marta_alarm_frame")
-                        if alarm_frame:
-                            alarm_frame.setStyleSheet("background-color: red;")
-
-                        # Show alarm message
-                        alarm_msg = central.findChild(QtWidgets.QLabel, "marta_alarm_msg_label")
-                        if alarm_msg and "alarm_message" in marta:
-                            alarm_msg.setText(marta["alarm_message"])
-                    else:
-                        # Clear alarm highlighting
-                        alarm_frame = central.findChild(QtWidgets.QFrame, "marta_alarm_frame")
-                        if alarm_frame:
-                            alarm_frame.setStyleSheet("")
-
-                # =========================================================================================== MARTA TEMPERATURE PROCESS ===========================================================================================
-                # Temperature from TT05_CO2 (Supply)
-                if "TT05_CO2" in marta:
-                    label = central.findChild(QtWidgets.QLabel, "marta_temp_supply_value_label")
-                    if label:
-                        temp_value = marta["TT05_CO2"]
-                        label.setText(f"{temp_value:.1f}")
-                        logger.debug(f"Updated MARTA supply temperature: {temp_value}")
-                        # Temperature from TT06_CO2 (Return)
-                if "TT06_CO2" in marta:
-                    label = central.findChild(QtWidgets.QLabel, "marta_temp_return_value_label")
-                    if label:
-                        temp_value = marta["TT06_CO2"]
-                        label.setText(f"{temp_value:.1f}")
-                        logger.debug(f"Updated MARTA return temperature: {temp_value}")
-
-                # Temperature setpoint
-                lineedit = central.findChild(QtWidgets.QLineEdit, "marta_temp_LE")
-                if lineedit:
-                    user_has_entered_value = bool(lineedit.text().strip())
-                    # Case 1: User is actively typing - preserve their input
-                    if lineedit.hasFocus():
-                        pass
-                    # Case 2: User has entered a value - use that value
-                    elif temp_control_active and user_has_entered_value:
-                        marta_temp_lE_active_flag = True
-                        temp_setpoint = lineedit.text()
-                        lineedit.setText(str(temp_setpoint))
-                        logger.debug(f"Updated MARTA temperature setpoint: {temp_setpoint}")
-                    else:
-                        marta_temp_lE_active_flag = False
-                        lineedit.clear()
-                        logger.debug("Cleared MARTA temperature setpoint")
-
-                # Temperature setpoint label
-                if "temperature_setpoint" in marta:
-                    label = central.findChild(QtWidgets.QLabel, "marta_temp_set_point_label")
-                    if label:
-                        temp_setpoint = marta["temperature_setpoint"]
-                        label.setText(f"{temp_setpoint:.1f}")
-                        logger.debug(f"Updated MARTA temperature setpoint: {temp_setpoint}")
-
-                # =========================================================================================== MARTA PRESSURE PROCESS ===========================================================================================
-                # Pressure from PT05_CO2 (Supply)
-                if "PT05_CO2" in marta:
-                    label = central.findChild(QtWidgets.QLabel, "marta_pressure_supply_value_label")
-                    if label:
-                        pressure_value = marta["PT05_CO2"]
-                        label.setText(f"{pressure_value:.3f}")
-                        logger.debug(f"Updated MARTA supply pressure: {pressure_value}")
-
-                # Pressure from PT06_CO2 (Return)
-                if "PT06_CO2" in marta:
-                    label = central.findChild(QtWidgets.QLabel, "marta_pressure_return_value_label")
-                    if label:
-                        pressure_value = marta["PT06_CO2"]
-                        label.setText(f"{pressure_value:.3f}")
-                        logger.debug(f"Updated MARTA return pressure: {pressure_value}")
-
-                # =========================================================================================== MARTA SPEED PROCESS ===========================================================================================
-                # Speed
-                if "LP_speed" in marta:
-                    label = central.findChild(QtWidgets.QLabel, "marta_speed_value_label")
-                    if label:
-                        speed_value = marta["LP_speed"]
-                        label.setText(f"{speed_value:.1f}")
-                        logger.debug(f"Updated MARTA speed: {speed_value}")
-
-                # Speed setpoint
-                if "set_speed_setpoint" in marta:
-                    lineedit = central.findChild(QtWidgets.QLineEdit, "marta_speed_LE")
-                    if lineedit:
-                        user_has_entered_value = bool(lineedit.text().strip())
-                        # Case 1: User is actively typing - preserve their input
-                        if lineedit.hasFocus():
-                            pass
-                        # Case 2: User has entered a value - use that value
-                        elif user_has_entered_value:
-                            marta_speed_lE_active_flag = True
-                            speed_value = lineedit.text()
-                            lineedit.setText(str(speed_value))
-                            logger.debug(f"Updated MARTA speed setpoint: {speed_value}")
-                        else:
-                            marta_speed_lE_active_flag = False
-                            lineedit.clear()
-                            logger.debug("Cleared MARTA speed setpoint")
-
-                # Speed setpoint label
-                if "speed_setpoint" in marta:
-                    label = central.findChild(QtWidgets.QLabel, "marta_speed_set_point_label")
-                    if label:
-                        speed_setpoint = marta["speed_setpoint"]
-                        label.setText(f"{speed_setpoint:.1f}")
-                        logger.debug(f"Updated MARTA speed setpoint: {speed_setpoint}")
-
-                # =========================================================================================== MARTA FLOW PROCESS ===========================================================================================
-
-                # Flow control LED
-                if "set_flow_active" in marta:
-                    # Update Flow control LED
-                    ctrl_flow_led = central.findChild(QtWidgets.QFrame, "marta_flow_flag_LED")
-                    if ctrl_flow_led:
-                        ctrl_flow_led.setStyleSheet(
-                            "background-color: green;" if marta["set_flow_active"] else "background-color: black;"
-                        )  # LED is green when ON
-                        logger.debug(f"Updated flow control LED: {'green' if marta['set_flow_active'] else 'black'}")
-
-                # Flow setpoint lineedit
-                if "set_flow_setpoint" in marta:
-                    lineedit = central.findChild(QtWidgets.QLineEdit, "marta_flow_LE")
-                    if lineedit:
-                        user_has_entered_value = bool(lineedit.text().strip())
-                        # Case 1: User is actively typing - preserve their input
-                        if lineedit.hasFocus():
-                            pass
-                        # Case 2: User has entered a value - use that value
-                        elif user_has_entered_value:
-                            flow_value = lineedit.text()
-                            lineedit.setText(str(flow_value))
-                            logger.debug(f"Updated MARTA flow setpoint: {flow_value}")
-                        else:
-                            lineedit.clear()
-                            logger.debug("Cleared MARTA flow setpoint")
-
-                # Flow setpoint (affects speed)
-                if "flow_setpoint" in marta:
-                    label = central.findChild(QtWidgets.QLabel, "marta_flow_set_point_label")
-                    if label:
-                        flow_setpoint = marta["flow_setpoint"]
-                        label.setText(f"{flow_setpoint:.1f}")
-                        logger.debug(f"Updated MARTA flow setpoint: {flow_setpoint}")
-
-                # =========================================================================================== MARTA FSM STATE PROCESS ===========================================================================================
-                # Update FSM state in status bar if available
-                if "fsm_state" in marta:
-                    self.statusBar().showMessage(f"MARTA State: {marta['fsm_state']}")
-                    self.update_marta_button_states(marta["fsm_state"])
-                    logger.debug(f"Updated MARTA state: {marta['fsm_state']}")
+                self.system._martacoldroom.publish_door_safety_status(is_safe)
+                if self.door_safety_msg_label:
+                    self.door_safety_msg_label.setText(door_msg)
 
         except Exception as e:
             error_msg = f"Error updating UI: {str(e)}"
@@ -0,0 +1,56 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BlitManager:
+    """Redraw a few animated artists of a figure on top of a cached background.
+
+    The static parts of the figure (axes, labels, colorbar, annotations) are
+    rendered by a normal canvas.draw(), which also caches the background. After
+    that update() only restores the background and redraws the animated
+    artists, in the order they were given. Any full draw (resize, zoom,
+    draw_idle) refreshes the cached background automatically.
+    """
+
+    def __init__(self, canvas, animated_artists=()):
+        self.canvas = canvas
+        self._background = None
+        self._artists = []
+        self.set_artists(animated_artists)
+        self._cid = canvas.mpl_connect("draw_event", self.on_draw)
+
+    def set_artists(self, artists):
+        """Replace the list of animated artists"""
+        self._artists = list(artists)
+        for artist in self._artists:
+            artist.set_animated(True)
+
+    def on_draw(self, event):
+        """Cache the background after a full draw and put the animated artists back"""
+        if event is not None and event.canvas is not self.canvas:
+            return
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        figure = self.canvas.figure
+        for artist in self._artists:
+            if artist.figure is figure:
+                figure.draw_artist(artist)
+
+    def invalidate(self):
+        """Force a full redraw on the next update, e.g. after static parts changed"""
+        self._background = None
+
+    def update(self):
+        """Redraw the animated artists, falling back to a full draw if needed"""
+        if self._background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self._background)
+            self._draw_animated()
+            self.canvas.blit(self.canvas.figure.bbox)
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._cid)
@@ -0,0 +1,120 @@
+import numpy as np
+
+
+def _as_float(x):
+    """Numeric copy of x for the triangle areas, datetimes become numbers"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ms]").astype(np.int64).astype(float)
+    if x.dtype == object:
+        import matplotlib.dates as mdates
+
+        return np.asarray(mdates.date2num(list(x)), dtype=float)
+    return x.astype(float)
+
+
+def axis_pixel_width(ax, default=1000):
+    """Width in pixels of a matplotlib axis, the useful number of points per line"""
+    try:
+        width = int(ax.get_window_extent().width)
+    except Exception:
+        return default
+    return width if width > 0 else default
+
+
+def minmax_envelope(x, y, max_points):
+    """Reduce a series to about max_points keeping the min and max of every bucket.
+
+    The samples are split into max_points // 2 buckets of consecutive
+    indices; each one contributes its minimum and maximum, in time order, so
+    spikes stay visible. NaN only buckets are dropped. Shorter series are
+    returned as copies.
+    """
+    if len(y) <= max_points or max_points < 4:
+        return np.array(x), np.array(y)
+    selected = minmax_indices(y, max_points)
+    return np.asarray(x)[selected], np.asarray(y, dtype=float)[selected]
+
+
+def minmax_indices(y, max_points):
+    """Sorted indices of the points minmax_envelope keeps, all of them for series of at most max_points"""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max_points // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.intp)
+    starts = edges[:-1]
+
+    # NaN would win every reduction, replace it so it never is the min or max of a bucket with data
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    lows = np.minimum.reduceat(np.where(valid, y, np.inf), starts)
+    highs = np.maximum.reduceat(np.where(valid, y, -np.inf), starts)
+    has_data = np.add.reduceat(valid, starts) > 0
+
+    # Index of the first min and max in every bucket
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    index = np.arange(n)
+    is_low = valid & (y == lows[bucket])
+    is_high = valid & (y == highs[bucket])
+    low_index = np.full(buckets, n, dtype=np.intp)
+    high_index = np.full(buckets, n, dtype=np.intp)
+    np.minimum.at(low_index, bucket[is_low], index[is_low])
+    np.minimum.at(high_index, bucket[is_high], index[is_high])
+
+    first = np.minimum(low_index, high_index)[has_data]
+    second = np.maximum(low_index, high_index)[has_data]
+    selected = np.column_stack([first, second]).ravel()
+    # Flat buckets have their min and max at the same index
+    keep = np.ones(len(selected), dtype=bool)
+    keep[1::2] = selected[1::2] != selected[0::2]
+    return selected[keep]
+
+
+def lttb(x, y, max_points):
+    """Largest-Triangle-Three-Buckets downsampling of a series sorted by x.
+
+    Keeps the first and last points and, in each of max_points - 2 buckets,
+    the point forming the largest triangle with the point kept in the
+    previous bucket and the mean of the next one. Shapes and isolated
+    spikes survive better than with plain subsampling. NaN samples are
+    dropped first.
+    """
+    x_values = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n <= max_points or max_points < 3:
+        return x_values[valid], y[valid]
+
+    xf = _as_float(x_values[valid])
+    yf = y[valid]
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Mean of every bucket, the third vertex of the triangles of the previous bucket
+    sums_x = np.add.reduceat(xf[: n - 1], edges[:-1])
+    sums_y = np.add.reduceat(yf[: n - 1], edges[:-1])
+    counts = np.diff(edges)
+    means_x = np.append(sums_x / counts, xf[-1])
+    means_y = np.append(sums_y / counts, yf[-1])
+
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = xf[previous], yf[previous]
+        areas = np.abs((ax - means_x[i + 1]) * (yf[start:end] - ay) - (ax - xf[start:end]) * (means_y[i + 1] - ay))
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    indices = valid[selected]
+    return x_values[indices], y[indices]
+
+
+def decimate(x, y, max_points, method="minmax"):
+    """Reduce a series to about max_points for display, by min/max envelope (default) or LTTB"""
+    if method == "lttb":
+        return lttb(x, y, max_points)
+    return minmax_envelope(x, y, max_points)
@@ -0,0 +1,291 @@
+import collections
+import glob
+import os
+import threading
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One index record per archived frame
+INDEX_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("camera", "u1"),
+        ("position", "<f4"),
+        ("min_temperature", "<f4"),
+        ("max_temperature", "<f4"),
+    ]
+)
+
+# Frames of a full chunk sorted by position
+ANGLES_DTYPE = np.dtype([("position", "<f4"), ("slot", "<i4")])
+
+
+class ThermalFrameArchive:
+    """Append-only on-disk archive of thermal camera frames.
+
+    The archive is a directory of chunks of `chunk_frames` frames. Every chunk has
+    three files:
+      - chunk_NNNNNN.frames: preallocated float32 frames, accessed through np.memmap
+      - chunk_NNNNNN.index: one INDEX_DTYPE record per frame, appended after the frame
+      - chunk_NNNNNN.angles: (position, slot) sorted by position, written when the chunk is full
+
+    Frames are numbered globally in arrival order and timestamps never decrease,
+    so a time range is found with two binary searches (over the chunks, then
+    inside a chunk) on memory-mapped indexes, and an angle range with one binary
+    search per full chunk. Only a few chunks are kept mapped at a time, so memory
+    stays bounded whatever the length of the run. Reopening a directory continues
+    the archive.
+    """
+
+    def __init__(self, directory, chunk_frames=4096, frame_shape=(32, 24), flush_interval=64, open_chunks=8):
+        self.directory = directory
+        self.chunk_frames = int(chunk_frames)
+        self.frame_shape = tuple(frame_shape)
+        self.flush_interval = flush_interval
+        self.open_chunks = open_chunks
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._mapped = collections.OrderedDict()  # chunk -> (frames, index) memmaps of full chunks
+        # (first timestamp, last timestamp) of every full chunk, for the binary search over chunks
+        self._chunk_first = []
+        self._chunk_last = []
+
+        self._chunk = None  # number of the chunk being written
+        self._frames = None
+        self._index_file = None
+        self._count = 0  # frames in the chunk being written
+        self._pending = 0
+        self._last_timestamp = 0.0
+        self._open_existing()
+
+    def _path(self, chunk, kind):
+        return os.path.join(self.directory, f"chunk_{chunk:06d}.{kind}")
+
+    def _open_existing(self):
+        chunks = sorted(int(os.path.basename(p)[6:12]) for p in glob.glob(os.path.join(self.directory, "chunk_*.index")))
+        for chunk in chunks:
+            index = self._read_index(chunk)
+            if len(index) == 0:
+                continue
+            if len(index) < self.chunk_frames:
+                # The last chunk was not full, continue writing it
+                self._start_chunk(chunk, len(index))
+                self._last_timestamp = float(index["timestamp"][-1])
+                break
+            self._chunk_first.append(float(index["timestamp"][0]))
+            self._chunk_last.append(float(index["timestamp"][-1]))
+            self._last_timestamp = self._chunk_last[-1]
+            if not os.path.exists(self._path(chunk, "angles")):
+                self._write_angles(chunk, index)
+        if self._chunk is None:
+            self._start_chunk(len(self._chunk_first), 0)
+        if len(self):
+            logger.info(f"Thermal frame archive {self.directory} reopened with {len(self)} frames")
+
+    def _read_index(self, chunk, count=None):
+        """Memory-map the index of a chunk, ignoring a partially written last record"""
+        path = self._path(chunk, "index")
+        if count is None:
+            count = os.path.getsize(path) // INDEX_DTYPE.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=INDEX_DTYPE)
+        return np.memmap(path, dtype=INDEX_DTYPE, mode="r", shape=(count,))
+
+    def _start_chunk(self, chunk, count):
+        self._chunk = chunk
+        self._count = count
+        self._frames = np.memmap(
+            self._path(chunk, "frames"),
+            dtype=np.float32,
+            mode="r+" if os.path.exists(self._path(chunk, "frames")) else "w+",
+            shape=(self.chunk_frames,) + self.frame_shape,
+        )
+        index_path = self._path(chunk, "index")
+        if os.path.exists(index_path):
+            # Drop a partially written last record
+            with open(index_path, "r+b") as f:
+                f.truncate(count * INDEX_DTYPE.itemsize)
+        self._index_file = open(index_path, "ab")
+
+    def _write_angles(self, chunk, index):
+        order = np.argsort(index["position"], kind="stable")
+        angles = np.zeros(len(order), dtype=ANGLES_DTYPE)
+        angles["position"] = index["position"][order]
+        angles["slot"] = order
+        angles.tofile(self._path(chunk, "angles"))
+
+    def _seal_chunk(self):
+        """Close the full chunk being written and start the next one"""
+        self._frames.flush()
+        self._index_file.close()
+        index = self._read_index(self._chunk)
+        self._write_angles(self._chunk, index)
+        self._chunk_first.append(float(index["timestamp"][0]))
+        self._chunk_last.append(float(index["timestamp"][-1]))
+        self._start_chunk(self._chunk + 1, 0)
+
+    def __len__(self):
+        return len(self._chunk_first) * self.chunk_frames + self._count
+
+    def append(self, camera, position, frame, min_temperature, max_temperature, timestamp=None):
+        """Archive one frame and return its global index"""
+        if timestamp is None:
+            timestamp = time.time()
+        record = np.zeros(1, dtype=INDEX_DTYPE)
+        record["camera"] = camera
+        record["position"] = float(position) % 360.0
+        record["min_temperature"] = min_temperature
+        record["max_temperature"] = max_temperature
+
+        with self._lock:
+            # Keep timestamps sorted for the binary searches
+            self._last_timestamp = max(float(timestamp), self._last_timestamp)
+            record["timestamp"] = self._last_timestamp
+
+            # Frame first, so an index record always points to a complete frame
+            self._frames[self._count] = frame
+            self._index_file.write(record.tobytes())
+            number = len(self)
+            self._count += 1
+
+            self._pending += 1
+            if self._pending >= self.flush_interval:
+                self.flush()
+            if self._count == self.chunk_frames:
+                self._seal_chunk()
+        return number
+
+    def flush(self):
+        with self._lock:
+            self._frames.flush()
+            self._index_file.flush()
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._index_file is None:
+                return
+            self.flush()
+            self._index_file.close()
+            self._index_file = None
+            self._frames = None
+            self._mapped.clear()
+
+    def _chunk_arrays(self, chunk):
+        """Return (frames, index) of a chunk as memmaps"""
+        if chunk == self._chunk:
+            self._index_file.flush()
+            return self._frames, self._read_index(chunk, self._count)
+        if chunk in self._mapped:
+            self._mapped.move_to_end(chunk)
+            return self._mapped[chunk]
+        arrays = (
+            np.memmap(self._path(chunk, "frames"), dtype=np.float32, mode="r", shape=(self.chunk_frames,) + self.frame_shape),
+            self._read_index(chunk, self.chunk_frames),
+        )
+        self._mapped[chunk] = arrays
+        if len(self._mapped) > self.open_chunks:
+            self._mapped.popitem(last=False)
+        return arrays
+
+    def _split(self, number):
+        if not 0 <= number < len(self):
+            raise IndexError(f"Frame {number} not in archive of {len(self)} frames")
+        return divmod(int(number), self.chunk_frames)
+
+    def frame(self, number):
+        """Return a copy of one archived frame"""
+        with self._lock:
+            chunk, slot = self._split(number)
+            return np.array(self._chunk_arrays(chunk)[0][slot])
+
+    def frames(self, numbers):
+        """Return (records, frames) of the given frames as arrays"""
+        numbers = np.asarray(numbers, dtype=np.int64)
+        records = np.zeros(len(numbers), dtype=INDEX_DTYPE)
+        frames = np.zeros((len(numbers),) + self.frame_shape, dtype=np.float32)
+        with self._lock:
+            for chunk in np.unique(numbers // self.chunk_frames):
+                selected = np.flatnonzero(numbers // self.chunk_frames == chunk)
+                slots = numbers[selected] % self.chunk_frames
+                if chunk * self.chunk_frames + slots.max() >= len(self):
+                    raise IndexError(f"Frame {numbers[selected].max()} not in archive of {len(self)} frames")
+                chunk_frames, chunk_index = self._chunk_arrays(int(chunk))
+                records[selected] = chunk_index[slots]
+                frames[selected] = chunk_frames[slots]
+        return records, frames
+
+    def time_range(self, start=None, end=None):
+        """Return the (first, stop) global frame numbers with start <= timestamp < end"""
+        with self._lock:
+            return self._search_time(-np.inf if start is None else start), self._search_time(
+                np.inf if end is None else end
+            )
+
+    def _search_time(self, timestamp):
+        """Global number of the first frame with a timestamp >= timestamp"""
+        # Binary search over the full chunks, then inside the chunk
+        chunk = int(np.searchsorted(self._chunk_last, timestamp, side="left"))
+        if chunk < len(self._chunk_first) and self._chunk_first[chunk] >= timestamp:
+            return chunk * self.chunk_frames
+        _, index = self._chunk_arrays(chunk)
+        return chunk * self.chunk_frames + int(np.searchsorted(index["timestamp"], timestamp, side="left"))
+
+    def query(self, start=None, end=None, camera=None, angle_min=None, angle_max=None):
+        """Return the sorted global numbers of the frames matching all given criteria.
+
+        The time range is [start, end). The angle range [angle_min, angle_max] is in
+        degrees and may wrap around 0, e.g. angle_min=350, angle_max=10.
+        """
+        with self._lock:
+            first, stop = self.time_range(start, end)
+            if first >= stop:
+                return np.zeros(0, dtype=np.int64)
+
+            selected = []
+            for chunk in range(first // self.chunk_frames, (stop - 1) // self.chunk_frames + 1):
+                _, index = self._chunk_arrays(chunk)
+                base = chunk * self.chunk_frames
+                low = max(first - base, 0)
+                high = min(stop - base, len(index))
+
+                if angle_min is None and angle_max is None:
+                    slots = np.arange(low, high)
+                elif chunk == self._chunk:
+                    # Chunk being written has no angle order yet, it is at most chunk_frames long
+                    slots = low + np.flatnonzero(self._angle_mask(index["position"][low:high], angle_min, angle_max))
+                else:
+                    slots = self._angle_slots(chunk, angle_min, angle_max)
+                    slots = slots[(slots >= low) & (slots < high)]
+
+                if camera is not None and len(slots):
+                    slots = slots[index["camera"][slots] == camera]
+                selected.append(base + slots)
+            return np.sort(np.concatenate(selected)).astype(np.int64)
+
+    @staticmethod
+    def _angle_mask(positions, angle_min, angle_max):
+        angle_min = 0.0 if angle_min is None else angle_min % 360.0
+        angle_max = 360.0 if angle_max is None else angle_max % 360.0 or 360.0
+        if angle_min <= angle_max:
+            return (positions >= angle_min) & (positions <= angle_max)
+        return (positions >= angle_min) | (positions <= angle_max)
+
+    def _angle_slots(self, chunk, angle_min, angle_max):
+        """Slots of a full chunk in an angle range, by binary search on its angle order"""
+        angles = np.memmap(self._path(chunk, "angles"), dtype=ANGLES_DTYPE, mode="r")
+        positions = angles["position"]
+        angle_min = 0.0 if angle_min is None else angle_min % 360.0
+        angle_max = 360.0 if angle_max is None else angle_max % 360.0 or 360.0
+
+        def between(low, high):
+            return angles["slot"][np.searchsorted(positions, low, "left") : np.searchsorted(positions, high, "right")]
+
+        if angle_min <= angle_max:
+            return np.asarray(between(angle_min, angle_max), dtype=np.int64)
+        return np.concatenate([between(angle_min, 360.0), between(0.0, angle_max)]).astype(np.int64)
@@ -0,0 +1,108 @@
+import collections
+import threading
+import time
+import logging
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .hotspots import HotspotTracker, detect_hotspots
+
+logger = logging.getLogger(__name__)
+
+
+class HotspotWorker(QThread):
+    """Detect and track hotspots on every thermal camera frame off the GUI thread.
+
+    Frames are handed over by the thermal camera client through a bounded
+    queue; each one is labelled and folded into a HotspotTracker. Unlike the
+    stitching worker no frame is coalesced, every frame of every camera is
+    examined. If the queue overflows the oldest frames are dropped and counted.
+    """
+
+    events_ready = pyqtSignal(object)  # list of hotspot events, see HotspotTracker.update
+
+    def __init__(self, system, camera_positions, camera_fovs, module_roi=None, max_queued_frames=256):
+        super().__init__()
+        self.system = system
+        self.camera_positions = camera_positions
+        self.camera_fovs = dict(camera_fovs)
+
+        settings = system.settings.get("ThermalCamera", {})
+        self.delta = float(settings.get("hotspot_delta", 5.0))
+        self.min_area = int(settings.get("hotspot_min_area", 2))
+        self.tracker = HotspotTracker(module_roi, growth_threshold=float(settings.get("hotspot_growth", 0.5)))
+
+        self.dropped_frames = 0
+        self._queue = collections.deque(maxlen=max_queued_frames)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    ### Configuration, called from the GUI thread ###
+    def set_camera_fov(self, camera_name, fov):
+        with self._lock:
+            self.camera_fovs[camera_name] = fov
+
+    def set_module_roi(self, module_roi):
+        with self._lock:
+            self.tracker.set_module_roi(module_roi)
+
+    def reset(self):
+        with self._lock:
+            self._queue.clear()
+            self.tracker.clear()
+
+    def on_frame(self, camera_name, position):
+        """Frame listener of ThermalCameraMQTTClient, runs on the MQTT network thread"""
+        frame = self.system._thermalcamera._images.get(camera_name)
+        if frame is None:
+            return
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped_frames += 1
+        self._queue.append((camera_name, position, frame, time.time()))
+        self._wakeup.set()
+
+    def stop(self):
+        """Stop the thread"""
+        self._stopped.set()
+        self._wakeup.set()
+        self.wait()
+
+    ### Worker thread ###
+    def run(self):
+        while not self._stopped.is_set():
+            if not self._wakeup.wait(1.0):
+                continue
+            self._wakeup.clear()
+
+            events = []
+            while self._queue and not self._stopped.is_set():
+                camera_id, position, frame, timestamp = self._queue.popleft()
+                try:
+                    with self._lock:
+                        events.extend(self.process(camera_id, position, frame, timestamp))
+                except Exception as e:
+                    logger.error(f"Error detecting hotspots on {camera_id}: {e}")
+
+            if events:
+                self.system._thermalcamera.publish_hotspot_events(events)
+                self.events_ready.emit(events)
+
+    def process(self, camera_id, position, frame, timestamp):
+        """Label one frame and update the tracks of the camera side"""
+        # add +1 to the camera name to match the UI naming
+        camera_name = f"camera{int(camera_id[-1]) + 1}"
+        camera = self.camera_positions[camera_name]
+        fov = self.camera_fovs.get(camera_name, 20)
+
+        # Same column to angle mapping as the stitched panoramas
+        start_angle = (position + camera["position"] - fov / 2) % 360
+        width = frame.shape[1]
+        detections = detect_hotspots(frame, self.delta, self.min_area)
+        for detection in detections:
+            detection["angle"] = (start_angle + (detection["col"] + 0.5) * fov / width) % 360
+
+        events = self.tracker.update(camera["side"], start_angle, fov, detections, timestamp)
+        for event in events:
+            event["camera"] = camera_name
+        return events
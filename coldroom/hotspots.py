@@ -0,0 +1,154 @@
+import itertools
+import logging
+
+import numpy as np
+from scipy import ndimage
+
+logger = logging.getLogger(__name__)
+
+
+def detect_hotspots(frame, delta=5.0, min_area=2):
+    """Return the connected regions of a frame warmer than its median by more than delta.
+
+    Every hotspot is a dict with "area" (pixels), "peak", "mean" and the
+    centroid "row"/"col". Statistics of all regions are computed in one pass
+    with bincount, so the cost does not depend on the number of regions.
+    """
+    mask = frame > np.median(frame) + delta
+    if not mask.any():
+        return []
+
+    labels, count = ndimage.label(mask)
+    flat_labels = labels.ravel()
+    rows, cols = np.indices(frame.shape)
+
+    areas = np.bincount(flat_labels, minlength=count + 1)[1:]
+    sums = np.bincount(flat_labels, weights=frame.ravel(), minlength=count + 1)[1:]
+    row_sums = np.bincount(flat_labels, weights=rows.ravel(), minlength=count + 1)[1:]
+    col_sums = np.bincount(flat_labels, weights=cols.ravel(), minlength=count + 1)[1:]
+    peaks = ndimage.maximum(frame, labels, np.arange(1, count + 1))
+
+    return [
+        {
+            "area": int(areas[i]),
+            "peak": float(peaks[i]),
+            "mean": float(sums[i] / areas[i]),
+            "row": float(row_sums[i] / areas[i]),
+            "col": float(col_sums[i] / areas[i]),
+        }
+        for i in np.flatnonzero(areas >= min_area)
+    ]
+
+
+def angular_distance(a, b):
+    """Smallest distance in degrees between two angles"""
+    return abs((a - b + 180) % 360 - 180)
+
+
+class HotspotTracker:
+    """Follow hotspots across frames and cameras in angular coordinates.
+
+    Hotspots are tracked per ring side, so both cameras of a side feed the same
+    tracks as they sweep. A detection within match_distance degrees of a track
+    updates it; otherwise it starts a new track. A track is cleared once the
+    cameras have looked at its position `clear_after` times without seeing
+    it, or after `expiry` seconds without any update.
+
+    update() returns a list of events, dicts with "event" set to "new",
+    "growing" or "cleared" and the track state (id, side, angle, module,
+    area, peak, growth in degrees Celsius per second).
+    """
+
+    def __init__(self, module_roi=None, match_distance=3.0, growth_threshold=0.5, clear_after=3, expiry=120.0):
+        self.module_roi = module_roi
+        self.match_distance = match_distance
+        self.growth_threshold = growth_threshold
+        self.clear_after = clear_after
+        self.expiry = expiry
+        self.tracks = {}
+        self._ids = itertools.count(1)
+
+    def set_module_roi(self, module_roi):
+        self.module_roi = module_roi
+        for track in self.tracks.values():
+            track["module"] = self._module_at(track["side"], track["angle"])
+
+    def _module_at(self, side, angle):
+        if self.module_roi is None:
+            return None
+        return self.module_roi.module_at(side, angle)
+
+    @staticmethod
+    def _event(name, track):
+        event = {key: value for key, value in track.items() if key not in ("misses", "flagged")}
+        event["event"] = name
+        return event
+
+    def update(self, side, start_angle, fov, detections, timestamp):
+        """Fold the hotspots of one frame covering [start_angle, start_angle + fov) into the tracks.
+
+        Args:
+            detections: list of dicts with "angle", "area" and "peak"
+        """
+        events = []
+        matched = set()
+        for detection in sorted(detections, key=lambda d: -d["peak"]):
+            candidates = [
+                (angular_distance(track["angle"], detection["angle"]), track_id)
+                for track_id, track in self.tracks.items()
+                if track["side"] == side and track_id not in matched
+            ]
+            candidates = [c for c in candidates if c[0] <= self.match_distance]
+
+            if not candidates:
+                track_id = next(self._ids)
+                self.tracks[track_id] = {
+                    "id": track_id,
+                    "side": side,
+                    "angle": detection["angle"],
+                    "module": self._module_at(side, detection["angle"]),
+                    "area": detection["area"],
+                    "peak": detection["peak"],
+                    "growth": 0.0,
+                    "first_seen": timestamp,
+                    "last_seen": timestamp,
+                    "misses": 0,
+                    "flagged": False,
+                }
+                matched.add(track_id)
+                events.append(self._event("new", self.tracks[track_id]))
+                continue
+
+            _, track_id = min(candidates)
+            track = self.tracks[track_id]
+            matched.add(track_id)
+            dt = timestamp - track["last_seen"]
+            if dt > 0:
+                # Smoothed growth rate of the peak temperature
+                rate = (detection["peak"] - track["peak"]) / dt
+                track["growth"] = 0.5 * track["growth"] + 0.5 * rate
+            track["angle"] = detection["angle"]
+            track["module"] = self._module_at(side, detection["angle"])
+            track["area"] = detection["area"]
+            track["peak"] = detection["peak"]
+            track["last_seen"] = timestamp
+            track["misses"] = 0
+
+            growing = track["growth"] > self.growth_threshold
+            if growing and not track["flagged"]:
+                events.append(self._event("growing", track))
+            track["flagged"] = growing
+
+        # Tracks in view but not seen in this frame, and tracks not seen for too long
+        for track_id, track in list(self.tracks.items()):
+            if track_id in matched:
+                continue
+            if track["side"] == side and (track["angle"] - start_angle) % 360 < fov:
+                track["misses"] += 1
+            if track["misses"] >= self.clear_after or timestamp - track["last_seen"] > self.expiry:
+                del self.tracks[track_id]
+                events.append(self._event("cleared", track))
+        return events
+
+    def clear(self):
+        self.tracks = {}
@@ -0,0 +1,240 @@
+import os
+import queue
+import threading
+import time
+import logging
+from collections import deque
+
+import numpy as np
+
+from .safety import check_any_lv_on, check_lv_safe_on, check_marta_safe
+
+logger = logging.getLogger(__name__)
+
+ANY_KEY = "*"  # rule input matching every key of a subsystem, e.g. ("caen", ANY_KEY)
+MODULES = "modules"  # status subsystem with the "LV" and "HV" channels assigned to the mounted modules
+
+
+class InterlockRule:
+    """A safety condition over a set of status keys and the action taken when it trips.
+
+    condition(status) returns (tripped, message) from the status dict as seen
+    by the engine. The action is called as action(rule, message) when the
+    rule goes from safe to tripped; it re-arms once the condition clears.
+    With require_all the rule is only evaluated once every named input has a
+    value, so missing data at startup does not trip it.
+    """
+
+    def __init__(self, name, inputs, condition, action, require_all=True):
+        self.name = name
+        self.inputs = list(inputs)
+        self.condition = condition
+        self.action = action
+        self.require_all = require_all
+        self.tripped = False
+        self.evaluations = 0
+        self.trips = 0
+
+
+class InterlockEngine:
+    """Evaluate interlock rules on status changes in a dedicated thread.
+
+    The engine listens to the status store: every change event is timestamped
+    when received and queued, and the engine thread re-evaluates only the
+    rules depending on the changed keys, on its own copy of the status. The
+    time from MQTT receipt (or from the status change when no receipt time is
+    available) to the end of each triggered action is recorded; latency_report()
+    gives its percentiles and worst case.
+    """
+
+    def __init__(self, status_store, receipt_time=None, latency_budget=0.1, max_latency_samples=1000):
+        self.status_store = status_store
+        self.receipt_time = receipt_time
+        self.latency_budget = latency_budget
+        self.latencies = deque(maxlen=max_latency_samples)  # seconds from receipt to end of action
+        self.status = {}
+        self._rules = []
+        self._dependencies = {}  # (subsystem, key) -> rules, key may be ANY_KEY
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def add_rule(self, rule):
+        with self._lock:
+            self._rules.append(rule)
+            for item in rule.inputs:
+                self._dependencies.setdefault(item, []).append(rule)
+
+    @property
+    def rules(self):
+        return list(self._rules)
+
+    def affected_rules(self, changes):
+        """Rules depending on any of the changed keys, each once, in registration order"""
+        affected = set()
+        with self._lock:
+            for change in changes:
+                affected.update(self._dependencies.get((change.subsystem, change.key), ()))
+                affected.update(self._dependencies.get((change.subsystem, ANY_KEY), ()))
+            return [rule for rule in self._rules if rule in affected]
+
+    def on_status_changes(self, changes):
+        """Status store listener, called on the thread that updated the status"""
+        received = self.receipt_time() if self.receipt_time else None
+        self._queue.put((received or time.perf_counter(), changes))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self.status = {}
+        self.apply(self.status_store.snapshot())
+        self.status_store.add_listener(self.on_status_changes)
+        self._thread = threading.Thread(target=self.run, name="soft-interlock", daemon=True)
+        self._thread.start()
+        logger.info(f"Soft interlock started with {len(self._rules)} rules")
+
+    def stop(self):
+        self.status_store.remove_listener(self.on_status_changes)
+        self._stopped.set()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def run(self):
+        try:
+            # Best effort, raising the priority needs CAP_SYS_NICE on Linux
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), -10)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"Could not raise the soft interlock thread priority: {e}")
+
+        while not self._stopped.is_set():
+            item = self._queue.get()
+            if item is None:
+                continue
+            received, changes = item
+            # Handle everything queued so far in one pass, timed from the oldest receipt
+            while not self._queue.empty():
+                queued = self._queue.get_nowait()
+                if queued is None:
+                    continue
+                changes = changes + queued[1]
+            try:
+                self.process(changes, received)
+            except Exception as e:
+                logger.error(f"Error in soft interlock: {e}")
+
+    def apply(self, changes):
+        """Fold change events into the engine copy of the status"""
+        for change in changes:
+            if change.key is None:
+                self.status[change.subsystem] = change.new
+            elif change.new is None:
+                self.status.get(change.subsystem, {}).pop(change.key, None)
+            else:
+                self.status.setdefault(change.subsystem, {})[change.key] = change.new
+
+    def process(self, changes, received):
+        """Re-evaluate the rules affected by a batch of changes and run the actions of those tripping"""
+        self.apply(changes)
+        for rule in self.affected_rules(changes):
+            if rule.require_all and not self._has_inputs(rule):
+                continue
+            rule.evaluations += 1
+            try:
+                tripped, message = rule.condition(self.status)
+            except Exception as e:
+                # Conservative approach, a rule that cannot be evaluated is tripped
+                tripped, message = True, f"Error evaluating {rule.name}: {e}"
+            if tripped and not rule.tripped:
+                rule.trips += 1
+                logger.warning(f"Soft interlock {rule.name} tripped: {message}")
+                try:
+                    rule.action(rule, message)
+                except Exception as e:
+                    logger.error(f"Error in soft interlock action {rule.name}: {e}")
+                latency = time.perf_counter() - received
+                self.latencies.append(latency)
+                if latency > self.latency_budget:
+                    logger.warning(f"Soft interlock {rule.name} reacted in {latency * 1e3:.1f} ms")
+            rule.tripped = tripped
+
+    def _has_inputs(self, rule):
+        for subsystem, key in rule.inputs:
+            values = self.status.get(subsystem)
+            if key == ANY_KEY:
+                if not values:
+                    return False
+            elif key is None:
+                if values is None:
+                    return False
+            elif not isinstance(values, dict) or values.get(key) is None:
+                return False
+        return True
+
+    def latency_report(self):
+        """{"actions", "p50", "p99", "max"} of the receipt to action latency in ms"""
+        if not self.latencies:
+            return {"actions": 0, "p50": None, "p99": None, "max": None}
+        latencies = np.asarray(self.latencies) * 1e3
+        p50, p99 = np.percentile(latencies, [50, 99])
+        return {"actions": len(latencies), "p50": float(p50), "p99": float(p99), "max": float(latencies.max())}
+
+
+def module_channels(modules):
+    """{"LV": [...], "HV": [...]} CAEN channels assigned to the mounted modules, the status[MODULES] value"""
+    channels = {"LV": set(), "HV": set()}
+    for module in modules.values():
+        for kind, assigned in channels.items():
+            if module.get(kind):
+                assigned.add(module[kind])
+    return {kind: sorted(assigned) for kind, assigned in channels.items()}
+
+
+def lv_off_action(send_caen_command, status, publish_alarm=None):
+    """Action switching off the LV channels of the mounted modules through CAEN and reporting it on the alarm topic
+
+    status() returns the status the rules were evaluated on, e.g. the engine copy.
+    """
+
+    def action(rule, message):
+        for channel in status().get(MODULES, {}).get("LV", []):
+            send_caen_command(f"TurnOff,PowerSupplyId:caen,ChannelId:{channel}")
+        if publish_alarm is not None:
+            publish_alarm(f"Soft interlock {rule.name}: LV switched off. {message}")
+
+    return action
+
+
+def default_interlock_rules(action):
+    """Rules switching LV off when modules are powered in unsafe conditions
+
+    A module LV is on when CAEN reports IsOn for the channel status[MODULES] assigns to it.
+    """
+
+    def lv_dew_point(status):
+        lv_on = check_any_lv_on(status.get("caen", {}), status[MODULES])
+        return lv_on and not check_lv_safe_on(status), "LV on below the dew point"
+
+    def lv_marta(status):
+        marta_safe, marta_msg = check_marta_safe(status)
+        return check_any_lv_on(status.get("caen", {}), status[MODULES]) and not marta_safe, marta_msg
+
+    return [
+        InterlockRule(
+            "lv_dew_point",
+            [
+                ("marta", "TT05_CO2"),
+                ("marta", "TT06_CO2"),
+                ("coldroom", "ch_temperature"),
+                ("cleanroom", "dewpoint"),
+                ("caen", ANY_KEY),
+                (MODULES, "LV"),
+            ],
+            lv_dew_point,
+            action,
+        ),
+        InterlockRule("lv_marta", [("marta", "fsm_state"), ("caen", ANY_KEY), (MODULES, "LV")], lv_marta, action),
+    ]
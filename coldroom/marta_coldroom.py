@@ -1,5 +1,4 @@
 import json
-import paho.mqtt.client as mqtt
 import requests
 import sys
 import logging
@@ -35,14 +34,9 @@ class MartaColdRoomMQTTClient:
         logger.info(f"Coldroom topic: {self.TOPIC_COLDROOM}")
         logger.info(f"CO2 sensor topic: {self.TOPIC_CO2_SENSOR}")
 
-        # Create single MQTT client
-        self._client = mqtt.Client()
-        self._client.on_connect = self.on_connect
-        self._client.on_message = self.on_message
-
-        # Set connection parameters
-        self._client.keepalive = 60
-        self._client.connect_timeout = 5
+        # Messages arrive through the connection shared by all clients of the system
+        self._connection = system_obj.mqtt
+        self._client = self._connection.client
 
         # Initialize status dictionaries
         self._marta_status = {}
@@ -54,106 +48,57 @@ class MartaColdRoomMQTTClient:
         self._cleanroom_last_update_timer = time.time()
         self._cleanroom_last_update_elapsed_time = 0
 
-        # Connect to broker
-        try:
-            logger.debug(f"Connecting to MQTT broker at {self._system.BROKER}:{self._system.PORT}")
-            self._client.connect(self._system.BROKER, self._system.PORT, keepalive=60)
-            logger.debug("MQTT client connected successfully")
-        except Exception as e:
-            logger.error(f"Error connecting to MQTT broker: {e}")
-            raise
-
-        # Start client loop
-        self.start_client_loops()
+        # Each topic goes straight to its handler, the safety flags are refreshed after every message
+        routes = [
+            (self.TOPIC_CLEANROOM, self.handle_cleanroom_status_message),
+            (self.TOPIC_COLDROOM_AIR, self.handle_air_bypass_message),
+            (self.TOPIC_MARTA, self.route_marta_message),
+            (self.TOPIC_COLDROOM, self.route_coldroom_message),
+            (self.TOPIC_ALARM, self.handle_alarm_message),
+            (self.TOPIC_CO2_SENSOR, self.handle_co2_sensor_message),
+        ]
+        for topic, handler in routes:
+            self._connection.subscribe(topic, self._with_safety_checks(handler))
+        self._connection.add_connect_listener(lambda: self.publish_cmd("refresh", "marta", ""))
 
     def start_client_loops(self):
-        """Start the MQTT client loop to process network traffic"""
-        logger.debug("Starting MQTT client loop")
-        self._client.loop_start()
-        logger.debug("MQTT client loop started")
+        """Start the shared MQTT client loop"""
+        self._connection.loop_start()
 
     def stop_client_loops(self):
-        """Stop the MQTT client loop"""
-        logger.debug("Stopping MQTT client loop")
-        self._client.loop_stop()
-        logger.debug("MQTT client loop stopped")
-
-    def on_connect(self, client, userdata, flags, rc):
-        if rc == 0:
-            logger.info("Connected to MQTT broker, subscribing to topics...")
-            # Subscribe to all topics
-            self._client.subscribe(self.TOPIC_CLEANROOM)
-            logger.info(f"Subscribed to Cleanroom topic: {self.TOPIC_CLEANROOM}")
-            self._client.subscribe(self.TOPIC_MARTA)
-            logger.info(f"Subscribed to MARTA topic: {self.TOPIC_MARTA}")
-            self._client.subscribe(self.TOPIC_COLDROOM)
-            logger.info(f"Subscribed to Coldroom topic: {self.TOPIC_COLDROOM}")
-            self._client.subscribe(self.TOPIC_CO2_SENSOR)
-            logger.info(f"Subscribed to CO2 sensor topic: {self.TOPIC_CO2_SENSOR}")
-            self._client.subscribe(self.TOPIC_ALARM)
-            self.publish_cmd("refresh", "marta", "")
-            self._client.subscribe(self.TOPIC_COLDROOM_AIR)
-            logger.info(f"Subscribed to Coldroom Air topic: {self.TOPIC_COLDROOM_AIR}")
-        else:
-            logger.error(f"Connection failed with result code {rc}")
-
-    def on_message(self, client, userdata, msg):
-        logger.info(f"Received MQTT message on topic: {msg.topic}")
-        # logger.info(f"Payload: {msg.payload}")
-        try:
-            payload = msg.payload.decode()
-            logger.info(f"Payload: {payload}")
-        except:
-            logger.error("Could not decode payload as string")
-            return
-
-        # Store msg.topic for use in handle_cleanroom_status_message
-        self._current_topic = msg.topic
-        logger.info(f"Current topic: {self._current_topic}")
-
-        # Handle Cleanroom messages (with leading slash)
-        if msg.topic.startswith(self.TOPIC_BASE_CLEANROOM[:-1]):
-            logger.info(f"Processing Cleanroom environment message: {msg.topic}")
-            self.handle_cleanroom_status_message(msg.payload)
-            logger.info(f"Updated Cleanroom status: {self._cleanroom_status}")
-
-        # Handle Coldroom Air messages
-        elif msg.topic.startswith(self.TOPIC_COLDROOM_AIR):  # Add Coldroom Air topic
-            logger.info("Processing Coldroom Air message")
-            self.handle_air_bypass_message(msg.payload)
-            logger.info(f"Updated Coldroom Air status: {self._coldroom_state.get('air_bypass_status', None)}")
-
-        # Handle MARTA messages
-        elif msg.topic.startswith(self.TOPIC_BASE_MARTA):  # Add MARTA topic
-            if "status" in msg.topic:
-                logger.info("Processing MARTA status message")
-                self.handle_marta_status_message(msg.payload)
-                logger.info(f"Updated MARTA status: {self._marta_status}")
-
-        # Handle Coldroom messages
-        elif msg.topic.startswith(self.TOPIC_BASE_COLDROOM):  # Add Coldroom topic
-            if "state" in msg.topic:
-                logger.info("Processing Coldroom state message")
-                self.handle_coldroom_state_message(msg.payload)
-                logger.info(f"Updated Coldroom state: {self._coldroom_state}")
-        elif "alarm" in msg.topic:
-            logger.info("Processing Coldroom alarm message")
-            # alarm is a string
-            alarm = msg.payload.decode()
-            if "MyKratos" in alarm:
-                logger.info("Received MyKratos alarm")
-                self._system.update_status({"alarm": alarm})
-                logger.info(f"Updated alarm status: {self._system.status['alarm']}")
-
-        # Handle CO2 sensor messages
-        elif msg.topic == self.TOPIC_CO2_SENSOR:  # Add CO2 sensor topic
-            logger.info("Processing CO2 sensor message")
-            self.handle_co2_sensor_message(msg.payload)
-            logger.info(f"Updated CO2 sensor data: {self._co2_sensor_data}")
-        else:
-            logger.warning(f"Received message on unknown topic: {msg.topic}")
-
-        # Safety checks
+        """Stop the shared MQTT client loop"""
+        self._connection.loop_stop()
+
+    def disconnect(self):
+        """Disconnect the shared MQTT connection"""
+        self._connection.disconnect()
+
+    def _with_safety_checks(self, handler):
+        def route(topic, payload):
+            self._current_topic = topic
+            handler(payload)
+            self.update_safety_flags()
+
+        return route
+
+    def route_marta_message(self, payload):
+        if "status" in self._current_topic:
+            self.handle_marta_status_message(payload)
+
+    def route_coldroom_message(self, payload):
+        if "state" in self._current_topic:
+            self.handle_coldroom_state_message(payload)
+
+    def handle_alarm_message(self, payload):
+        # alarm is a string
+        alarm = payload.decode()
+        if "MyKratos" in alarm:
+            logger.info("Received MyKratos alarm")
+            self._system.update_status({"alarm": alarm})
+            logger.info(f"Updated alarm status: {self._system.status['alarm']}")
+
+    def update_safety_flags(self):
+        """Safety checks"""
         if self._system.has_valid_status():
             self._system.safety_flags["door_locked"] = not check_dew_point(self._system.status)
             self._system.safety_flags["sleep"] = check_door_status(self._system.status)
@@ -245,7 +190,7 @@ class MartaColdRoomMQTTClient:
         try:
             # Parse the payload
             data = json.loads(payload)
-            logger.info(f"Processing cleanroom data: {data}")
+            logger.debug(f"Processing cleanroom data: {data}")
 
             # Initialize cleanroom status if empty
             if not self._cleanroom_status:
@@ -261,22 +206,22 @@ class MartaColdRoomMQTTClient:
             if isinstance(data, dict):
                 if "temperature" in data or "temp" in data:
                     self._cleanroom_status["temperature"] = float(data.get("temperature", data.get("temp")))
-                    logger.info(f"Updated temperature: {self._cleanroom_status['temperature']}")
+                    logger.debug(f"Updated temperature: {self._cleanroom_status['temperature']}")
                 if "RH" in data or "humidity" in data:
                     self._cleanroom_status["humidity"] = float(data.get("RH", data.get("humidity")))
-                    logger.info(f"Updated humidity: {self._cleanroom_status['humidity']}")
+                    logger.debug(f"Updated humidity: {self._cleanroom_status['humidity']}")
                 if "dewpoint" in data:
                     self._cleanroom_status["dewpoint"] = float(data["dewpoint"])
-                    logger.info(f"Updated dewpoint: {self._cleanroom_status['dewpoint']}")
+                    logger.debug(f"Updated dewpoint: {self._cleanroom_status['dewpoint']}")
                 if "Pressure" in data:
                     self._cleanroom_status["pressure"] = float(data["Pressure"])
-                    logger.info(f"Updated pressure: {self._cleanroom_status['pressure']}")
+                    logger.debug(f"Updated pressure: {self._cleanroom_status['pressure']}")
 
                 self._cleanroom_status["last_update"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 self._cleanroom_last_update_timer = time.time()
                 self._cleanroom_last_update_elapsed_time = 0
 
-            logger.info(f"Current cleanroom status: {self._cleanroom_status}")
+            logger.debug(f"Current cleanroom status: {self._cleanroom_status}")
             self._system.update_status({"cleanroom": self._cleanroom_status})
         except Exception as e:
             logger.error(f"Error parsing Cleanroom status message: {e}")
@@ -305,7 +250,7 @@ class MartaColdRoomMQTTClient:
             data = json.loads(payload)
             logger.debug(f"Parsed Coldroom air bypass data: {data}")
             self._dry_air_bypass_status = data["apower"] > 0.1
-            self._system._status["coldroomair"]["air_bypass_status"] = self._dry_air_bypass_status
+            self._system.update_status({"coldroomair": {"air_bypass_status": self._dry_air_bypass_status}})
         except Exception as e:
             logger.error(f"Error parsing Coldroom air bypass message: {e}")
 
@@ -0,0 +1,112 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Camera side names used in camera_config.yaml and the module side in mounted_modules
+CAMERA_SIDE_TO_MODULE_SIDE = {"Front": "13", "Back": "24"}
+
+
+class ModuleROIIndex:
+    """Per-module column index into the 360 degree stitched panoramas.
+
+    Built once per ring from the angular position and side of every mounted
+    module. Each module covers `coverage` times its angular width around its
+    position. compute() reduces the panoramas of all cameras to per-module
+    min/max/mean with a handful of vectorized numpy calls, whatever the number
+    of modules.
+    """
+
+    def __init__(self, mounted_modules, number_of_modules, width=360, coverage=0.8):
+        self.width = width
+        self.module_angular_width = 360 / (number_of_modules / 2)
+        half_width = self.module_angular_width * coverage / 2
+
+        # side -> (module names, concatenated columns, segment starts)
+        self.sides = {}
+        # side -> index into the module names of the module under every column, -1 if none
+        self._lookup = {}
+        per_side = {}
+        for module_name, module_info in mounted_modules.items():
+            position = module_info.get("angular_position", -1)
+            side = module_info.get("side", "Undefined")
+            if position == -1 or side == "Undefined":
+                continue
+            first = int(round((position - half_width) * width / 360))
+            last = int(round((position + half_width) * width / 360))
+            columns = np.arange(first, max(last, first) + 1) % width
+            per_side.setdefault(side, []).append((module_name, columns))
+
+        for side, modules in per_side.items():
+            names = [name for name, _ in modules]
+            columns = np.concatenate([cols for _, cols in modules])
+            starts = np.cumsum([0] + [len(cols) for _, cols in modules[:-1]])
+            self.sides[side] = (names, columns, starts)
+            lookup = np.full(width, -1, dtype=np.int64)
+            for index, (_, cols) in enumerate(modules):
+                lookup[cols] = index
+            self._lookup[side] = lookup
+
+        logger.info(f"Module ROI index built for {sum(len(v[0]) for v in self.sides.values())} modules")
+
+    @property
+    def module_names(self):
+        return [name for names, _, _ in self.sides.values() for name in names]
+
+    def module_at(self, camera_side, angle):
+        """Return the name of the module under an angular position, or None"""
+        side = CAMERA_SIDE_TO_MODULE_SIDE.get(camera_side, camera_side)
+        if side not in self._lookup:
+            return None
+        index = self._lookup[side][int(round(angle * self.width / 360)) % self.width]
+        return self.sides[side][0][index] if index >= 0 else None
+
+    def _reduce(self, side, panorama, covered):
+        """Return per-module (min, max, sum, pixels) of one panorama"""
+        _, columns, starts = self.sides[side]
+        rows = panorama.shape[0]
+
+        valid = covered[columns]
+        column_min = np.where(valid, panorama.min(axis=0)[columns], np.inf)
+        column_max = np.where(valid, panorama.max(axis=0)[columns], -np.inf)
+        column_sum = np.where(valid, panorama.sum(axis=0)[columns], 0.0)
+
+        return (
+            np.minimum.reduceat(column_min, starts),
+            np.maximum.reduceat(column_max, starts),
+            np.add.reduceat(column_sum, starts),
+            np.add.reduceat(valid.astype(np.int64), starts) * rows,
+        )
+
+    def compute(self, panoramas):
+        """Return {module_name: {"min", "max", "mean"}} for the modules seen by any camera.
+
+        Args:
+            panoramas: iterable of (camera_side, panorama, covered) where covered
+                is a boolean mask of the panorama columns holding data
+        """
+        totals = {}
+        for camera_side, panorama, covered in panoramas:
+            side = CAMERA_SIDE_TO_MODULE_SIDE.get(camera_side, camera_side)
+            if side not in self.sides:
+                continue
+            t_min, t_max, t_sum, pixels = self._reduce(side, panorama, covered)
+            if side in totals:
+                previous = totals[side]
+                t_min = np.minimum(previous[0], t_min)
+                t_max = np.maximum(previous[1], t_max)
+                t_sum = previous[2] + t_sum
+                pixels = previous[3] + pixels
+            totals[side] = (t_min, t_max, t_sum, pixels)
+
+        stats = {}
+        for side, (t_min, t_max, t_sum, pixels) in totals.items():
+            names = self.sides[side][0]
+            for index in np.flatnonzero(pixels):
+                stats[names[index]] = {
+                    "min": float(t_min[index]),
+                    "max": float(t_max[index]),
+                    "mean": float(t_sum[index] / pixels[index]),
+                }
+        return stats
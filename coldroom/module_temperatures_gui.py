@@ -9,8 +9,13 @@ import yaml
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
-import paho.mqtt.client as mqtt
 import datetime
+from .panorama import normalize_panorama
+from .stitching_worker import StitchingWorker
+from .hotspot_worker import HotspotWorker
+from .blitting import BlitManager
+from .decimation import axis_pixel_width, minmax_envelope
+from .ph2acf_schema import TemperatureSchema
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +46,15 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
         self.mounted_modules = None
         self.number_of_modules = None
 
+        # Stitched panoramas are built by a background worker
+        self.stitching_worker = None
+        self.module_roi = None
+        self.module_statistics = {}
+
+        # Hotspots are detected on every frame by another background worker
+        self.hotspot_worker = None
+        self.hotspots = {}
+
         # Setup UI components
         self.setup_stitched_views()
         self.reset_figures_PB.clicked.connect(self.reset_camera_views)
@@ -53,6 +67,9 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
             self.t_range_comboBox.setCurrentText("CO2")
             self.t_range_comboBox.currentTextChanged.connect(self.on_temperature_range_changed)
 
+        self.start_stitching_worker()
+        self.start_hotspot_worker()
+
         # Setup update timer
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_displays)
@@ -150,6 +167,9 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
             self.stitched_images = []
             self.stitched_axes = []
             self.stitched_toolbars = []  # Add toolbar list
+            self.stitched_camera_lines = []
+            self.stitched_blitters = []
+            self.stitched_view_state = []
 
             # Get the tab widget from the UI
             self.stitched_tab_widget = self.findChild(QtWidgets.QTabWidget, "tabWidget")
@@ -200,12 +220,23 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
                 # Adjust subplot parameters to maximize image space
                 fig.subplots_adjust(left=0.05, right=0.95, top=0.95, bottom=0.15)
 
+                # Camera position line (red dashed line showing current camera position), moved on update
+                camera_line = ax.axvline(x=0, color="red", linestyle="--", alpha=0.8, linewidth=2, visible=False)
+                camera_line._camera_position = True
+
+                # Only the image, the module lines drawn over it and the camera line are redrawn on
+                # update, the rest of the figure is blitted from a cached background
+                blitter = BlitManager(canvas, [img, camera_line])
+
                 # Store references
                 self.stitched_figs.append(fig)
                 self.stitched_canvases.append(canvas)
                 self.stitched_images.append(img)
                 self.stitched_axes.append(ax)
                 self.stitched_toolbars.append(toolbar)
+                self.stitched_camera_lines.append(camera_line)
+                self.stitched_blitters.append(blitter)
+                self.stitched_view_state.append({"modules": None, "clim": None})
 
             self.setup_temperature_plot()
 
@@ -369,48 +400,33 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
             y_max = co2_temp + 20.0
 
             # Get temperature data from thermal camera
-            if hasattr(self.system._thermalcamera, "_stitching_max_temperature") and hasattr(
-                self.system._thermalcamera, "_stitching_min_temperature"
-            ):
+            if hasattr(self.system._thermalcamera, "_stitching_data"):
 
                 for i in range(4):
                     camera_name = f"camera{i}"  # This matches the thermal_camera.py naming
                     camera_display_name = f"camera{i+1}"  # This matches the GUI naming
 
-                    if (
-                        camera_name in self.system._thermalcamera._stitching_max_temperature
-                        and camera_name in self.system._thermalcamera._stitching_min_temperature
-                    ):
-
-                        max_temp_data = self.system._thermalcamera._stitching_max_temperature[camera_name]
-                        min_temp_data = self.system._thermalcamera._stitching_min_temperature[camera_name]
-
-                        if max_temp_data and min_temp_data:
-                            # Extract positions and temperatures
-                            positions = []
-                            max_temps = []
-                            min_temps = []
-
-                            # Get all positions that have both max and min data
-                            common_positions = set(max_temp_data.keys()) & set(min_temp_data.keys())
-
-                            for pos in sorted(common_positions, key=float):
-                                # Apply camera position offset to get effective position
-                                effective_position = (
-                                    float(pos) + self.camera_positions[camera_display_name]["position"]
-                                ) % 360
+                    store = self.system._thermalcamera._stitching_data.get(camera_name)
+                    if store is not None and len(store) > 0:
+                        # Reported min/max of every filled position bin, in angular order
+                        bins, min_temps, max_temps = store.temperature_range()
 
-                                positions.append(effective_position)
-                                max_temps.append(max_temp_data[pos])
-                                min_temps.append(min_temp_data[pos])
+                        # Apply camera position offset to get effective position
+                        positions = (
+                            store.bin_positions[bins] + self.camera_positions[camera_display_name]["position"]
+                        ) % 360
 
-                            if positions and max_temps:
-                                # Filter spikes from max temperatures using simple method
-                                filtered_max_temps = self.simple_spike_filter(max_temps)
+                        # Filter spikes from max temperatures using simple method
+                        filtered_max_temps = self.simple_spike_filter(max_temps)
 
-                                # Update the plot lines
-                                self.temp_lines[f"{camera_display_name}_max"].set_data(positions, filtered_max_temps)
-                                self.temp_lines[f"{camera_display_name}_min"].set_data(positions, min_temps)
+                        # Update the plot lines, reduced to the pixel width of the axis
+                        max_points = 2 * axis_pixel_width(self.temp_ax)
+                        self.temp_lines[f"{camera_display_name}_max"].set_data(
+                            *minmax_envelope(positions, filtered_max_temps, max_points)
+                        )
+                        self.temp_lines[f"{camera_display_name}_min"].set_data(
+                            *minmax_envelope(positions, min_temps, max_points)
+                        )
 
             # Set fixed Y-axis range based on CO2 temperature
             self.temp_ax.set_ylim(y_min, y_max)
@@ -437,52 +453,37 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
             # Get temperature data and update plot lines
             all_temps = []
 
-            if hasattr(self.system._thermalcamera, "_stitching_max_temperature") and hasattr(
-                self.system._thermalcamera, "_stitching_min_temperature"
-            ):
+            if hasattr(self.system._thermalcamera, "_stitching_data"):
 
                 for i in range(4):
                     camera_name = f"camera{i}"  # This matches the thermal_camera.py naming
                     camera_display_name = f"camera{i+1}"  # This matches the GUI naming
 
-                    if (
-                        camera_name in self.system._thermalcamera._stitching_max_temperature
-                        and camera_name in self.system._thermalcamera._stitching_min_temperature
-                    ):
-
-                        max_temp_data = self.system._thermalcamera._stitching_max_temperature[camera_name]
-                        min_temp_data = self.system._thermalcamera._stitching_min_temperature[camera_name]
-
-                        if max_temp_data and min_temp_data:
-                            # Extract positions and temperatures
-                            positions = []
-                            max_temps = []
-                            min_temps = []
-
-                            # Get all positions that have both max and min data
-                            common_positions = set(max_temp_data.keys()) & set(min_temp_data.keys())
-
-                            for pos in sorted(common_positions, key=float):
-                                # Apply camera position offset to get effective position
-                                effective_position = (
-                                    float(pos) + self.camera_positions[camera_display_name]["position"]
-                                ) % 360
+                    store = self.system._thermalcamera._stitching_data.get(camera_name)
+                    if store is not None and len(store) > 0:
+                        # Reported min/max of every filled position bin, in angular order
+                        bins, min_temps, max_temps = store.temperature_range()
 
-                                positions.append(effective_position)
-                                max_temps.append(max_temp_data[pos])
-                                min_temps.append(min_temp_data[pos])
+                        # Apply camera position offset to get effective position
+                        positions = (
+                            store.bin_positions[bins] + self.camera_positions[camera_display_name]["position"]
+                        ) % 360
 
-                            if positions and max_temps:
-                                # Filter spikes from max temperatures using simple method
-                                filtered_max_temps = self.simple_spike_filter(max_temps)
+                        # Filter spikes from max temperatures using simple method
+                        filtered_max_temps = self.simple_spike_filter(max_temps)
 
-                                # Update the plot lines
-                                self.temp_lines[f"{camera_display_name}_max"].set_data(positions, filtered_max_temps)
-                                self.temp_lines[f"{camera_display_name}_min"].set_data(positions, min_temps)
+                        # Update the plot lines, reduced to the pixel width of the axis
+                        max_points = 2 * axis_pixel_width(self.temp_ax)
+                        self.temp_lines[f"{camera_display_name}_max"].set_data(
+                            *minmax_envelope(positions, filtered_max_temps, max_points)
+                        )
+                        self.temp_lines[f"{camera_display_name}_min"].set_data(
+                            *minmax_envelope(positions, min_temps, max_points)
+                        )
 
-                                # Collect all temperature values for auto-scaling
-                                all_temps.extend(filtered_max_temps)
-                                all_temps.extend(min_temps)
+                        # Collect all temperature values for auto-scaling
+                        all_temps.extend(filtered_max_temps)
+                        all_temps.extend(min_temps)
 
             # Auto-scale the Y-axis based on all temperature data
             if all_temps:
@@ -672,231 +673,170 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
         panorama[mask] = panorama[mask] / overlap_count[mask]
 
         # Convert to uint8 for display - use actual temperature range
-        if np.isclose(temp_min, temp_max):
-            temp_max = temp_min + 1.0  # Add a small difference to avoid division by zero
-
-        # Create normalized array with proper handling of NaN values
-        panorama_norm = np.zeros_like(panorama)
-        valid_mask = ~np.isnan(panorama)
-        panorama_norm[valid_mask] = 255 * (panorama[valid_mask] - temp_min) / (temp_max - temp_min)
-
-        # Areas without data will be black (0)
-        panorama_norm = np.nan_to_num(panorama_norm, nan=0.0)  # Convert NaNs to 0
-        panorama_norm = np.clip(panorama_norm, 0, 255)  # Ensure values are in valid range
-        panorama_norm = panorama_norm.astype(np.uint8)
+        panorama_norm = normalize_panorama(panorama, temp_min, temp_max)
 
         return panorama_norm, panorama
 
     def update_displays(self):
-        """Update all displays with current data"""
+        """Update all displays with current data.
+
+        The stitched views are produced by the stitching worker and drawn in
+        on_stitched_views_ready.
+        """
         try:
-            if self.use_co2_scaling_stitched:
-                self.update_displays_co2_scale()
-            else:
-                self.update_displays_auto_scale()
+            # Forward scaling mode and mounted modules changes to the stitching worker
+            worker = self.stitching_worker
+            if worker is not None:
+                if worker.use_co2_scaling != self.use_co2_scaling_stitched:
+                    worker.set_scaling(self.use_co2_scaling_stitched)
+                if worker.mounted_modules is not self.mounted_modules:
+                    worker.set_mounted_modules(self.mounted_modules)
 
+            self.update_temperature_plot()
             self.update_temperature_table()
         except Exception as e:
             logger.error(f"Error updating displays: {e}")
 
-    def update_displays_co2_scale(self):
-        """Update displays using CO2 temperature-based scaling"""
-        # This is the current implementation above - CO2 scaling
+    def start_stitching_worker(self):
+        """Start the background worker building the stitched panoramas"""
         try:
-            # Get CO2 temperature for colorbar range
-            co2_temp = 0.0  # Default fallback
-            try:
-                marta_status = self.system.status.get("marta", {})
-                co2_temp = float(marta_status.get("TT06_CO2", 0.0))
-            except (ValueError, TypeError):
-                logger.warning(
-                    "Could not get CO2 temperature from MARTA status, using default range for stitched views"
-                )
-                co2_temp = 0.0
-
-            # Calculate colorbar range: CO2 temp to CO2 temp + 20
-            colorbar_min = co2_temp
-            colorbar_max = co2_temp + 15.0
-
-            # Get stitching data from thermal camera
-            if hasattr(self.system._thermalcamera, "_stitching_data"):
-                for i, (camera_name, camera_data) in enumerate(self.system._thermalcamera._stitching_data.items()):
-                    # add +1 to the camera name to match the UI naming
-                    camera_index = int(camera_name[-1]) + 1
-                    camera_name = f"camera{camera_index}"
-                    if camera_data:  # If we have data for this camera
-                        # Get all images and positions
-                        images = []
-                        positions = []
-
-                        # Collect all images and positions
-                        for pos, pos_images in camera_data.items():
-                            if pos_images:  # If we have images at this position
-                                # Keep only the last image at this position
-                                last_img = pos_images[-1]
-                                images.append(last_img)
-                                positions.append(float(pos) + self.camera_positions[camera_name]["position"])
-
-                        if images:  # If we have any images to stitch
-                            # Create stitched panorama using CO2 temperature range
-                            panorama_norm, panorama = self.stitch_multiple_images(
-                                images, positions, colorbar_min, colorbar_max, camera_name, full_coverage=360
-                            )
-
-                            # Ensure the panorama is properly sized for 360 degrees
-                            if panorama.shape[1] != 360:
-                                # Resize to 360 degrees if needed
-                                from scipy.ndimage import zoom
-
-                                zoom_factor = (1, 360 / panorama.shape[1])
-                                panorama = zoom(panorama, zoom_factor, order=1)
-
-                            # Update the stitched view with CO2-based scaling
-                            self.stitched_images[camera_index - 1].set_array(panorama)
-                            self.stitched_images[camera_index - 1].set_clim(colorbar_min, colorbar_max)
-
-                            # Clear previous annotations and add module names
-                            ax = self.stitched_axes[camera_index - 1]
-                            # Remove previous text annotations and lines (but keep camera position lines)
-                            for txt in ax.texts[:]:
-                                if hasattr(txt, "_module_annotation"):
-                                    txt.remove()
-
-                            # Remove previous annotation lines (both module and camera position)
-                            for line in ax.lines[:]:
-                                if hasattr(line, "_module_annotation") or hasattr(line, "_camera_position"):
-                                    line.remove()
-
-                            # Add camera position line (red dashed line showing current camera position)
-                            current_camera_pos = self.get_camera_effective_position(camera_index)
-                            if current_camera_pos is not None:
-                                camera_line = ax.axvline(
-                                    x=current_camera_pos,
-                                    color="red",
-                                    linestyle="--",
-                                    alpha=0.8,
-                                    linewidth=2,
-                                    label=f"Camera {camera_index} Position",
-                                )
-                                # Mark as camera position line for easy removal
-                                camera_line._camera_position = True
-
-                            # Add module annotations if we have mounted modules
-                            if self.mounted_modules is not None:
-                                self.add_module_annotations_to_stitched_image(ax, camera_name)
-                            else:
-                                logger.debug(f"No mounted modules available for {camera_name}")
+            if getattr(self.system, "_thermalcamera", None) is None:
+                logger.warning("Thermal camera not available, stitched views disabled")
+                return
+            self.stitching_worker = StitchingWorker(self.system, self.camera_positions, self.camera_fovs)
+            self.stitching_worker.set_scaling(self.use_co2_scaling_stitched)
+            self.stitching_worker.set_module_roi(self.module_roi)
+            self.stitching_worker.results_ready.connect(self.on_stitched_views_ready)
+            self.system._thermalcamera.add_frame_listener(self.stitching_worker.on_frame)
+            self.stitching_worker.start()
+            logger.info("Stitching worker started")
+        except Exception as e:
+            logger.error(f"Error starting stitching worker: {e}")
 
-                            # Update colorbar with CO2-based range
-                            cbar = self.stitched_images[camera_index - 1].colorbar
-                            if cbar is not None:
-                                cbar.set_ticks(np.linspace(colorbar_min, colorbar_max, 5))
-                                cbar.set_ticklabels(
-                                    [f"{temp:.1f}°C" for temp in np.linspace(colorbar_min, colorbar_max, 5)]
-                                )
+    def start_hotspot_worker(self):
+        """Start the background worker detecting hotspots on every camera frame"""
+        try:
+            if getattr(self.system, "_thermalcamera", None) is None:
+                logger.warning("Thermal camera not available, hotspot detection disabled")
+                return
+            self.hotspot_worker = HotspotWorker(self.system, self.camera_positions, self.camera_fovs, self.module_roi)
+            self.hotspot_worker.events_ready.connect(self.on_hotspot_events)
+            self.system._thermalcamera.add_frame_listener(self.hotspot_worker.on_frame)
+            self.hotspot_worker.start()
+            logger.info("Hotspot worker started")
+        except Exception as e:
+            logger.error(f"Error starting hotspot worker: {e}")
 
-                            # Draw canvas
-                            self.stitched_canvases[camera_index - 1].draw()
+    def cleanup(self):
+        """Stop the stitching and hotspot workers"""
+        try:
+            for name in ("stitching_worker", "hotspot_worker"):
+                worker = getattr(self, name)
+                if worker is None:
+                    continue
+                if getattr(self.system, "_thermalcamera", None) is not None:
+                    self.system._thermalcamera.remove_frame_listener(worker.on_frame)
+                worker.stop()
+                setattr(self, name, None)
+                logger.info(f"{name} stopped")
+        except Exception as e:
+            logger.error(f"Error stopping background workers: {e}")
+
+    def on_hotspot_events(self, events):
+        """Keep the active hotspots and log their events"""
+        for event in events:
+            location = f"{event['camera']} at {event['angle']:.1f}°"
+            if event["module"]:
+                location += f" on module {event['module']}"
+            if event["event"] == "cleared":
+                self.hotspots.pop(event["id"], None)
+                logger.info(f"Hotspot {event['id']} cleared ({location})")
+                continue
+            self.hotspots[event["id"]] = event
+            logger.warning(
+                f"Hotspot {event['id']} {event['event']} ({location}): peak {event['peak']:.1f} C, "
+                f"area {event['area']} px, growth {event['growth']:.2f} C/s"
+            )
 
-                            logger.debug(
-                                f"Updated stitched view for camera {camera_index} with CO2 range: {colorbar_min:.1f}°C to {colorbar_max:.1f}°C"
-                            )
+    def set_module_roi(self, module_roi):
+        """Use the ModuleROIIndex of the current ring for the per-module temperatures"""
+        self.module_roi = module_roi
+        self.module_statistics = {}
+        if self.stitching_worker is not None:
+            self.stitching_worker.set_module_roi(module_roi)
+        if self.hotspot_worker is not None:
+            self.hotspot_worker.set_module_roi(module_roi)
+
+    def on_stitched_views_ready(self, results):
+        """Swap in the panoramas and module temperatures produced by the stitching worker"""
+        try:
+            self.module_statistics.update(results["modules"])
+            if self.mounted_modules is not None:
+                # Shown in the "T (C)" column of the modules list
+                for module_name, stats in results["modules"].items():
+                    if module_name in self.mounted_modules:
+                        self.mounted_modules[module_name]["temperature"] = f"{stats['max']:.1f}"
+
+            for camera_name, result in results["cameras"].items():
+                self.show_stitched_view(camera_name, result["panorama"], result["vmin"], result["vmax"])
+        except Exception as e:
+            logger.error(f"Error updating stitched views: {e}", exc_info=True)
+        finally:
+            # Let the worker produce the next result
+            if self.stitching_worker is not None:
+                self.stitching_worker.acknowledge()
+
+    def show_stitched_view(self, camera_name, panorama, vmin, vmax):
+        """Show a 360-degree panorama in the stitched view of a camera.
+
+        Module annotations and the colorbar are only redrawn when the mounted
+        modules or the colour range change; otherwise the image and the camera
+        position line are blitted over the cached background.
+        """
+        camera_index = int(camera_name[-1])
+        image = self.stitched_images[camera_index - 1]
+        ax = self.stitched_axes[camera_index - 1]
+        blitter = self.stitched_blitters[camera_index - 1]
+        state = self.stitched_view_state[camera_index - 1]
+
+        # Update the stitched view
+        image.set_array(panorama)
+        image.set_clim(vmin, vmax)
+
+        # Move the camera position line
+        camera_line = self.stitched_camera_lines[camera_index - 1]
+        current_camera_pos = self.get_camera_effective_position(camera_index)
+        if current_camera_pos is not None:
+            camera_line.set_xdata([current_camera_pos, current_camera_pos])
+            camera_line.set_visible(True)
+        else:
+            camera_line.set_visible(False)
 
-            # Update temperature plot
-            self.update_temperature_plot()
+        # Add module annotations when the mounted modules change
+        if state["modules"] is not self.mounted_modules:
+            state["modules"] = self.mounted_modules
+            if self.mounted_modules is not None:
+                self.add_module_annotations_to_stitched_image(ax, camera_name)
+            else:
+                logger.debug(f"No mounted modules available for {camera_name}")
+            # Module lines are drawn over the image, so they are animated as well
+            module_lines = [line for line in ax.lines if hasattr(line, "_module_annotation")]
+            blitter.set_artists([image] + module_lines + [camera_line])
+            blitter.invalidate()
 
-        except Exception as e:
-            logger.error(f"Error creating stitched images: {e}")
-            logger.error(f"Error details: {str(e)}", exc_info=True)
+        # Update colorbar when the panorama range changes
+        if state["clim"] != (vmin, vmax):
+            state["clim"] = (vmin, vmax)
+            cbar = image.colorbar
+            if cbar is not None:
+                cbar.set_ticks(np.linspace(vmin, vmax, 5))
+                cbar.set_ticklabels([f"{temp:.1f}°C" for temp in np.linspace(vmin, vmax, 5)])
+            blitter.invalidate()
 
-    def update_displays_auto_scale(self):
-        """Update displays using automatic scaling based on image data"""
-        try:
-            # Get stitching data from thermal camera
-            if hasattr(self.system._thermalcamera, "_stitching_data"):
-                for i, (camera_name, camera_data) in enumerate(self.system._thermalcamera._stitching_data.items()):
-                    camera_index = int(camera_name[-1]) + 1
-                    camera_ui_name = f"camera{camera_index}"
-                    if camera_data:
-                        # Get all images and positions
-                        images = []
-                        positions = []
-                        temp_min = float("inf")
-                        temp_max = float("-inf")
-
-                        # Collect all images and positions
-                        for pos, pos_images in camera_data.items():
-                            if pos_images:
-                                last_img = pos_images[-1]
-                                images.append(last_img)
-                                positions.append(float(pos) + self.camera_positions[camera_ui_name]["position"])
-
-                                # Update temperature range based on actual data
-                                temp_min = min(temp_min, last_img.min())
-                                temp_max = max(temp_max, last_img.max())
-
-                        if images:
-                            # Create stitched panorama using actual temperature range
-                            panorama_norm, panorama = self.stitch_multiple_images(
-                                images, positions, temp_min, temp_max, camera_ui_name, full_coverage=360
-                            )
-
-                            # Ensure the panorama is properly sized for 360 degrees
-                            if panorama.shape[1] != 360:
-                                from scipy.ndimage import zoom
-
-                                zoom_factor = (1, 360 / panorama.shape[1])
-                                panorama = zoom(panorama, zoom_factor, order=1)
-
-                            # Update the stitched view with auto-scaling
-                            self.stitched_images[camera_index - 1].set_array(panorama)
-                            self.stitched_images[camera_index - 1].set_clim(temp_min, temp_max)
-
-                            # Clear previous annotations and add new ones
-                            ax = self.stitched_axes[camera_index - 1]
-                            for txt in ax.texts[:]:
-                                if hasattr(txt, "_module_annotation"):
-                                    txt.remove()
-
-                            for line in ax.lines[:]:
-                                if hasattr(line, "_module_annotation") or hasattr(line, "_camera_position"):
-                                    line.remove()
-
-                            # Add camera position line
-                            current_camera_pos = self.get_camera_effective_position(camera_index)
-                            if current_camera_pos is not None:
-                                camera_line = ax.axvline(
-                                    x=current_camera_pos,
-                                    color="red",
-                                    linestyle="--",
-                                    alpha=0.8,
-                                    linewidth=2,
-                                    label=f"Camera {camera_index} Position",
-                                )
-                                camera_line._camera_position = True
-
-                            # Add module annotations
-                            if self.mounted_modules is not None:
-                                self.add_module_annotations_to_stitched_image(ax, camera_ui_name)
-
-                            # Update colorbar with auto-scale range
-                            cbar = self.stitched_images[camera_index - 1].colorbar
-                            if cbar is not None:
-                                cbar.set_ticks(np.linspace(temp_min, temp_max, 5))
-                                cbar.set_ticklabels([f"{temp:.1f}°C" for temp in np.linspace(temp_min, temp_max, 5)])
-
-                            # Draw canvas
-                            self.stitched_canvases[camera_index - 1].draw()
-
-                            logger.debug(
-                                f"Updated stitched view for camera {camera_index} with auto-scale range: {temp_min:.1f}°C to {temp_max:.1f}°C"
-                            )
-
-            # Update temperature plot
-            self.update_temperature_plot()
+        # Blit the image and camera line, or draw the whole figure if static parts changed
+        blitter.update()
 
-        except Exception as e:
-            logger.error(f"Error creating stitched images with auto-scale: {e}")
+        logger.debug(f"Updated stitched view for camera {camera_index} with range: {vmin:.1f}°C to {vmax:.1f}°C")
 
     def reset_camera_views(self):
         """Reset camera views to initial state"""
@@ -913,9 +853,13 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
 
             logger.info("Camera views reset successfully")
 
-            self.system._thermalcamera._stitching_data = {}  # Clear stitching data
-            self.system._thermalcamera._stitching_max_temperature = {}
-            self.system._thermalcamera._stitching_min_temperature = {}
+            self.system._thermalcamera.clear_stitching_data()  # Clear stitching data
+            self.module_statistics = {}
+            if self.stitching_worker is not None:
+                self.stitching_worker.reset()
+            self.hotspots = {}
+            if self.hotspot_worker is not None:
+                self.hotspot_worker.reset()
 
             # Remove the temperature plot tab if it exists
             tab_widget = self.findChild(QtWidgets.QTabWidget, "tabWidget")
@@ -932,47 +876,6 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
         except Exception as e:
             logger.error(f"Error resetting camera views: {e}")
 
-    def update_stitched_images(self):
-        """Update stitched images for all cameras"""
-        try:
-            if not hasattr(self.system._thermalcamera, "_stitching_data"):
-                return
-
-            stitching_data = self.system._thermalcamera._stitching_data
-
-            for i, camera_name in enumerate(["camera1", "camera2", "camera3", "camera4"]):
-                if (
-                    camera_name in stitching_data
-                    and len(stitching_data[camera_name]) > 0
-                    and i < len(self.stitched_axes)
-                ):
-
-                    # Get images and positions for this camera
-                    camera_data = stitching_data[camera_name]
-                    positions = list(camera_data.keys())
-                    images = [camera_data[pos]["image"] for pos in positions]
-
-                    if len(images) > 0:
-                        # Get temperature range for this camera
-                        max_temps = self.system._thermalcamera._stitching_max_temperature.get(camera_name, {})
-                        min_temps = self.system._thermalcamera._stitching_min_temperature.get(camera_name, {})
-
-                        if max_temps and min_temps:
-                            temp_max = max(max_temps.values())
-                            temp_min = min(min_temps.values())
-
-                            # Stitch images
-                            stitched_image, _ = self.stitch_multiple_images(images, positions, temp_min, temp_max, camera_name)
-
-                            # Update display
-                            if i < len(self.stitched_images):
-                                self.stitched_images[i].set_data(stitched_image)
-                                self.stitched_images[i].set_clim(0, 255)
-                                self.stitched_canvases[i].draw()
-
-        except Exception as e:
-            logger.error(f"Error updating stitched images: {e}")
-
     def add_module_annotations_to_stitched_image(self, ax, camera_name):
         """Add module name annotations to the stitched image"""
         try:
@@ -1113,6 +1016,12 @@ class ModuleTemperaturesTAB(QtWidgets.QMainWindow):
             
             # Update the label to show current value
             label.setText(str(fov_value))
+
+            # The stitching worker rebuilds the panorama mapping for the new FOV
+            if self.stitching_worker is not None:
+                self.stitching_worker.set_camera_fov(camera_name, fov_value)
+            if self.hotspot_worker is not None:
+                self.hotspot_worker.set_camera_fov(camera_name, fov_value)
             
             logger.info(f"FOV for {camera_name} changed to {fov_value} degrees")
             
@@ -1358,85 +1267,51 @@ class ModuleTempMQTT:
         self.system = system
         self.status = {}
         self.key_map = {}
-        self.client = mqtt.Client()
-        self.client.on_connect = self.on_connect
-        self.client.on_message = self.on_message
-        self.client.on_disconnect = self.on_disconnect
-        self.mqtt_settings = self.system._settings["mqtt"]
+        self.schema = TemperatureSchema()
+        # Messages arrive through the connection shared by all clients of the system
+        self.connection = system.mqtt
+        self.client = self.connection.client
         self.gui_reference = None
-        try:
-            self.client.connect(self.mqtt_settings["broker"], self.mqtt_settings["port"], keepalive=60)
-            logger.info(f"Connected to MQTT broker at {self.system.BROKER}:{self.system.PORT}")
-        except Exception as e:
-            logger.error(f"Failed to connect to MQTT broker: {e}")
-
-    def on_connect(self, client, userdata, flags, rc):
-        """Handle MQTT connection"""
-        if rc == 0:
-            self.client.subscribe(self.TOPIC)
-            logger.info(f"Subscribed to topic: {self.TOPIC}")
-        else:
-            logger.error(f"Failed to connect with result code {rc}")
 
-    def on_message(self, client, userdata, msg):
-        """Handle incoming MQTT messages"""
-        try:
-            if msg.topic == self.TOPIC:
-                payload = json.loads(msg.payload.decode("utf-8"))
-                fuse_id, temp_data = self.handle_message(payload)
-                if fuse_id and temp_data and self.gui_reference:
-                    self.gui_reference.publish_calibrated_data(fuse_id, temp_data)
-            else:
-                logger.warning(f"Received message on unknown topic: {msg.topic}")
-        except Exception as e:
-            logger.error(f"Error handling message: {e}")
-
-    def on_disconnect(self, client, userdata, rc):
-        """Handle MQTT disconnection"""
-        if rc != 0:
-            logger.error(f"Unexpected disconnection: {rc}")
-        else:
-            logger.info("Disconnected from MQTT broker")
+    def on_data_message(self, topic, payload):
+        """Handle a module temperature message"""
+        payload = json.loads(payload.decode("utf-8"))
+        fuse_id, temp_data = self.handle_message(payload)
+        if fuse_id and temp_data and self.gui_reference:
+            self.gui_reference.publish_calibrated_data(fuse_id, temp_data)
 
     def loop_start(self):
-        """Start the MQTT loop"""
+        """Start receiving module temperatures"""
         try:
-            self.client.loop_start()
-            logger.info("MQTT loop started")
+            self.connection.subscribe(self.TOPIC, self.on_data_message)
+            logger.info("Module temperature monitoring started")
         except Exception as e:
-            logger.error(f"Error starting MQTT loop: {e}")
+            logger.error(f"Error starting module temperature monitoring: {e}")
 
     def loop_stop(self):
-        """Stop the MQTT loop"""
+        """Stop receiving module temperatures, the shared connection keeps running"""
         try:
-            self.client.loop_stop()
-            logger.info("MQTT loop stopped")
+            self.connection.unsubscribe(self.TOPIC, self.on_data_message)
+            logger.info("Module temperature monitoring stopped")
         except Exception as e:
-            logger.error(f"Error stopping MQTT loop: {e}")
+            logger.error(f"Error stopping module temperature monitoring: {e}")
 
     def handle_message(self, payload):
         """Handle incoming MQTT messages"""
         result = {}
         fuseId = None
-        for key in payload.keys():
-            if "fuseId" in key:
-                fuseId = payload[key]
-            if "_temp" in key and "_C" in key:
-                # e.g. SSA_BE0_H7_C6_temp or MPA_BE0_H0_C7_temp
-                split = key.split("_")
-                component = split[0]
-                be = split[1]
-                hybrid = split[2]
-                be_id = int(be.split("BE")[1])
-                hybrid_id = int(hybrid.split("H")[1]) % 2  # H0 or H1
-                chip_id = int(split[3].split("C")[1])
-                temperature = payload[key]
-                new_key = f"{component}_H{hybrid_id}_{chip_id}"
-                result[new_key] = temperature
+        schema = self.schema
+        for key, value in payload.items():
+            index = schema.slot(key)
+            if index is not None:
+                # e.g. SSA_BE0_H7_C6_temp -> SSA_H1_6
+                new_key = schema.names[index]
+                result[new_key] = value
                 self.key_map[new_key] = key
+            elif "fuseId" in key:
+                fuseId = value
         # Update the system status with the new temperature data
         if fuseId:
             self.status.update({fuseId: result})
             logger.debug(f"Updated temperature data for fuse_id {fuseId}")
-        print(result)
         return fuseId, result
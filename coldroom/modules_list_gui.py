@@ -6,7 +6,9 @@ from datetime import datetime
 from .command_worker import CommandWorker
 import logging
 import requests
+from db.client import get_client
 from .module_tests import TEST_SPECS_MAP
+from .module_roi import ModuleROIIndex
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +19,7 @@ class ModulesListTab(QtWidgets.QMainWindow):
         ui_path = os.path.join(os.path.dirname(__file__), "modules_list.ui")
         uic.loadUi(ui_path, self)
         self.mounted_modules = {}
+        self.module_roi = None  # Per-module thermal camera ROIs of the current ring
         self.caen = None  # Placeholder for CAEN object
         self.light_on = True  # Conservative approach, assume light is on
         self.marta_safe = False  # Conservative approach, assume Marta is not safe
@@ -94,11 +97,10 @@ class ModulesListTab(QtWidgets.QMainWindow):
 
     def _make_api_request(self, endpoint, method, data=None):
         """Make API request and return result"""
-        url = f"{self.db_url.rstrip('/')}/{endpoint.lstrip('/')}"
         try:
             # Simulate API response for demonstration purposes
             #result = {"sessionName": "SIMULATED_SESSION_12345"} 
-            response = requests.request(method=method.lower(), url=url, json=data if data else None)
+            response = get_client(self.db_url).request(method, endpoint, json=data if data else None)
             if response.status_code != 200 and response.status_code != 201:
                 logger.error(f"API Error ({response.status_code}): {response.text}")
                 return False, None
@@ -271,16 +273,16 @@ class ModulesListTab(QtWidgets.QMainWindow):
 
                 # Use queued commands for buttons
                 btn_lv_on = QtWidgets.QPushButton("LV On")
-                btn_lv_on.clicked.connect(lambda checked, ch=module_info.get("LV"): self.caen_lv_on_wrap(ch))
+                btn_lv_on.clicked.connect(lambda checked, mod=module_name: self.caen_lv_on_wrap(self.mounted_modules[mod].get("LV")))
 
                 btn_lv_off = QtWidgets.QPushButton("LV Off")
-                btn_lv_off.clicked.connect(lambda checked, ch=module_info.get("LV"): self.caen_lv_off(ch))
+                btn_lv_off.clicked.connect(lambda checked, mod=module_name: self.caen_lv_off(self.mounted_modules[mod].get("LV")))
 
                 btn_hv_on = QtWidgets.QPushButton("HV On")
-                btn_hv_on.clicked.connect(lambda checked, ch=module_info.get("HV"): self.caen_hv_on_wrap(ch))
+                btn_hv_on.clicked.connect(lambda checked, mod=module_name: self.caen_hv_on_wrap(self.mounted_modules[mod].get("HV")))
 
                 btn_hv_off = QtWidgets.QPushButton("HV Off")
-                btn_hv_off.clicked.connect(lambda checked, ch=module_info.get("HV"): self.caen_hv_off(ch))
+                btn_hv_off.clicked.connect(lambda checked, mod=module_name: self.caen_hv_off(self.mounted_modules[mod].get("HV")))
 
                 # Connect test buttons to test functions
                 btn_start_test = QtWidgets.QPushButton("Test On")
@@ -309,8 +311,23 @@ class ModulesListTab(QtWidgets.QMainWindow):
 
                 self.moduleList.setItemWidget(item, 10, actions_widget)
 
+        # Thermal camera ROIs depend only on the module positions, build them once per ring
+        self.module_roi = ModuleROIIndex(self.mounted_modules, number_of_modules)
+
         self.update_timer.start(self.update_interval)
 
+    def update_module_endpoints(self, module_name):
+        """Show the FC7, HV and LV of a module whose endpoints arrived after populate_from_config"""
+        module_info = self.mounted_modules.get(module_name)
+        if module_info is None:
+            return
+        for i in range(self.moduleList.topLevelItemCount()):
+            item = self.moduleList.topLevelItem(i)
+            if item.text(1) == module_name:
+                item.setText(2, str(f"{module_info.get('speed', 'Unknown')};{module_info.get('FC7', '')}"))
+                item.setText(3, str(f"{module_info.get('HV', '')};{module_info.get('LV', '')}"))
+                break
+
     def set_test_command(self):
         """Set the test command from the combobox selection."""
         if not self.test_command:
@@ -561,19 +578,12 @@ class ModulesListTab(QtWidgets.QMainWindow):
             # Get the v and i values from the CAEN object
             response = self.caen.last_response
             if response:
-                hv_v = f"caen_{hv_channel}_Voltage"
-                hv_i = f"caen_{hv_channel}_Current"
-                hv_on = f"caen_{hv_channel}_IsOn"
-                lv_v = f"caen_{lv_channel}_Voltage"
-                lv_i = f"caen_{lv_channel}_Current"
-                lv_on = f"caen_{lv_channel}_IsOn"
-
-                self.mounted_modules[module_name]["HV_value"] = response.get(hv_v, 0)
-                self.mounted_modules[module_name]["HV_I_value"] = response.get(hv_i, 0)
-                self.mounted_modules[module_name]["HV_on"] = response.get(hv_on, False)
-                self.mounted_modules[module_name]["LV_value"] = response.get(lv_v, 0)
-                self.mounted_modules[module_name]["LV_I_value"] = response.get(lv_i, 0)
-                self.mounted_modules[module_name]["LV_on"] = response.get(lv_on, False)
+                self.mounted_modules[module_name]["HV_value"] = response.value(hv_channel, "Voltage", 0)
+                self.mounted_modules[module_name]["HV_I_value"] = response.value(hv_channel, "Current", 0)
+                self.mounted_modules[module_name]["HV_on"] = response.value(hv_channel, "IsOn", False)
+                self.mounted_modules[module_name]["LV_value"] = response.value(lv_channel, "Voltage", 0)
+                self.mounted_modules[module_name]["LV_I_value"] = response.value(lv_channel, "Current", 0)
+                self.mounted_modules[module_name]["LV_on"] = response.value(lv_channel, "IsOn", False)
             else:
                 logger.debug(f"No response from CAEN for module: {module_name}")
                 self.mounted_modules[module_name]["HV_value"] = 0
@@ -0,0 +1,183 @@
+import gzip
+import struct
+import threading
+import time
+import logging
+
+import numpy as np
+import paho.mqtt.client as mqtt
+
+from .mqtt_router import make_client
+
+logger = logging.getLogger(__name__)
+
+BAG_MAGIC = b"MQTTBAG1"
+# timestamp, topic length, payload length
+RECORD_HEADER = struct.Struct("<dHI")
+
+
+def _open(path, mode):
+    """Bags ending in .gz are gzip compressed"""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+class BagWriter:
+    """Append MQTT messages with their arrival time to a bag file"""
+
+    def __init__(self, path):
+        self._file = _open(path, "wb")
+        self._file.write(BAG_MAGIC)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def write(self, timestamp, topic, payload):
+        topic = topic.encode() if isinstance(topic, str) else topic
+        payload = payload.encode() if isinstance(payload, str) else bytes(payload)
+        with self._lock:
+            self._file.write(RECORD_HEADER.pack(timestamp, len(topic), len(payload)))
+            self._file.write(topic)
+            self._file.write(payload)
+            self.count += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_bag(path):
+    """Yield (timestamp, topic, payload) for every message of a bag file"""
+    with _open(path, "rb") as f:
+        if f.read(len(BAG_MAGIC)) != BAG_MAGIC:
+            raise ValueError(f"{path} is not an MQTT bag file")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            timestamp, topic_length, payload_length = RECORD_HEADER.unpack(header)
+            topic = f.read(topic_length).decode()
+            payload = f.read(payload_length)
+            if len(payload) < payload_length:
+                logger.warning(f"Truncated last message in {path}")
+                return
+            yield timestamp, topic, payload
+
+
+def make_message(topic, payload):
+    """Build a paho MQTTMessage as delivered to on_message callbacks"""
+    message = mqtt.MQTTMessage(topic=topic.encode())
+    message.payload = payload
+    return message
+
+
+class MQTTRecorder:
+    """Record all messages of a set of topic filters into a bag file"""
+
+    def __init__(self, broker, port, topics, path):
+        self.topics = list(topics)
+        self.writer = BagWriter(path)
+        self._client = make_client()
+        self._client.on_connect = self.on_connect
+        self._client.on_message = self.on_message
+        self._client.connect(broker, port, keepalive=60)
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            for topic in self.topics:
+                self._client.subscribe(topic)
+                logger.info(f"Recording topic: {topic}")
+        else:
+            logger.error(f"Failed to connect with result code {rc}")
+
+    def on_message(self, client, userdata, msg):
+        self.writer.write(time.time(), msg.topic, msg.payload)
+
+    def start(self):
+        self._client.loop_start()
+
+    def stop(self):
+        self._client.loop_stop()
+        self._client.disconnect()
+        self.writer.close()
+
+
+class MQTTReplayer:
+    """Feed recorded messages to on_message callbacks without a broker.
+
+    Handlers are (topic filter, callback) pairs; every message is delivered to
+    all callbacks whose filter matches, with the same (client, userdata, msg)
+    signature as paho. With speed=None messages are replayed as fast as
+    possible, otherwise with the recorded spacing divided by speed. Messages
+    are counted per topic and the time spent in each handler call is measured
+    per topic, a message routed to two handlers gives two latency samples.
+    """
+
+    def __init__(self, handlers, speed=1.0):
+        self.handlers = list(handlers)
+        self.speed = speed
+        self.counts = {}  # topic -> number of replayed messages
+        self.latencies = {}  # topic -> list of handler times in seconds
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def _callbacks(self, topic, cache):
+        if topic not in cache:
+            cache[topic] = [
+                callback for topic_filter, callback in self.handlers if mqtt.topic_matches_sub(topic_filter, topic)
+            ]
+        return cache[topic]
+
+    def replay(self, messages):
+        """Replay an iterable of (timestamp, topic, payload) and return the number of messages"""
+        cache = {}
+        count = 0
+        first_recorded = None
+        started = time.perf_counter()
+        for timestamp, topic, payload in messages:
+            if self.speed:
+                if first_recorded is None:
+                    first_recorded = timestamp
+                delay = (timestamp - first_recorded) / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            message = make_message(topic, payload)
+            for callback in self._callbacks(topic, cache):
+                handler_started = time.perf_counter()
+                try:
+                    callback(None, None, message)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error replaying message on {topic}: {e}")
+                self.latencies.setdefault(topic, []).append(time.perf_counter() - handler_started)
+            self.counts[topic] = self.counts.get(topic, 0) + 1
+            count += 1
+        self.elapsed = time.perf_counter() - started
+        return count
+
+    def report(self):
+        """Return {topic: {"messages", "rate", "p50", "p95", "p99", "max"}}.
+
+        rate is in messages per second of replay wall time, the latencies are
+        per handler call in ms, NaN for topics without handlers.
+        """
+        report = {}
+        for topic, messages in sorted(self.counts.items()):
+            latencies = np.asarray(self.latencies.get(topic, [np.nan])) * 1e3
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            report[topic] = {
+                "messages": messages,
+                "rate": messages / self.elapsed if self.elapsed else float("inf"),
+                "p50": float(p50),
+                "p95": float(p95),
+                "p99": float(p99),
+                "max": float(latencies.max()),
+            }
+        return report
@@ -0,0 +1,217 @@
+import threading
+import time
+import logging
+
+import paho.mqtt.client as mqtt
+
+logger = logging.getLogger(__name__)
+
+
+def make_client(client_id=""):
+    """Create a paho client with the version 1 callback API on both paho 1.x and 2.x"""
+    if hasattr(mqtt, "CallbackAPIVersion"):
+        return mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id=client_id)
+    return mqtt.Client(client_id=client_id)
+
+
+class TopicRouter:
+    """Trie of MQTT topic filters mapping topics to handlers.
+
+    Filters may use the `+` and `#` wildcards. match() walks the trie once
+    level by level, so its cost depends on the depth of the topic and not on
+    the number of registered filters. As in MQTT, a topic is delivered to the
+    handlers of every matching filter.
+    """
+
+    def __init__(self):
+        self._root = {}  # level -> (children, handlers)
+        self._filters = {}  # filter -> handlers, in registration order
+        self._lock = threading.Lock()
+
+    def add(self, topic_filter, handler):
+        with self._lock:
+            node = self._root
+            levels = topic_filter.split("/")
+            for i, level in enumerate(levels):
+                children, handlers = node.setdefault(level, ({}, []))
+                if i == len(levels) - 1:
+                    handlers.append(handler)
+                node = children
+            self._filters.setdefault(topic_filter, []).append(handler)
+
+    def remove(self, topic_filter, handler):
+        with self._lock:
+            if handler not in self._filters.get(topic_filter, []):
+                return
+            self._filters[topic_filter].remove(handler)
+            if not self._filters[topic_filter]:
+                del self._filters[topic_filter]
+            node = self._root
+            levels = topic_filter.split("/")
+            for i, level in enumerate(levels):
+                children, handlers = node[level]
+                if i == len(levels) - 1:
+                    handlers.remove(handler)
+                node = children
+
+    @property
+    def filters(self):
+        return list(self._filters)
+
+    def match(self, topic):
+        """Return the handlers of all filters matching a topic"""
+        matched = []
+        nodes = [self._root]
+        levels = topic.split("/")
+        for i, level in enumerate(levels):
+            next_nodes = []
+            for node in nodes:
+                # A trailing # matches this level and everything below
+                if "#" in node and not (i == 0 and level.startswith("$")):
+                    matched.extend(node["#"][1])
+                for key in (level, "+"):
+                    if key in node:
+                        children, handlers = node[key]
+                        if i == len(levels) - 1:
+                            matched.extend(handlers)
+                            # "a/#" also matches "a"
+                            if "#" in children:
+                                matched.extend(children["#"][1])
+                        next_nodes.append(children)
+            nodes = next_nodes
+            if not nodes:
+                break
+        return matched
+
+
+class PayloadLogger:
+    """Opt-in payload logging, at most once per topic every `interval` seconds"""
+
+    def __init__(self, enabled=False, interval=60.0):
+        self.enabled = enabled
+        self.interval = interval
+        self._last = {}
+
+    def log(self, topic, payload):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last.get(topic, -self.interval) < self.interval:
+            return
+        self._last[topic] = now
+        logger.info(f"Payload on {topic}: {payload[:500]!r}")
+
+
+class MQTTConnection:
+    """One paho connection shared by all coldroom MQTT clients.
+
+    Clients register (topic filter, handler) pairs with subscribe(); handlers
+    are called on the network thread as handler(topic, payload). Subscriptions
+    are restored on every reconnection. dispatch() delivers a message without a
+    broker, e.g. for replay.
+    """
+
+    def __init__(self, broker, port, log_payloads=False, log_interval=60.0):
+        self.broker = broker
+        self.port = port
+        self.router = TopicRouter()
+        self.payload_logger = PayloadLogger(log_payloads, log_interval)
+        self.connected = False
+        self._loop_running = False
+        self._connect_listeners = []
+        self._receipt = threading.local()
+
+        self.client = make_client()
+        self.client.on_connect = self.on_connect
+        self.client.on_disconnect = self.on_disconnect
+        self.client.on_message = self.on_message
+        self.client.keepalive = 60
+        self.client.connect_timeout = 5
+
+    def connect(self):
+        """Connect in the background once the loop runs, retrying until the broker answers"""
+        logger.debug(f"Connecting to MQTT broker at {self.broker}:{self.port}")
+        self.client.connect_async(self.broker, self.port, keepalive=60)
+
+    @property
+    def loop_running(self):
+        return self._loop_running
+
+    def loop_start(self):
+        """Start the network thread, once"""
+        if not self._loop_running:
+            self.client.loop_start()
+            self._loop_running = True
+            logger.info("Started shared MQTT client loop")
+
+    def loop_stop(self):
+        if self._loop_running:
+            self.client.loop_stop()
+            self._loop_running = False
+            logger.info("Stopped shared MQTT client loop")
+
+    def disconnect(self):
+        self.client.disconnect()
+        self.loop_stop()
+
+    def subscribe(self, topic_filter, handler):
+        """Route messages matching topic_filter to handler(topic, payload)"""
+        first = topic_filter not in self.router.filters
+        self.router.add(topic_filter, handler)
+        if first and self.connected:
+            self.client.subscribe(topic_filter)
+        logger.info(f"Subscribed to topic: {topic_filter}")
+
+    def unsubscribe(self, topic_filter, handler):
+        self.router.remove(topic_filter, handler)
+        if topic_filter not in self.router.filters and self.connected:
+            self.client.unsubscribe(topic_filter)
+
+    def add_connect_listener(self, listener):
+        """Register a callable called after every (re)connection, once subscriptions are restored"""
+        self._connect_listeners.append(listener)
+
+    def publish(self, topic, payload, **kwargs):
+        return self.client.publish(topic, payload, **kwargs)
+
+    def on_connect(self, client, userdata, flags, rc):
+        if rc == 0:
+            self.connected = True
+            for topic_filter in self.router.filters:
+                self.client.subscribe(topic_filter)
+            logger.info(f"Connected to MQTT broker, {len(self.router.filters)} topics subscribed")
+            for listener in self._connect_listeners:
+                try:
+                    listener()
+                except Exception as e:
+                    logger.error(f"Error in MQTT connect listener: {e}")
+        else:
+            logger.error(f"Connection failed with result code {rc}")
+
+    def on_disconnect(self, client, userdata, rc):
+        self.connected = False
+        if rc != 0:
+            logger.error(f"Unexpected disconnection: {rc}")
+        else:
+            logger.info("Disconnected from MQTT broker")
+
+    def on_message(self, client, userdata, msg):
+        self.dispatch(msg.topic, msg.payload)
+
+    def received_at(self):
+        """perf_counter time at which the message being handled on this thread was received, else None"""
+        return getattr(self._receipt, "time", None)
+
+    def dispatch(self, topic, payload):
+        """Call the handlers of all filters matching the topic"""
+        self._receipt.time = time.perf_counter()
+        self.payload_logger.log(topic, payload)
+        handlers = self.router.match(topic)
+        if not handlers:
+            logger.debug(f"No handler for topic: {topic}")
+        for handler in handlers:
+            try:
+                handler(topic, payload)
+            except Exception as e:
+                logger.error(f"Error handling message on {topic}: {e}")
+        self._receipt.time = None
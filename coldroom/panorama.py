@@ -0,0 +1,137 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_panorama(panorama, temp_min, temp_max):
+    """Scale a temperature panorama to uint8 over [temp_min, temp_max], areas without data are 0"""
+    if np.isclose(temp_min, temp_max):
+        temp_max = temp_min + 1.0  # Add a small difference to avoid division by zero
+
+    panorama_norm = np.zeros_like(panorama, dtype=np.float32)
+    valid_mask = ~np.isnan(panorama)
+    panorama_norm[valid_mask] = 255 * (panorama[valid_mask] - temp_min) / (temp_max - temp_min)
+    panorama_norm = np.clip(panorama_norm, 0, 255)
+    return panorama_norm.astype(np.uint8)
+
+
+class PanoramaAccumulator:
+    """Incrementally stitched 360 degree panorama for one camera.
+
+    The accumulator keeps the running sum and overlap count of the newest frame
+    of every position bin of a ThermalFrameStore. On update() only the bins
+    whose newest frame changed since the previous update are subtracted and
+    added again, so a refresh costs O(changed frames). The bin to column
+    mapping is computed once per FOV/offset and rebuilt only when they change.
+    """
+
+    def __init__(self, store, fov, offset, full_coverage=360, output_width=360):
+        self.store = store
+        self.full_coverage = full_coverage
+        self.output_width = output_width
+        self.height, self.width = store.frame_shape
+
+        self.fov = None
+        self.offset = None
+        self._columns = None
+        self._sum = None
+        self._count = None
+        self._resample = None
+
+        # Frame each bin currently contributes, and its timestamp (0 = none)
+        self._contribution = np.zeros((store.n_bins,) + store.frame_shape, dtype=np.float32)
+        self._timestamps = np.zeros(store.n_bins, dtype=np.float64)
+
+        self.configure(fov, offset)
+
+    def configure(self, fov, offset):
+        """Set FOV and camera offset, rebuilding the column mapping only if they changed"""
+        if fov == self.fov and offset == self.offset:
+            return False
+
+        self.fov = fov
+        self.offset = offset
+        total_width = int(self.width * self.full_coverage / fov)
+
+        # Centre the FOV on the camera position, as in stitch_multiple_images
+        angles = (self.store.bin_positions + offset) % self.full_coverage
+        centered = (angles - fov / 2) % self.full_coverage
+        x_offsets = (centered * self.width / fov).astype(np.int64)
+        self._columns = (x_offsets[:, None] + np.arange(self.width)[None, :]) % total_width
+
+        self._sum = np.zeros((self.height, total_width), dtype=np.float64)
+        self._count = np.zeros((self.height, total_width), dtype=np.float32)
+
+        # Linear resampling of the panorama to output_width columns (scipy.ndimage.zoom, order=1)
+        if total_width == self.output_width:
+            self._resample = None
+        else:
+            coords = np.arange(self.output_width) * (total_width - 1) / max(self.output_width - 1, 1)
+            left = np.floor(coords).astype(np.int64)
+            right = np.minimum(left + 1, total_width - 1)
+            self._resample = (left, right, (coords - left).astype(np.float32))
+
+        # Every stored frame has to be placed again with the new mapping
+        self._timestamps[:] = 0
+        logger.debug(f"Panorama mapping rebuilt: fov={fov}, offset={offset}, width={total_width}")
+        return True
+
+    def _remove(self, index):
+        columns = self._columns[index]
+        self._sum[:, columns] -= self._contribution[index]
+        self._count[:, columns] -= 1
+        self._timestamps[index] = 0
+
+    def update(self):
+        """Fold the frames that changed since the last update into the panorama"""
+        bins = self.store.filled_bins()
+        timestamps = self.store.latest_timestamps(bins)
+
+        # Bins that were contributing but are no longer in the store (e.g. cleared)
+        stale = np.flatnonzero(self._timestamps)
+        stale = stale[~np.isin(stale, bins)]
+        for index in stale:
+            self._remove(index)
+
+        changed = bins[timestamps != self._timestamps[bins]]
+        if changed.size:
+            _, frames = self.store.latest_frames(changed)
+            for index, frame, timestamp in zip(changed, frames, self.store.latest_timestamps(changed)):
+                if self._timestamps[index]:
+                    self._remove(index)
+                columns = self._columns[index]
+                self._sum[:, columns] += frame
+                self._count[:, columns] += 1
+                self._contribution[index] = frame
+                self._timestamps[index] = timestamp
+        return int(changed.size + stale.size)
+
+    @property
+    def empty(self):
+        return not self._timestamps.any()
+
+    def temperature_range(self):
+        """Return (min, max) over the frames currently in the panorama"""
+        frames = self._contribution[self._timestamps > 0]
+        return float(frames.min()), float(frames.max())
+
+    def covered_columns(self):
+        """Return a boolean mask of the output_width columns holding data"""
+        covered = self._count[0] > 0
+        if self._resample is None:
+            return covered
+        left, right, weight = self._resample
+        return covered[left] & (covered[right] | (weight == 0))
+
+    def panorama(self):
+        """Return the mean panorama resampled to output_width columns"""
+        panorama = np.zeros(self._sum.shape, dtype=np.float32)
+        mask = self._count > 0
+        panorama[mask] = self._sum[mask] / self._count[mask]
+
+        if self._resample is None:
+            return panorama
+        left, right, weight = self._resample
+        return panorama[:, left] * (1 - weight) + panorama[:, right] * weight
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# Calibrate the chip temperatures of Ph2ACF monitoring messages, one JSON message per line on stdin
+# example usage:
+#   mosquitto_sub -h 192.168.0.45 -t '/ph2acf/#' | python3 coldroom/ph2acf_schema.py --offsets "$TEMP_OFFSETS"
+import argparse
+import json
+import re
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+
+CHIP_TYPES = ("SSA", "MPA")
+
+# SSA_BE0_H7_C6_temp (BeBoard, hybrid, chip) or SSA_H0_C0_temp
+TEMPERATURE_KEY = re.compile(r"^(SSA|MPA)_(?:BE\d+_)?H(\d+)_C(\d+)_temp$")
+
+# Raw keys are cached, including the ones that are not chip temperatures, up to this many
+MAX_CACHED_KEYS = 4096
+
+
+def parse_temperature_key(key):
+    """(chip type, hybrid, chip) of a Ph2ACF temperature key, None for any other key.
+
+    The hybrid id is taken modulo 2, a module has the hybrids H0 and H1.
+    """
+    match = TEMPERATURE_KEY.match(key)
+    if match is None:
+        return None
+    chip_type, hybrid, chip = match.groups()
+    return chip_type, int(hybrid) % 2, int(chip)
+
+
+def slot_name(chip_type, hybrid, chip):
+    """Key of the temperature offsets in the module database, e.g. SSA_H0_3"""
+    return f"{chip_type}_H{hybrid}_{chip}"
+
+
+def module_offsets(module_data):
+    """Temperature offsets of a module document, {} when it has none"""
+    if not module_data:
+        return {}
+    offsets = module_data.get("temperature_offset")
+    if offsets is None:
+        # Look for alternative keys starting with 'temperature_offset'
+        variants = sorted(k for k in module_data.keys() if k.startswith("temperature_offset"))
+        offsets = module_data[variants[0]] if variants else {}
+    return offsets if isinstance(offsets, dict) else {}
+
+
+class TemperatureSchema:
+    """Fixed slot index of every chip temperature seen in the Ph2ACF messages.
+
+    Each raw key is parsed once, later messages only need a dictionary
+    lookup per key to fill a float array in slot order. Slots are added the
+    first time a (type, hybrid, chip) shows up and never move.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._slots = {}
+        self.names = []
+        self.chip_types = []
+        self.type_masks = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def slot(self, key):
+        """Slot index of a raw key, None when it is not a chip temperature"""
+        try:
+            return self._keys[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if len(self._keys) >= MAX_CACHED_KEYS:
+                self._keys.clear()
+            parsed = parse_temperature_key(key)
+            index = None
+            if parsed is not None:
+                name = slot_name(*parsed)
+                index = self._slots.get(name)
+                if index is None:
+                    index = len(self.names)
+                    self._slots[name] = index
+                    self.names.append(name)
+                    self.chip_types.append(parsed[0])
+                    self.type_masks = {
+                        chip_type: np.array([t == chip_type for t in self.chip_types]) for chip_type in CHIP_TYPES
+                    }
+            self._keys[key] = index
+            return index
+
+    def read(self, payload):
+        """Temperatures of a message in slot order, NaN for the slots it does not contain"""
+        indices = []
+        values = []
+        for key, value in payload.items():
+            index = self.slot(key)
+            if index is not None:
+                indices.append(index)
+                values.append(value)
+        readings = np.full(len(self.names), np.nan)
+        readings[indices] = np.asarray(values, dtype=float)
+        return readings
+
+    def to_dict(self, readings):
+        """{slot name: temperature} of the slots present in readings"""
+        return {self.names[i]: float(readings[i]) for i in np.flatnonzero(~np.isnan(readings))}
+
+    def stats(self, readings):
+        """{chip type: (mean, max)} of the readings, NaN for a type without any"""
+        result = {}
+        masks = self.type_masks
+        for chip_type in CHIP_TYPES:
+            mask = masks.get(chip_type)
+            values = readings[mask[: len(readings)]] if mask is not None else readings[:0]
+            values = values[~np.isnan(values)]
+            result[chip_type] = (values.mean(), values.max()) if len(values) else (np.nan, np.nan)
+        return result
+
+
+class TemperatureOffsets:
+    """Offset vector of one module in the slot order of a schema.
+
+    Slots without an offset get 0 and are flagged in `missing`. The vector
+    follows the schema when it gains slots.
+    """
+
+    def __init__(self, schema, offsets):
+        self.schema = schema
+        self.offsets = {name: float(value) for name, value in (offsets or {}).items()}
+        self.vector = np.zeros(0)
+        self.missing = np.zeros(0, dtype=bool)
+
+    def _refresh(self):
+        names = self.schema.names[len(self.vector) :]
+        if names:
+            self.vector = np.append(self.vector, [self.offsets.get(name, 0.0) for name in names])
+            self.missing = np.append(self.missing, [name not in self.offsets for name in names])
+
+    def apply(self, readings):
+        """(calibrated readings, True if any present reading had no offset)"""
+        if len(self.vector) < len(readings):
+            self._refresh()
+        vector = self.vector[: len(readings)]
+        present = ~np.isnan(readings)
+        return readings + vector, bool((self.missing[: len(readings)] & present).any())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print raw and calibrated Ph2ACF chip temperatures")
+    parser.add_argument("--offsets", default="{}", help="temperature_offsets of the module as JSON")
+    parser.add_argument(
+        "--metadata", nargs="*", default=None, help="print each message with these payload fields, e.g. counter BeBoardId"
+    )
+    args = parser.parse_args()
+
+    schema = TemperatureSchema()
+    offsets = TemperatureOffsets(schema, json.loads(args.offsets or "{}") or {})
+    for line in sys.stdin:
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            continue
+        raw = schema.read(payload)
+        calibrated, _ = offsets.apply(raw)
+        if args.metadata is not None:
+            print(f"[{datetime.now():%Y-%m-%d %H:%M:%S}] Raw MQTT data: {line.strip()}")
+            print("  Metadata:")
+            for key in args.metadata:
+                print(f"    {key}: {payload.get(key, 'N/A')}")
+        print("  Temperature readings (Raw | Calibrated):")
+        for key, value in payload.items():
+            index = schema.slot(key)
+            if index is not None:
+                name = schema.names[index]
+                offset = offsets.offsets.get(name)
+                note = f"offset: {offset}" if offset is not None else "no offset"
+                print(f"    {key} -> {name}: {raw[index]:6.2f}°C | {calibrated[index]:6.2f}°C ({note})")
+            elif key.endswith("_temp"):
+                print(f"    {key}: {float(value):6.2f}°C | {float(value):6.2f}°C (no calibration)")
+        if args.metadata is not None:
+            print("----------------------------------------")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
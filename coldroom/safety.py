@@ -2,6 +2,8 @@ import os
 import yaml
 import logging
 
+from caen.caen_status import any_on
+
 logger = logging.getLogger(__name__)
 
 safety_settings = {
@@ -88,19 +90,22 @@ def check_light_status(system_status):
 
 def check_any_hv_on(caen_ch_status, used_channels):
     try:
-        # Check if any used channel is on
-        hv_on = False
-        for channel in used_channels["HV"]:
-            ch_str = f"caen_{channel}_IsOn"
-            if bool(caen_ch_status.get(ch_str, False)):
-                hv_on = True
-                break
-        return hv_on
+        # Check if any used channel is on, a CAENStatus answers from its IsOn column
+        return any_on(caen_ch_status, used_channels["HV"])
     except Exception as e:
         logger.debug(f"Error in check_any_hv_on: {str(e)}")
         return True
 
 
+def check_any_lv_on(caen_ch_status, used_channels):
+    try:
+        # Check if any used channel is on
+        return any_on(caen_ch_status, used_channels["LV"])
+    except Exception as e:
+        logger.debug(f"Error in check_any_lv_on: {str(e)}")
+        return True
+
+
 def check_cleanroom_expired(elapsed_time, threshold=600):
     return elapsed_time > threshold
 
@@ -186,16 +191,13 @@ def check_marta_safe(system_status):
         return False, "Error checking MARTA status"
 
 
-# def check_lv_safe_on:
+def check_lv_safe_on(system_status):
+    """Modules may be powered only while all internal temperatures are above the dew point"""
+    return check_dew_point(system_status)
+
 
 # def check_marta_on_for_ot
 # def check_marta_on_for_it
 
-#def switch_all_lv_off
-
-
-# def soft_interlock_loop: ### describe only highlevel
-# if condition then : action
-# if ! check_lv_safe_on and something_on : switch_all_lv_off()
-
-#when performing an active safety action here we send a msg to the alarm topic "/alarm"
\ No newline at end of file
+# The soft interlock (if condition then action, e.g. LV on below the dew point -> switch all LV off)
+# runs in interlock.InterlockEngine, which sends a message to the alarm topic "/alarm" on every action
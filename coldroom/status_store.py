@@ -0,0 +1,88 @@
+import copy
+import threading
+import logging
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# key is None for subsystems holding a single value (e.g. "alarm")
+StatusChange = namedtuple("StatusChange", ["subsystem", "key", "old", "new", "version"])
+
+
+class StatusStore:
+    """Versioned per-key copy of the system status.
+
+    update() compares the new values of a subsystem with the stored ones and
+    calls the listeners once with the list of StatusChange for the keys whose
+    value changed; unchanged keys cost one comparison. Every change bumps the
+    global version and records it for its (subsystem, key). Values are copied
+    on update, so clients may keep mutating the dicts they publish. Listeners
+    are called on the thread calling update().
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._values = {}  # subsystem -> {key: value}
+        self._versions = {}  # (subsystem, key) -> version of the last change
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Register listener(changes) called after every update that changed something"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def update(self, subsystem, values):
+        """Store the new status of a subsystem and return the list of changes"""
+        if not isinstance(values, dict):
+            values = {None: values}
+        changes = []
+        with self._lock:
+            stored = self._values.setdefault(subsystem, {})
+            for key, new in values.items():
+                old = stored.get(key)
+                if key in stored and old == new:
+                    continue
+                self.version += 1
+                new = copy.deepcopy(new) if isinstance(new, (dict, list)) else new
+                stored[key] = new
+                self._versions[(subsystem, key)] = self.version
+                changes.append(StatusChange(subsystem, key, old, new, self.version))
+            # The subsystem status is replaced as a whole, missing keys are gone
+            for key in [key for key in stored if key not in values]:
+                self.version += 1
+                self._versions[(subsystem, key)] = self.version
+                changes.append(StatusChange(subsystem, key, stored.pop(key), None, self.version))
+
+        if changes:
+            for listener in list(self._listeners):
+                try:
+                    listener(changes)
+                except Exception as e:
+                    logger.error(f"Error in status listener: {e}")
+        return changes
+
+    def get(self, subsystem, key=None, default=None):
+        with self._lock:
+            return self._values.get(subsystem, {}).get(key, default)
+
+    def key_version(self, subsystem, key=None):
+        """Version of the last change of a key, 0 if it never changed"""
+        return self._versions.get((subsystem, key), 0)
+
+    def changed_since(self, version):
+        """(subsystem, key) pairs changed after a given global version"""
+        with self._lock:
+            return [item for item, changed in self._versions.items() if changed > version]
+
+    def snapshot(self):
+        """Current values as a list of StatusChange from None, e.g. to initialise a view"""
+        with self._lock:
+            return [
+                StatusChange(subsystem, key, None, value, self._versions[(subsystem, key)])
+                for subsystem, values in self._values.items()
+                for key, value in values.items()
+            ]
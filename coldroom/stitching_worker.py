@@ -0,0 +1,183 @@
+import threading
+import time
+import logging
+
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .panorama import PanoramaAccumulator
+
+logger = logging.getLogger(__name__)
+
+# Granularity in degrees Celsius of the automatic colour range
+COLORBAR_STEP = 0.5
+
+
+class StitchingWorker(QThread):
+    """Build the stitched camera panoramas off the GUI thread.
+
+    The worker is woken by the thermal camera client whenever a frame arrives
+    and produces at most one result every `interval` seconds. Frames are never
+    queued: the frame store only keeps the newest frame per position, so frames
+    that arrive while a result is being computed or drawn simply replace older
+    ones. A new result is only emitted once the GUI has acknowledged the
+    previous one, so a slow redraw cannot pile up work.
+    """
+
+    # {"cameras": {camera_name: {"panorama", "vmin", "vmax"}}, "modules": {module_name: {"min", "max", "mean"}}}
+    results_ready = pyqtSignal(object)
+
+    def __init__(self, system, camera_positions, camera_fovs, interval=1.0):
+        super().__init__()
+        self.system = system
+        self.camera_positions = camera_positions
+        self.camera_fovs = dict(camera_fovs)
+        self.interval = interval
+        self.use_co2_scaling = True
+        self.mounted_modules = None
+        self.module_roi = None
+
+        self.accumulators = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()  # new frame or configuration change
+        self._idle = threading.Event()  # previous result drawn by the GUI
+        self._idle.set()
+        self._stopped = threading.Event()
+
+    ### Configuration, called from the GUI thread ###
+    def set_camera_fov(self, camera_name, fov):
+        with self._lock:
+            self.camera_fovs[camera_name] = fov
+        self.request_update()
+
+    def set_scaling(self, use_co2_scale):
+        with self._lock:
+            self.use_co2_scaling = use_co2_scale
+        self.request_update()
+
+    def set_mounted_modules(self, mounted_modules):
+        with self._lock:
+            self.mounted_modules = mounted_modules
+        self.request_update()
+
+    def set_module_roi(self, module_roi):
+        """Set the ModuleROIIndex of the current ring"""
+        with self._lock:
+            self.module_roi = module_roi
+        self.request_update()
+
+    def reset(self):
+        """Drop all panoramas, e.g. after the stitching data was cleared"""
+        with self._lock:
+            self.accumulators = {}
+        self.request_update()
+
+    def request_update(self):
+        """Wake the worker to produce a new result"""
+        self._wakeup.set()
+
+    def on_frame(self, camera_name, position):
+        """Frame listener of ThermalCameraMQTTClient, runs on the MQTT network thread"""
+        self._wakeup.set()
+
+    def acknowledge(self):
+        """Called by the GUI once the previous result has been drawn"""
+        self._idle.set()
+
+    def stop(self):
+        """Stop the thread"""
+        self._stopped.set()
+        self._wakeup.set()
+        self._idle.set()
+        self.wait()
+
+    ### Worker thread ###
+    def run(self):
+        while not self._stopped.is_set():
+            # Wait for a new frame or a configuration change
+            if not self._wakeup.wait(self.interval):
+                continue
+            # Wait until the previous result has been drawn, newer frames stay in the store
+            self._idle.wait()
+            if self._stopped.is_set():
+                break
+
+            self._wakeup.clear()
+            started = time.monotonic()
+            try:
+                results = self.process()
+            except Exception as e:
+                logger.error(f"Error stitching camera images: {e}")
+                results = None
+            if results:
+                self._idle.clear()
+                self.results_ready.emit(results)
+
+            # Limit the update rate, frames arriving meanwhile are coalesced
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                self._stopped.wait(remaining)
+
+    def get_colorbar_range(self, accumulator):
+        """Return (vmin, vmax) for a panorama according to the scaling mode"""
+        if self.use_co2_scaling:
+            co2_temp = 0.0  # Default fallback
+            try:
+                co2_temp = float(self.system.status.get("marta", {}).get("TT06_CO2", 0.0))
+            except (ValueError, TypeError):
+                logger.warning("Could not get CO2 temperature from MARTA status, using default range")
+            return co2_temp, co2_temp + 15.0
+
+        # Round the automatic range to COLORBAR_STEP so that the colorbar (a full redraw)
+        # only changes when the range really moves
+        temp_min, temp_max = accumulator.temperature_range()
+        return (
+            float(np.floor(temp_min / COLORBAR_STEP) * COLORBAR_STEP),
+            float(np.ceil(temp_max / COLORBAR_STEP) * COLORBAR_STEP),
+        )
+
+    def process(self):
+        """Fold new frames into every camera panorama and return the results"""
+        thermalcamera = getattr(self.system, "_thermalcamera", None)
+        if thermalcamera is None:
+            return {}
+
+        with self._lock:
+            camera_fovs = dict(self.camera_fovs)
+            module_roi = self.module_roi
+
+        cameras = {}
+        roi_inputs = []
+        for camera_id, store in list(thermalcamera._stitching_data.items()):
+            if len(store) == 0:
+                continue
+            # add +1 to the camera name to match the UI naming
+            camera_name = f"camera{int(camera_id[-1]) + 1}"
+            fov = camera_fovs.get(camera_name, 20)
+            offset = self.camera_positions[camera_name]["position"]
+
+            with self._lock:
+                accumulator = self.accumulators.get(camera_name)
+                if accumulator is None or accumulator.store is not store:
+                    accumulator = PanoramaAccumulator(store, fov, offset, full_coverage=360, output_width=360)
+                    self.accumulators[camera_name] = accumulator
+
+            # Rebuilds the column mapping only if the FOV slider or camera offset changed
+            accumulator.configure(fov, offset)
+            accumulator.update()
+            if accumulator.empty:
+                continue
+
+            panorama = accumulator.panorama()
+            vmin, vmax = self.get_colorbar_range(accumulator)
+            cameras[camera_name] = {"panorama": panorama, "vmin": vmin, "vmax": vmax}
+            roi_inputs.append((self.camera_positions[camera_name]["side"], panorama, accumulator.covered_columns()))
+
+        if not cameras:
+            return {}
+
+        # All modules of the ring in one vectorized pass over the panoramas
+        modules = module_roi.compute(roi_inputs) if module_roi is not None else {}
+        if modules:
+            thermalcamera.publish_module_temperatures(modules)
+        return {"cameras": cameras, "modules": modules}
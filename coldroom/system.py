@@ -1,4 +1,5 @@
 import os
+import json
 import yaml
 import threading
 import time
@@ -6,12 +7,17 @@ import sys
 import logging
 from .thermal_camera import ThermalCameraMQTTClient
 from .marta_coldroom import MartaColdRoomMQTTClient
+from .mqtt_router import MQTTConnection
+from .status_store import StatusStore
+from .interlock import InterlockEngine
+from caen.caen_status import STATUS_INTERVAL, get_status_poller
 
 logger = logging.getLogger(__name__)
 
 
 class System:
-    def __init__(self):
+    def __init__(self, connect=True):
+        """Create the system and its MQTT clients, connect=False builds them offline (e.g. for replay)"""
         logger.info("Initializing System...")
         # Load settings
         self._settings = {}  # Initialize private settings variable
@@ -35,13 +41,28 @@ class System:
         self.BROKER = self._settings["mqtt"]["broker"]
         self.PORT = self._settings["mqtt"]["port"]
         self._status = {"marta": {}, "coldroom": {}, "thermal_camera": {}, "caen": {}, "cleanroom": {}, "coldroomair": {}}
+        # Versioned copy of the status, views subscribe to its per-key change events
+        self.status_store = StatusStore()
         self.safety_flags = {"door_locked": True, "sleep": True, "hv_safe": False}  # Default value to safest state
 
-        # Thread control
-        self._mqtt_thread = None
-        self._thread_stop = False
-        self._caen_thread = None
-        self._caen_thread_stop = False
+        # Shared CAEN status poller, attached by start_caen_status
+        self._caen = None
+
+        # One MQTT connection and network thread shared by all clients, each registers its topics
+        self.mqtt = MQTTConnection(
+            self.BROKER,
+            self.PORT,
+            log_payloads=self._settings["mqtt"].get("log_payloads", False),
+            log_interval=self._settings["mqtt"].get("log_payloads_interval", 60.0),
+        )
+
+        # Soft interlock, rules are registered by the application which knows how to act (e.g. on CAEN)
+        interlock_settings = self._settings.get("Interlock", {})
+        self.interlock = InterlockEngine(
+            self.status_store,
+            receipt_time=self.mqtt.received_at,
+            latency_budget=interlock_settings.get("latency_budget", 0.1),
+        )
 
         # Initialize MQTT clients
         logger.info("Initializing MQTT clients...")
@@ -53,20 +74,14 @@ class System:
             self._martacoldroom = None
 
         try:
-            self._thermalcamera = ThermalCameraMQTTClient(self)
+            self._thermalcamera = ThermalCameraMQTTClient(self, archive=connect)
             logger.info("Thermal Camera client initialized")
         except Exception as e:
             logger.error(f"Error initializing Thermal Camera client: {e}")
             self._thermalcamera = None
-            
-        try:
-            self._caen = None  
-        except Exception as e:
-            logger.error(f"Error initializing CAEN client: {e}")
-            self._caen = None
 
         # Start MQTT thread if any client is initialized
-        if any([self._martacoldroom, self._thermalcamera]):
+        if connect and any([self._martacoldroom, self._thermalcamera]):
             self.start_mqtt_thread()
 
     @property
@@ -94,6 +109,8 @@ class System:
         try:
             assert isinstance(status, dict)
             self._status.update(status)
+            for subsystem, values in status.items():
+                self.status_store.update(subsystem, values)
             logger.debug(f"Status updated: {status}")
         except AssertionError:
             logger.error("Invalid status update - must be a dictionary")
@@ -107,76 +124,56 @@ class System:
         return is_valid
 
     def start_mqtt_thread(self):
-        """Start MQTT thread to handle client loops"""
+        """Connect the shared MQTT connection and start its network thread"""
         logger.info("Starting MQTT thread...")
-        if self._mqtt_thread is None or not self._mqtt_thread.is_alive():
-            self._thread_stop = False
-            self._mqtt_thread = threading.Thread(target=self._mqtt_loop)
-            self._mqtt_thread.daemon = True
-            self._mqtt_thread.start()
+        if not self.mqtt.loop_running:
+            # The broker may have been changed in the settings tab
+            self.mqtt.broker = self.BROKER
+            self.mqtt.port = self.PORT
+            try:
+                self.mqtt.connect()
+            except Exception as e:
+                logger.error(f"Error connecting to MQTT broker: {e}")
+            self.mqtt.loop_start()
             logger.info("MQTT thread started")
-            
-            # Start CAEN status update thread
-            if self._caen and not self._caen_thread:
-                self._caen_thread_stop = False
-                self._caen_thread = threading.Thread(target=self._caen_status_loop)
-                self._caen_thread.daemon = True
-                self._caen_thread.start()
-                logger.info("CAEN status thread started")
         else:
             logger.warning("MQTT thread already running")
 
     def stop_mqtt_thread(self):
         """Stop MQTT thread"""
         logger.info("Stopping MQTT thread...")
-        if self._mqtt_thread and self._mqtt_thread.is_alive():
-            self._thread_stop = True
-            self._mqtt_thread.join(timeout=2)
+        if self.mqtt.loop_running:
+            self.mqtt.disconnect()
             logger.info("MQTT thread stopped")
-            
-            # Stop CAEN status thread
-            if self._caen_thread and self._caen_thread.is_alive():
-                self._caen_thread_stop = True
-                self._caen_thread.join(timeout=2)
-                logger.info("CAEN status thread stopped")
         else:
             logger.debug("No MQTT thread running")
 
-    def _mqtt_loop(self):
-        """Main MQTT loop that starts all client loops"""
-        logger.info("Starting MQTT client loops...")
-        try:
-            # Start client loops
-            if self._martacoldroom:
-                logger.debug("Starting MARTA/Coldroom/Cleanroom client loops")
-                self._martacoldroom.start_client_loops()
-
-            if self._thermalcamera:
-                logger.debug("Starting Thermal Camera client loop")
-                self._thermalcamera.loop_start()
-            
-            logger.info("All MQTT client loops started")
-            
-            # Keep thread running
-            while not self._thread_stop:
-                time.sleep(1)
-                
-        except Exception as e:
-            logger.error(f"Error in MQTT loop: {e}")
-        finally:
-            logger.info("MQTT loop ending, stopping client loops...")
+    def start_caen_status(self, ip=None, port=None):
+        """Feed status["caen"] and the CAEN MQTT topic from the shared status poller of a CAEN server"""
+        caen_settings = self._settings.get("CAEN", {})
+        ip = ip or caen_settings.get("ip", "192.168.0.45")
+        port = port or caen_settings.get("port", 7000)
+        self.stop_caen_status()
+        self._caen = get_status_poller(ip, port, caen_settings.get("status_interval", STATUS_INTERVAL))
+        self._caen.subscribe(self._on_caen_status)
+        logger.info(f"CAEN status polled from {ip}:{port} every {self._caen.interval} s")
+
+    def stop_caen_status(self):
+        if self._caen is not None:
+            self._caen.unsubscribe(self._on_caen_status)
+            self._caen = None
 
-    def _caen_status_loop(self):
-        """Background thread to periodically update CAEN status"""
-        while not self._caen_thread_stop:
+    def _on_caen_status(self, status):
+        """Called on the poller thread with each parsed CAENStatus"""
+        # The store tracks changes per key, it gets the flat caen_<channel>_<field> view
+        values = status.to_dict()
+        self.update_status({"caen": values})
+        topic = self._settings.get("CAEN", {}).get("mqtt_topic")
+        if topic and self.mqtt.loop_running:
             try:
-                if self._caen:
-                    status = self._caen.get_status()
-                    if status:
-                        self.update_status({"caen": status})
+                self.mqtt.publish(topic, json.dumps(values))
             except Exception as e:
-                logger.error(f"Error in CAEN status loop: {e}")
-            time.sleep(2)
+                logger.error(f"Error publishing CAEN status: {e}")
 
     def cleanup(self):
         """Clean up resources"""
@@ -184,6 +181,7 @@ class System:
         try:
             # Stop MQTT thread first
             self.stop_mqtt_thread()
+            self.interlock.stop()
             
             # Stop individual client loops
             if hasattr(self, '_martacoldroom') and self._martacoldroom:
@@ -192,11 +190,11 @@ class System:
 
             if hasattr(self, '_thermalcamera') and self._thermalcamera:
                 logger.debug("Stopping Thermal Camera client loop")
-                self._thermalcamera.loop_start()
+                self._thermalcamera.loop_stop()
             
             if hasattr(self, '_caen') and self._caen:
-                logger.debug("Disconnecting CAEN TCP client")
-                self._caen.disconnect()
+                logger.debug("Detaching from the CAEN status poller")
+                self.stop_caen_status()
                 
             logger.info("All resources cleaned up")
             
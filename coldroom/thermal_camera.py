@@ -1,72 +1,47 @@
-import struct
 import json
-import paho.mqtt.client as mqtt
-import base64
 import time
 import numpy as np
 import logging
+import os
+from .thermal_decoder import decode_frame
+from .frame_archive import ThermalFrameArchive
+from .thermal_frame_store import ThermalFrameStore
 
 logger = logging.getLogger(__name__)
 
 
 class ThermalCameraMQTTClient:
-    def __init__(self, system_obj):
+    def __init__(self, system_obj, archive=True):
         self._system = system_obj
         self.TOPIC = system_obj.settings["ThermalCamera"]["mqtt_topic"]
         self.TOPIC_BASE = self.TOPIC.replace("#", "")
 
         # Initialize data structures
         self._status = {}
+        # One fixed-size frame store per camera, created on the first frame
         self._stitching_data = {}
-        self._stitching_max_temperature = {}
-        self._stitching_min_temperature = {}
+        self._stitching_bin_width = system_obj.settings["ThermalCamera"].get("stitching_bin_width", 1.0)
+        self._stitching_depth = system_obj.settings["ThermalCamera"].get("stitching_depth", 5)
+        # Per-module temperatures from the stitched panoramas, outside TOPIC to avoid reading them back
+        self.MODULE_TEMPERATURES_TOPIC = system_obj.settings["ThermalCamera"].get(
+            "module_temperatures_topic", "/integration/thermalcamera/modules"
+        )
+        self.HOTSPOTS_TOPIC = system_obj.settings["ThermalCamera"].get(
+            "hotspots_topic", "/integration/thermalcamera/hotspots"
+        )
         self._images = {f"camera{i}": np.zeros((24, 32)) for i in range(4)}
+        # Offline systems (replay) do not write to the live archive
+        self._archive = self.open_archive(system_obj.settings["ThermalCamera"].get("archive_directory")) if archive else None
+        self._frame_listeners = []
         self._figure_data = None
         self._circular_data = None
 
-        # Create MQTT client
-        self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1)
-        self._client.on_connect = self.on_connect
-        self._client.on_message = self.on_message
-        self._client.on_disconnect = self.on_disconnect
-
-        # Set connection parameters
-        self._client.keepalive = 60
-        self._client.connect_timeout = 5
-
-        try:
-            self._client.connect(self._system.BROKER, self._system.PORT, keepalive=60)
-            logger.info(f"Connected to MQTT broker at {self._system.BROKER}:{self._system.PORT}")
-        except Exception as e:
-            logger.error(f"Failed to connect to MQTT broker: {e}")
-            raise
-
-    def on_connect(self, client, userdata, flags, rc):
-        """Handle MQTT connection"""
-        if rc == 0:
-            self._client.subscribe(self.TOPIC)
-            logger.info(f"Subscribed to topic: {self.TOPIC}")
-        else:
-            logger.error(f"Failed to connect with result code {rc}")
-
-    def on_message(self, client, userdata, msg):
-        """Handle incoming MQTT messages"""
-        try:
-            if "state" in msg.topic:
-                self.handle_state_message(msg.payload)
-            elif ("camera" in msg.topic) and ("image" not in msg.topic):
-                self.handle_camera_message(msg.topic, msg.payload)
-            else:
-                logger.warning(f"Received message on unknown topic: {msg.topic}")
-        except Exception as e:
-            logger.error(f"Error handling message: {e}")
-
-    def on_disconnect(self, client, userdata, rc):
-        """Handle MQTT disconnection"""
-        if rc != 0:
-            logger.error(f"Unexpected disconnection: {rc}")
-        else:
-            logger.info("Disconnected from MQTT broker")
+        # Messages arrive through the connection shared by all clients of the system
+        self._connection = system_obj.mqtt
+        self._client = self._connection.client
+        self._connection.subscribe(f"{self.TOPIC_BASE}state", lambda topic, payload: self.handle_state_message(payload))
+        for camera_name in self._images:
+            self._connection.subscribe(f"{self.TOPIC_BASE}{camera_name}", self.handle_camera_message)
 
     def handle_state_message(self, payload):
         """Handle incoming state messages"""
@@ -82,41 +57,39 @@ class ThermalCameraMQTTClient:
         try:
             camera_name = topic.split("/")[2]
             data = json.loads(payload)
-
-            # Decode image data
-            image_data = base64.b64decode(data["image"])
             position = float(data["position"])
 
-            # Convert to float array
-            flo_arr = [struct.unpack("f", image_data[i : i + 4])[0] for i in range(0, len(image_data), 4)]
+            # Decode and orient the image as a view on the decoded buffer
+            processed_image = decode_frame(data["image"], encoding="base64", orient=True)
 
-            # Process image
-            processed_image = np.flip(np.rot90(np.array(flo_arr).reshape(24, 32)), axis=0)
-
-            # Store for stitching - accumulate images for each position
+            # Store for stitching in the camera's preallocated frame store
             if camera_name not in self._stitching_data:
-                self._stitching_data[camera_name] = {}
-            if position not in self._stitching_data[camera_name]:
-                self._stitching_data[camera_name][position] = []
-
-            # Add the new image to the list for this position
-            self._stitching_data[camera_name][position].append(processed_image)
-
-            # Keep only the last 5 images for each position to prevent memory issues
-            if len(self._stitching_data[camera_name][position]) > 5:
-                self._stitching_data[camera_name][position] = self._stitching_data[camera_name][position][-5:]
+                self._stitching_data[camera_name] = ThermalFrameStore(
+                    bin_width=self._stitching_bin_width, depth=self._stitching_depth
+                )
+            self._stitching_data[camera_name].add(
+                position,
+                processed_image,
+                min_temperature=float(data["min_temperature"]),
+                max_temperature=float(data["max_temperature"]),
+            )
+
+            # Keep every frame on disk for later analysis
+            if self._archive is not None:
+                self._archive.append(
+                    int(camera_name[-1]),
+                    position,
+                    processed_image,
+                    float(data["min_temperature"]),
+                    float(data["max_temperature"]),
+                )
 
             # Update current image
             self._images[camera_name] = processed_image
 
-            max_temperature = float(data["max_temperature"])
-            min_temperature = float(data["min_temperature"])
-            if camera_name not in self._stitching_max_temperature:
-                self._stitching_max_temperature[camera_name] = {}
-            if camera_name not in self._stitching_min_temperature:
-                self._stitching_min_temperature[camera_name] = {}
-            self._stitching_max_temperature[camera_name][position] = max_temperature
-            self._stitching_min_temperature[camera_name][position] = min_temperature
+            # Notify listeners, e.g. the stitching worker, that a frame is available
+            for listener in self._frame_listeners:
+                listener(camera_name, position)
 
             # Try to stitch images
             # self.__stitch_images()
@@ -126,6 +99,51 @@ class ThermalCameraMQTTClient:
         except Exception as e:
             logger.error(f"Error handling camera message: {e}")
 
+    def open_archive(self, directory):
+        """Open the on-disk frame archive, relative paths are relative to the repository"""
+        if not directory:
+            logger.info("No thermal frame archive configured")
+            return None
+        try:
+            if not os.path.isabs(directory):
+                directory = os.path.join(os.path.dirname(__file__), os.pardir, directory)
+            return ThermalFrameArchive(directory)
+        except Exception as e:
+            logger.error(f"Error opening thermal frame archive: {e}")
+            return None
+
+    def add_frame_listener(self, listener):
+        """Register a callable(camera_name, position) called on the MQTT thread for every frame"""
+        if listener not in self._frame_listeners:
+            self._frame_listeners.append(listener)
+
+    def remove_frame_listener(self, listener):
+        """Unregister a frame listener"""
+        if listener in self._frame_listeners:
+            self._frame_listeners.remove(listener)
+
+    def clear_stitching_data(self):
+        """Forget all frames collected for stitching"""
+        for store in self._stitching_data.values():
+            store.clear()
+
+    def publish_module_temperatures(self, module_stats):
+        """Publish {module_name: {"min", "max", "mean"}} computed from the stitched panoramas"""
+        try:
+            payload = json.dumps(module_stats)
+            self._client.publish(self.MODULE_TEMPERATURES_TOPIC, payload)
+            logger.debug(f"Published temperatures of {len(module_stats)} modules")
+        except Exception as e:
+            logger.error(f"Error publishing module temperatures: {e}")
+
+    def publish_hotspot_events(self, events):
+        """Publish the hotspot events of the hotspot worker"""
+        try:
+            self._client.publish(self.HOTSPOTS_TOPIC, json.dumps(events))
+            logger.debug(f"Published {len(events)} hotspot events")
+        except Exception as e:
+            logger.error(f"Error publishing hotspot events: {e}")
+
     # def __stitch_images(self):
     #     """Attempt to stitch images together"""
     #     try:
@@ -206,17 +224,19 @@ class ThermalCameraMQTTClient:
 
     ### MQTT Client Loop ###
     def loop_start(self):
-        """Start the MQTT client loop"""
+        """Start the shared MQTT client loop"""
         try:
-            self._client.loop_start()
+            self._connection.loop_start()
             logger.info("Started MQTT client loop for Thermal Camera")
         except Exception as e:
             logger.error(f"Error starting MQTT loop: {e}")
 
     def loop_stop(self):
-        """Stop the MQTT client loop"""
+        """Stop the shared MQTT client loop"""
         try:
-            self._client.loop_stop()
+            self._connection.loop_stop()
             logger.info("Stopped MQTT client loop")
         except Exception as e:
             logger.error(f"Error stopping MQTT loop: {e}")
+        if self._archive is not None:
+            self._archive.close()
@@ -0,0 +1,53 @@
+import base64
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# MLX90640 sensor geometry as sent by the thermal camera publishers
+FRAME_ROWS = 24
+FRAME_COLS = 32
+FRAME_PIXELS = FRAME_ROWS * FRAME_COLS
+FRAME_BYTES = FRAME_PIXELS * 4
+
+# Same layout as struct.unpack("f", ...) used by the publishers (native float32)
+FRAME_DTYPE = np.dtype(np.float32)
+
+
+def decode_frame(payload, encoding="raw", orient=False):
+    """Decode a thermal camera frame into a float32 array without copying.
+
+    Args:
+        payload: raw float32 bytes, or a base64 string/bytes when encoding="base64"
+        encoding (str): "raw" or "base64"
+        orient (bool): if True return the frame in the stitching orientation
+            (32 rows x 24 columns), i.e. np.flip(np.rot90(frame), axis=0)
+
+    Returns:
+        np.ndarray: read-only float32 view of the payload buffer
+
+    Raises:
+        ValueError: if the encoding is unknown or the payload has the wrong size
+    """
+    if encoding == "base64":
+        buffer = base64.b64decode(payload)
+    elif encoding == "raw":
+        buffer = payload
+    else:
+        raise ValueError(f"Unknown thermal frame encoding: {encoding}")
+
+    if len(buffer) != FRAME_BYTES:
+        raise ValueError(f"Invalid thermal frame size: {len(buffer)} bytes, expected {FRAME_BYTES}")
+
+    frame = np.frombuffer(buffer, dtype=FRAME_DTYPE).reshape(FRAME_ROWS, FRAME_COLS)
+
+    if orient:
+        # flip(rot90(frame), axis=0) is exactly the transpose, which numpy returns as a view
+        return frame.T
+    return frame
+
+
+def frame_stats(frame):
+    """Return (min, max, mean) of a frame as Python floats"""
+    return float(frame.min()), float(frame.max()), float(frame.mean())
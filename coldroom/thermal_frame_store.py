@@ -0,0 +1,116 @@
+import threading
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ThermalFrameStore:
+    """Fixed-size frame store for one thermal camera.
+
+    Positions are quantized into angular bins over 360 degrees. Each bin keeps
+    the last `depth` frames in a preallocated ring, plus the timestamp and the
+    min/max temperature reported with the newest frame. Memory is allocated once
+    and never grows, whatever the motor jitter.
+    """
+
+    def __init__(self, bin_width=1.0, depth=5, frame_shape=(32, 24)):
+        if bin_width <= 0 or depth < 1:
+            raise ValueError("bin_width must be positive and depth at least 1")
+        self.bin_width = float(bin_width)
+        self.depth = int(depth)
+        self.frame_shape = tuple(frame_shape)
+        self.n_bins = int(round(360.0 / self.bin_width))
+
+        # Angular position (bin centre) of every bin
+        self.bin_positions = np.arange(self.n_bins, dtype=np.float64) * self.bin_width
+
+        self.frames = np.zeros((self.n_bins, self.depth) + self.frame_shape, dtype=np.float32)
+        self.timestamps = np.zeros((self.n_bins, self.depth), dtype=np.float64)
+        self.min_temperature = np.full(self.n_bins, np.nan, dtype=np.float32)
+        self.max_temperature = np.full(self.n_bins, np.nan, dtype=np.float32)
+        self.counts = np.zeros(self.n_bins, dtype=np.int32)
+        self.heads = np.zeros(self.n_bins, dtype=np.int32)
+
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Number of bins holding at least one frame"""
+        return int(np.count_nonzero(self.counts))
+
+    @property
+    def nbytes(self):
+        """Memory held by the store arrays"""
+        return (
+            self.frames.nbytes
+            + self.timestamps.nbytes
+            + self.min_temperature.nbytes
+            + self.max_temperature.nbytes
+            + self.counts.nbytes
+            + self.heads.nbytes
+        )
+
+    def bin_index(self, position):
+        """Return the bin index of an angular position in degrees"""
+        return int(round((float(position) % 360.0) / self.bin_width)) % self.n_bins
+
+    def add(self, position, frame, min_temperature=None, max_temperature=None, timestamp=None):
+        """Store a frame at the given position in O(1) and return its bin index"""
+        index = self.bin_index(position)
+        if timestamp is None:
+            timestamp = time.time()
+        if min_temperature is None:
+            min_temperature = frame.min()
+        if max_temperature is None:
+            max_temperature = frame.max()
+
+        with self._lock:
+            slot = self.heads[index]
+            self.frames[index, slot] = frame
+            self.timestamps[index, slot] = timestamp
+            self.min_temperature[index] = min_temperature
+            self.max_temperature[index] = max_temperature
+            self.heads[index] = (slot + 1) % self.depth
+            if self.counts[index] < self.depth:
+                self.counts[index] += 1
+        return index
+
+    def filled_bins(self):
+        """Return the indices of all bins holding at least one frame, in angular order"""
+        return np.flatnonzero(self.counts)
+
+    def latest_slots(self, bins):
+        """Return the ring slot of the newest frame of each bin"""
+        return (self.heads[bins] - 1) % self.depth
+
+    def latest_frames(self, bins=None):
+        """Return (bins, frames) with the newest frame of each filled bin as one array"""
+        with self._lock:
+            if bins is None:
+                bins = self.filled_bins()
+            frames = self.frames[bins, self.latest_slots(bins)]
+        return bins, frames
+
+    def latest_timestamps(self, bins=None):
+        """Return the timestamp of the newest frame of each bin"""
+        if bins is None:
+            bins = self.filled_bins()
+        return self.timestamps[bins, self.latest_slots(bins)]
+
+    def temperature_range(self, bins=None):
+        """Return (bins, min, max) of the reported temperatures of the filled bins"""
+        with self._lock:
+            if bins is None:
+                bins = self.filled_bins()
+            return bins, self.min_temperature[bins].copy(), self.max_temperature[bins].copy()
+
+    def clear(self):
+        """Forget all stored frames, keeping the allocated memory"""
+        with self._lock:
+            self.timestamps[:] = 0
+            self.min_temperature[:] = np.nan
+            self.max_temperature[:] = np.nan
+            self.counts[:] = 0
+            self.heads[:] = 0
@@ -0,0 +1,88 @@
+import numpy as np
+
+from .decimation import minmax_envelope, minmax_indices
+
+
+class TimeSeriesBuffer:
+    """Fixed-capacity circular history of timestamped samples.
+
+    Every sample is written twice, at i and i + capacity of arrays twice the
+    capacity, so the last `capacity` samples are always a contiguous slice:
+    append() is O(1) and times()/values() return views without copying.
+    Views alias the storage, copy them (or use envelope()) before handing
+    them to another thread or to matplotlib while appends go on.
+    """
+
+    def __init__(self, capacity, columns):
+        self.capacity = int(capacity)
+        self.columns = tuple(columns)
+        self._index = {name: i for i, name in enumerate(self.columns)}
+        self._time = np.zeros(2 * self.capacity, dtype="datetime64[ms]")
+        self._values = np.full((len(self.columns), 2 * self.capacity), np.nan)
+        self._start = 0
+        self._size = 0
+        self._total = 0  # samples appended so far, the absolute index of the next one
+        self._envelopes = {}  # column -> (bucket size, cached absolute indices, end of the reduced samples)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, *values):
+        """Add a sample with one value per column, dropping the oldest one when full"""
+        position = (self._start + self._size) % self.capacity
+        timestamp = np.datetime64(timestamp, "ms")
+        self._time[position] = self._time[position + self.capacity] = timestamp
+        self._values[:, position] = self._values[:, position + self.capacity] = values
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+        self._total += 1
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+        self._envelopes = {}
+
+    def times(self):
+        return self._time[self._start : self._start + self._size]
+
+    def values(self, column):
+        return self._values[self._index[column], self._start : self._start + self._size]
+
+    def last(self, column):
+        return self.values(column)[-1] if self._size else None
+
+    def envelope(self, column, max_points):
+        """(times, values) copies of a column reduced to about max_points, keeping spikes.
+
+        Samples are grouped in buckets of a power of two samples counted from
+        the first append, and the min and max indices of the whole buckets
+        are cached per column. A call only reduces the buckets completed
+        since the previous one and the partial buckets at both ends, the
+        cache is rebuilt when the length or max_points change the bucket size.
+        """
+        times, values = self.times(), self.values(column)
+        if self._size <= max_points or max_points < 4:
+            return minmax_envelope(times, values, max_points)
+        bucket = 1 << int(np.ceil(np.log2(self._size / (max_points // 2))))
+        oldest = self._total - self._size
+        first = -(-oldest // bucket) * bucket  # start of the first whole bucket
+        end = max(self._total // bucket * bucket, first)  # end of the last whole bucket
+
+        cached_bucket, indices, reduced = self._envelopes.get(column, (None, None, None))
+        if cached_bucket != bucket:
+            indices, reduced = np.empty(0, dtype=np.intp), first
+        # Buckets partly overwritten by the ring are reduced again as the head
+        indices = indices[indices >= first]
+        reduced = max(reduced, first)
+        if end > reduced:
+            new = minmax_indices(values[reduced - oldest : end - oldest], 2 * (end - reduced) // bucket)
+            indices = np.concatenate([indices, new + reduced])
+            reduced = end
+        self._envelopes[column] = (bucket, indices, reduced)
+
+        head = minmax_indices(values[: first - oldest], 2)
+        tail = minmax_indices(values[end - oldest :], 2) + (end - oldest)
+        selected = np.concatenate([head, indices - oldest, tail])
+        return times[selected], values[selected]
@@ -0,0 +1,102 @@
+import itertools
+import json
+import threading
+import time
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Stages of the path from a thermal frame to the CAEN switching off, in order
+SHUTDOWN_STAGES = ("receive", "decode", "decision", "enqueue", "send", "ack")
+
+# Histogram bin edges in ms, logarithmic from 10 us to 100 s
+LATENCY_BINS_MS = np.logspace(-2, 5, 57)
+
+
+class Trace:
+    """perf_counter timestamps of the stages one message went through"""
+
+    _ids = itertools.count()
+
+    def __init__(self, received=None, **tags):
+        self.id = next(self._ids)
+        self.tags = tags
+        self.spans = {"receive": time.perf_counter() if received is None else received}
+
+    def mark(self, stage, timestamp=None):
+        """Record a stage, only its first occurrence counts"""
+        self.spans.setdefault(stage, time.perf_counter() if timestamp is None else timestamp)
+
+    def elapsed(self, stage):
+        """Seconds from the receipt to a stage, None if not reached"""
+        if stage not in self.spans:
+            return None
+        return self.spans[stage] - self.spans["receive"]
+
+
+class LatencyTracer:
+    """Histograms of the time from receipt to every stage of finished traces.
+
+    Traces are started on receipt, marked at each stage by whichever thread
+    reaches it and finished when no more stages are expected. Histograms
+    use fixed logarithmic bins so they can be accumulated forever and
+    published as is; the last max_samples latencies per stage are kept for
+    exact percentiles.
+    """
+
+    def __init__(self, stages=SHUTDOWN_STAGES, budget=0.5, max_samples=2000):
+        self.stages = tuple(stages)
+        self.budget = budget
+        self.max_samples = max_samples
+        self.counts = {stage: np.zeros(len(LATENCY_BINS_MS) + 1, dtype=np.int64) for stage in self.stages}
+        self._samples = {stage: [] for stage in self.stages}
+        self.over_budget = 0
+        self._lock = threading.Lock()
+
+    def start(self, received=None, **tags):
+        return Trace(received, **tags)
+
+    def finish(self, trace):
+        """Accumulate the stages reached by a trace"""
+        with self._lock:
+            for stage in self.stages[1:]:
+                elapsed = trace.elapsed(stage)
+                if elapsed is None:
+                    continue
+                elapsed_ms = elapsed * 1e3
+                self.counts[stage][np.searchsorted(LATENCY_BINS_MS, elapsed_ms)] += 1
+                samples = self._samples[stage]
+                samples.append(elapsed_ms)
+                if len(samples) > self.max_samples:
+                    del samples[: len(samples) - self.max_samples]
+            last = max(trace.spans.values()) - trace.spans["receive"]
+            if last > self.budget:
+                self.over_budget += 1
+                logger.warning(f"Trace {trace.id} {trace.tags} took {last * 1e3:.1f} ms, budget {self.budget * 1e3:.0f} ms")
+
+    def summary(self):
+        """{stage: {"count", "p50", "p99", "max", "counts"}} with latencies in ms from receipt"""
+        with self._lock:
+            summary = {}
+            for stage in self.stages[1:]:
+                samples = np.asarray(self._samples[stage])
+                stats = {"count": int(self.counts[stage].sum()), "counts": self.counts[stage].tolist()}
+                if samples.size:
+                    p50, p99 = np.percentile(samples, [50, 99])
+                    stats.update(p50=float(p50), p99=float(p99), max=float(samples.max()))
+                else:
+                    stats.update(p50=None, p99=None, max=None)
+                summary[stage] = stats
+            return summary
+
+    def to_json(self):
+        return json.dumps(
+            {
+                "budget_ms": self.budget * 1e3,
+                "over_budget": self.over_budget,
+                "bins_ms": LATENCY_BINS_MS.tolist(),
+                "stages": self.summary(),
+            }
+        )
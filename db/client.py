@@ -0,0 +1,113 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_DB_URL = "http://cmslabserver:5000"
+# (connect, read) timeouts in s
+DB_TIMEOUT = (3.05, 30)
+# Retries of failed connections and, for idempotent methods, of 502/503/504 answers
+DB_RETRIES = 3
+DB_BACKOFF = 0.3
+# Keep-alive connections per database host
+DB_POOL_SIZE = 16
+
+
+class DBClient:
+    """Keep-alive HTTP session to the integration database.
+
+    Connections are pooled and reused across calls and threads. Requests get
+    a default timeout, failed connections are retried with exponential
+    backoff, and the latency and error count of every endpoint are kept for
+    stats(). Endpoints are relative to base_url, absolute URLs are used as
+    given.
+    """
+
+    def __init__(self, base_url=DEFAULT_DB_URL, timeout=DB_TIMEOUT, retries=DB_RETRIES, backoff=DB_BACKOFF, pool_size=DB_POOL_SIZE):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def url(self, endpoint=""):
+        if endpoint.startswith(("http://", "https://")):
+            return endpoint
+        return f"{self.base_url}/{endpoint.lstrip('/')}" if endpoint else self.base_url
+
+    def request(self, method, endpoint, **kwargs):
+        """Send a request, raises requests.RequestException like requests.request"""
+        url = self.url(endpoint)
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.request(method.upper(), url, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            self._record(method, url, time.perf_counter() - started, failed)
+
+    def get(self, endpoint, **kwargs):
+        return self.request("GET", endpoint, **kwargs)
+
+    def post(self, endpoint, **kwargs):
+        return self.request("POST", endpoint, **kwargs)
+
+    def put(self, endpoint, **kwargs):
+        return self.request("PUT", endpoint, **kwargs)
+
+    def _record(self, method, url, elapsed, failed):
+        # modules/PS_40_05_IBA-00001 and modules/PS_16_10_IPG-00005 are the same endpoint
+        path = urlsplit(url).path.strip("/").split("/")[0]
+        key = f"{method.upper()} /{path}"
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {"count": 0, "errors": 0, "total": 0.0, "max": 0.0}
+            stats["count"] += 1
+            stats["errors"] += int(failed)
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+
+    def stats(self):
+        """{"METHOD /endpoint": {count, errors, mean_ms, max_ms}}"""
+        with self._lock:
+            return {
+                key: {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "mean_ms": 1000 * stats["total"] / stats["count"],
+                    "max_ms": 1000 * stats["max"],
+                }
+                for key, stats in self._stats.items()
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url=None):
+    """Shared DBClient of a database, one connection pool per base URL"""
+    base_url = (base_url or DEFAULT_DB_URL).rstrip("/")
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = DBClient(base_url)
+        return client
@@ -3,11 +3,11 @@ from PyQt5.QtWidgets import (
     QMessageBox, QPushButton, QInputDialog, QHBoxLayout, QTreeWidget
 )
 from PyQt5.QtCore import Qt, pyqtSignal
-import requests
 import yaml
 import os
 import re
 from db.module_db_gui import Ui_ModuleDBWidget
+from db.client import get_client
 
 class ModuleDB(QWidget):
     """Widget for managing module inventory and details"""
@@ -163,13 +163,13 @@ class ModuleDB(QWidget):
     def make_api_request(self, endpoint, method='GET', data=None):
         """Make API request with error handling"""
         try:
-            url = self.get_api_url(endpoint)
+            client = get_client(self.db_url)
             if method == 'GET':
-                response = requests.get(url)
+                response = client.get(endpoint)
             elif method == 'POST':
-                response = requests.post(url, json=data)
+                response = client.post(endpoint, json=data)
             elif method == 'PUT':
-                response = requests.put(url, json=data)
+                response = client.put(endpoint, json=data)
             else:
                 return False, f"Unsupported method: {method}"
             
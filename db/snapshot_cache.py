@@ -0,0 +1,121 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from db.client import get_client
+
+# Seconds a cable snapshot is reused before it is requested again
+SNAPSHOT_TTL = 5.0
+# Seconds to wait for the database before giving up on a snapshot
+SNAPSHOT_TIMEOUT = 10.0
+
+
+class SnapshotCache:
+    """Cable snapshots of the connection database, keyed by (cable, side).
+
+    Snapshots are kept for `ttl` seconds. Concurrent requests for the same
+    key share one POST /snapshot, and invalidate() drops everything after
+    the connections change. Failed requests are cached as None for the same
+    time so a slow or unreachable server is not asked again on every
+    refresh. `db_url` is the base URL or a callable returning it, requests
+    go through its shared DBClient unless another `post` is given.
+    """
+
+    def __init__(self, db_url, ttl=SNAPSHOT_TTL, timeout=SNAPSHOT_TIMEOUT, post=None, max_workers=4):
+        self.db_url = db_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.post = post
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._in_flight = {}
+        self._generation = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="snapshot")
+
+    def _fetch(self, cable, side):
+        db_url = self.db_url() if callable(self.db_url) else self.db_url
+        url = f"{db_url.rstrip('/')}/snapshot"
+        post = self.post or get_client(db_url).post
+        try:
+            response = post(url, json={"cable": cable, "side": side}, timeout=self.timeout)
+            if response.status_code == 200:
+                return response.json()
+            print(f"Error: Received status code {response.status_code} for snapshot of {cable} {side}")
+        except requests.RequestException as e:
+            print(f"Error making request to {url}: {str(e)}")
+        return None
+
+    def fresh(self, keys):
+        """True if every (cable, side) in keys is cached and not expired"""
+        now = time.monotonic()
+        with self._lock:
+            return all(key in self._entries and self._entries[key][0] > now for key in keys)
+
+    def get(self, cable, side):
+        """Snapshot of a cable side, None if the database did not return one"""
+        key = (cable, side)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            pending = self._in_flight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._in_flight[key] = [threading.Event(), None]
+                generation = self._generation
+
+        if not leader:
+            pending[0].wait()
+            return pending[1]
+
+        snapshot = None
+        try:
+            snapshot = self._fetch(cable, side)
+        finally:
+            with self._lock:
+                # A snapshot requested before an invalidation may already be outdated
+                if generation == self._generation:
+                    self._entries[key] = (time.monotonic() + self.ttl, snapshot)
+                if self._in_flight.get(key) is pending:
+                    del self._in_flight[key]
+            pending[1] = snapshot
+            pending[0].set()
+        return snapshot
+
+    def prefetch(self, keys, callback=None):
+        """Fetch the (cable, side) keys in the background, then call callback from a worker thread"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            if callback:
+                callback()
+            return
+        remaining = [len(keys)]
+        lock = threading.Lock()
+
+        def done(_future):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and callback:
+                callback()
+
+        for cable, side in keys:
+            self._executor.submit(self.get, cable, side).add_done_callback(done)
+
+    def invalidate(self, cable=None):
+        """Forget the snapshots of a cable, or all of them"""
+        with self._lock:
+            self._generation += 1
+            if cable is None:
+                self._entries.clear()
+                self._in_flight.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == cable]:
+                    del self._entries[key]
+                for key in [key for key in self._in_flight if key[0] == cable]:
+                    del self._in_flight[key]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
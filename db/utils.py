@@ -1,10 +1,14 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 
+from db.client import DEFAULT_DB_URL, get_client
+
 
-def get_module_name_from_fc7(fc7, optical_group, db_url="http://cmslabserver:5000"):
+def get_module_name_from_fc7(fc7, optical_group, db_url=DEFAULT_DB_URL):
     """Get the module name from the FC7 and optical group."""
     url = f"{db_url}/snapshot"
-    response = requests.post(url, json={"cable": fc7, "port": optical_group, "side": "detSide"})
+    response = get_client(db_url).post(url, json={"cable": fc7, "port": optical_group, "side": "detSide"})
     if response.status_code == 200:
         snapshot = response.json()
         for line in snapshot:
@@ -17,11 +21,11 @@ def get_module_name_from_fc7(fc7, optical_group, db_url="http://cmslabserver:500
     return None
 
 
-def get_ring_from_cable(cable_id, db_url="http://cmslabserver:5000"):
+def get_ring_from_cable(cable_id, db_url=DEFAULT_DB_URL):
     """Navigate from cable to modules, then check the mounted_on attribute removing the ;position trailing part"""
     url = f"{db_url}/snapshot"
     modules=[]
-    response = requests.post(url, json={"cable": cable_id, "side": "detSide"})
+    response = get_client(db_url).post(url, json={"cable": cable_id, "side": "detSide"})
     
     if response.status_code == 200:
         snapshot = response.json()
@@ -46,11 +50,11 @@ def get_ring_from_cable(cable_id, db_url="http://cmslabserver:5000"):
             rings.append(mounted_on)
     return rings[0] if len(rings) else None
 
-def get_modules_on_ring(ring_id, db_url="http://cmslabserver:5000"):
+def get_modules_on_ring(ring_id, db_url=DEFAULT_DB_URL):
     """Get the modules on a specific ring from the database snapshot."""
     url = f"{db_url}/generic_module_query"
     try:
-        response = requests.post(url, json={"mounted_on": {"$regex": ring_id + ".*"}})
+        response = get_client(db_url).post(url, json={"mounted_on": {"$regex": ring_id + ".*"}})
         if response.status_code == 200:
             snapshot = response.json()
             modules = {}
@@ -67,12 +71,12 @@ def get_modules_on_ring(ring_id, db_url="http://cmslabserver:5000"):
 
 
 
-def get_module_from_lpGBT_hwId(serial_number, db_url ="http://cmslabserver:5000"):
+def get_module_from_lpGBT_hwId(serial_number, db_url=DEFAULT_DB_URL):
     """Get the module from the lpGBT serial number using generic_query"""
     url = f"{db_url}/generic_module_query"
 
     try:
-        response = requests.post(url, json= {"children.lpGBT.CHILD_SERIAL_NUMBER": str(serial_number)})
+        response = get_client(db_url).post(url, json= {"children.lpGBT.CHILD_SERIAL_NUMBER": str(serial_number)})
         if response.status_code == 200:
             snapshot = response.json()            
             for module in snapshot:
@@ -89,11 +93,11 @@ def get_module_from_lpGBT_hwId(serial_number, db_url ="http://cmslabserver:5000"
    
 
 
-def get_module(module_id, db_url="http://cmslabserver:5000"):
+def get_module(module_id, db_url=DEFAULT_DB_URL):
     """Get a specific module from the database snapshot."""
     url = f"{db_url}/modules/{module_id}"
     try:
-        response = requests.get(url)
+        response = get_client(db_url).get(url)
         if response.status_code == 200:
             return response.json()
         else:
@@ -104,7 +108,7 @@ def get_module(module_id, db_url="http://cmslabserver:5000"):
         print(f"Error making request to {url}: {str(e)}")
         return None
 
-def get_module_lpgbtVersion(module, db_url="http://cmslabserver:5000"):
+def get_module_lpgbtVersion(module, db_url=DEFAULT_DB_URL):
     # the version is under childer, PS Read-out Hybrid, details, ALPGBT_VERSION
     if isinstance(module, str):
         module = get_module(module, db_url)
@@ -119,7 +123,7 @@ def get_module_lpgbtVersion(module, db_url="http://cmslabserver:5000"):
                     lpgbtVersion = module.get("children").get("PS Read-out Hybrid").get("details").get("ALPGBT_VERSION")
     return lpgbtVersion
 
-def get_module_speed(module, db_url="http://cmslabserver:5000"):
+def get_module_speed(module, db_url=DEFAULT_DB_URL):
     # check if the name or the object is given
     if isinstance(module, str):
         module = get_module(module, db_url)
@@ -152,11 +156,11 @@ def get_module_speed(module, db_url="http://cmslabserver:5000"):
     return module_speed
 
 
-def get_module_endpoints(module_id, db_url="http://cmslabserver:5000"):
+def get_module_endpoints(module_id, db_url=DEFAULT_DB_URL):
     """Get the module endpoints from the database snapshot."""
     url = f"{db_url}/snapshot"
     try:
-        response = requests.post(url, json={"cable": module_id, "side": "crateSide"})
+        response = get_client(db_url).post(url, json={"cable": module_id, "side": "crateSide"})
         if response.status_code == 200:
             snapshot = response.json()
             ret = {"LV": None, "HV": None, "FC7": None}
@@ -179,7 +183,7 @@ def get_module_endpoints(module_id, db_url="http://cmslabserver:5000"):
         return None
 
 
-def get_module_fuse_id(module, db_url="http://cmslabserver:5000"):
+def get_module_fuse_id(module, db_url=DEFAULT_DB_URL):
     """Get the fuse ID for a specific module."""
     if isinstance(module, str):
         module = get_module(module, db_url)
@@ -194,6 +198,31 @@ def get_module_fuse_id(module, db_url="http://cmslabserver:5000"):
     return fuseId
 
 
+def get_module_details(module):
+    """Speed, fuse ID and temperature offsets of a module document, derived without any request"""
+    return {
+        "speed": get_module_speed(module),
+        "fuseId": get_module_fuse_id(module),
+        "temperature_offsets": module.get("temperature_offsets", {}),
+    }
+
+
+def iter_module_endpoints(module_names, db_url=DEFAULT_DB_URL, max_workers=8):
+    """Yield (module_name, endpoints) as the concurrent snapshot requests of the modules complete.
+
+    endpoints is None when a module snapshot could not be read.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(get_module_endpoints, name, db_url): name for name in module_names}
+        for future in as_completed(futures):
+            try:
+                endpoints = future.result()
+            except Exception as e:
+                print(f"Error getting endpoints of {futures[future]}: {str(e)}")
+                endpoints = None
+            yield futures[future], endpoints
+
+
 if __name__ == "__main__":
     module_id = "PS_16_10_IPG-00005"
     endpoints = get_module_endpoints(module_id)
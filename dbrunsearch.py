@@ -4,11 +4,13 @@ import argparse
 import json
 from datetime import datetime
 
-def get_run_details(run_number, base_url="http://cmslabserver:5000"):
+from db.client import DEFAULT_DB_URL, get_client
+
+def get_run_details(run_number, base_url=DEFAULT_DB_URL):
     """Get details for a specific run number."""
     try:
         padded_run = str(run_number)
-        response = requests.get(f"{base_url}/test_run/run{padded_run}")
+        response = get_client(base_url).get(f"test_run/run{padded_run}")
         if response.status_code != 200:
             print(f"Error fetching run details: {response.status_code}")
             return None
@@ -19,10 +21,10 @@ def get_run_details(run_number, base_url="http://cmslabserver:5000"):
         print(f"Error connecting to database: {e}")
         return None
 
-def get_session_details(session_name, base_url="http://cmslabserver:5000"):
+def get_session_details(session_name, base_url=DEFAULT_DB_URL):
     """Get detailed information for a specific session."""
     try:
-        response = requests.get(f"{base_url}/sessions/{session_name}")
+        response = get_client(base_url).get(f"sessions/{session_name}")
         if response.status_code != 200:
             print(f"Error fetching session details: {response.status_code}")
             return None
@@ -79,14 +81,14 @@ def format_session_details(session):
     output.append("=" * 80)
     return "\n".join(output)
 
-def update_session_comment(session_name, new_comment, base_url="http://cmslabserver:5000"):
+def update_session_comment(session_name, new_comment, base_url=DEFAULT_DB_URL):
     """Update the description/comment for a specific session."""
     try:
         # Prepare the update data
         update_data = {"description": new_comment}
         
         # Send PUT request to update the session
-        response = requests.put(f"{base_url}/sessions/{session_name}", json=update_data)
+        response = get_client(base_url).put(f"sessions/{session_name}", json=update_data)
         
         if response.status_code != 200:
             print(f"Error updating session comment: {response.status_code}")
@@ -101,7 +103,7 @@ def update_session_comment(session_name, new_comment, base_url="http://cmslabser
 def main():
     parser = argparse.ArgumentParser(description='Search for run and session details by run number')
     parser.add_argument('run_number', type=str, help='Run number to search for')
-    parser.add_argument('--url', default='http://cmslabserver:5000', 
+    parser.add_argument('--url', default=DEFAULT_DB_URL, 
                         help='Base URL for the database API')
     parser.add_argument('--edit-comment', nargs='?', const=True, metavar='COMMENT',
                         help='Edit the session comment. If COMMENT is provided, updates directly. If no COMMENT, enters interactive mode')
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 import threading
+import time
 import ui.integration_gui as integration_gui
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, 
     QLineEdit, QLabel, QFormLayout, QTreeWidgetItem,
-    QTreeWidget, QMessageBox, QPushButton, QInputDialog, QHBoxLayout, QSpacerItem, QSizePolicy, QComboBox
+    QTreeWidget, QMessageBox, QPushButton, QInputDialog, QHBoxLayout, QSpacerItem, QSizePolicy, QComboBox,
+    QTableWidget, QTableWidgetItem
 )
 from PyQt5.QtGui import QPen
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject, QThread, QSize, QUrl
@@ -37,11 +39,64 @@ import re
 from datetime import datetime
 from db.module_db import ModuleDB
 from db.utils import get_module_fuse_id
+from db.snapshot_cache import SnapshotCache
+from db.client import get_client
+from coldroom.thermal_decoder import decode_frame, frame_stats
+from coldroom.tracing import LatencyTracer
+from coldroom.blitting import BlitManager
+from coldroom.timeseries import TimeSeriesBuffer
+from coldroom.decimation import axis_pixel_width
+from coldroom.ph2acf_schema import TemperatureOffsets, TemperatureSchema, module_offsets
+
+# Thermal shutdown latency histograms are published here every METRICS_INTERVAL ms
+METRICS_TOPIC = "/integration/metrics/latency"
+METRICS_INTERVAL = 10000
+# Default maximum redraw rate of the thermal and Ph2ACF plots
+PLOT_MAX_FPS = 5
+# Trend histories, in samples (more than a day of thermal frames at 2 Hz)
+TREND_HISTORY = 200000
+PH2ACF_COLUMNS = ("ssa_mean", "ssa_max", "mpa_mean", "mpa_max")
+# Fraction of the time span left free right of the trends after a rescale, new samples are blitted until they reach it
+TREND_HEADROOM = 0.1
+# Maximum time from a frame arrival to the CAEN acknowledging the channels off, in s
+SHUTDOWN_LATENCY_BUDGET = 5.0
+
 # Add this class near the top of the file
 class LogEmitter(QObject):
     """Helper class to emit log messages from any thread"""
     log_message = pyqtSignal(str)
 
+
+class SnapshotEmitter(QObject):
+    """Tells the GUI thread that the cable snapshots it asked for are cached"""
+    ready = pyqtSignal()
+
+
+class LatencyPanel(QWidget):
+    """Debug table of the thermal shutdown latency per stage"""
+
+    def __init__(self, tracer):
+        super().__init__()
+        self.tracer = tracer
+        layout = QVBoxLayout(self)
+        self.budgetLabel = QLabel()
+        layout.addWidget(self.budgetLabel)
+        self.table = QTableWidget(len(tracer.stages) - 1, 4)
+        self.table.setHorizontalHeaderLabels(["count", "p50 ms", "p99 ms", "max ms"])
+        self.table.setVerticalHeaderLabels(tracer.stages[1:])
+        layout.addWidget(self.table)
+
+    def refresh(self):
+        self.budgetLabel.setText(
+            f"Latency from frame arrival, budget {self.tracer.budget * 1e3:.0f} ms, "
+            f"{self.tracer.over_budget} traces over budget"
+        )
+        for row, stats in enumerate(self.tracer.summary().values()):
+            values = [stats["count"], stats["p50"], stats["p99"], stats["max"]]
+            for column, value in enumerate(values):
+                text = "-" if value is None else (f"{value}" if column == 0 else f"{value:.2f}")
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
 # Add new CommandWorker class
 class CommandWorker(QThread):
     finished = pyqtSignal(bool, str, str)  # success, stdout, stderr
@@ -79,6 +134,7 @@ class MainApp(integration_gui.Ui_MainWindow):
         self.formLayout_2.addRow(self.ph2acfTopicLabel, self.ph2acfTopicLE)
         
         # Load settings before setting up connections
+        self.plot_max_fps = PLOT_MAX_FPS
         self.load_settings()
         
         # Connect settings change
@@ -123,6 +179,11 @@ class MainApp(integration_gui.Ui_MainWindow):
         # Initialize log emitter
         self.log_emitter = LogEmitter()
         self.log_emitter.log_message.connect(self.append_log)
+
+        # Cable snapshots are fetched off the GUI thread and shared by the status labels and LEDs
+        self.snapshots = SnapshotCache(self.get_api_url)
+        self.snapshot_emitter = SnapshotEmitter()
+        self.snapshot_emitter.ready.connect(self.show_connection_status)
         
         # Fix text format setting
         self.placeholdersHelpLabel.setTextFormat(Qt.PlainText)
@@ -156,12 +217,10 @@ class MainApp(integration_gui.Ui_MainWindow):
         # Enable sorting
         # self.treeWidget.setSortingEnabled(True)
         
-        # Initialize lists for Ph2ACF temperatures
-        self.ph2acf_time = []
-        self.ssa_mean_values = []
-        self.ssa_max_values = []
-        self.mpa_mean_values = []
-        self.mpa_max_values = []
+        # Ph2ACF temperature history
+        self.ph2acf_history = TimeSeriesBuffer(TREND_HISTORY, PH2ACF_COLUMNS)
+        self.ph2acf_schema = TemperatureSchema()
+        self.ph2acf_offsets = TemperatureOffsets(self.ph2acf_schema, {})
         self.current_fuse_id = None
         
         # Setup module details tab
@@ -227,6 +286,15 @@ class MainApp(integration_gui.Ui_MainWindow):
         
         # Setup CAEN control
         self.caen = CAENControl(self)
+
+        # Trace the thermal shutdown path from the frame arrival to the CAEN acknowledgement
+        self.tracer = LatencyTracer(budget=SHUTDOWN_LATENCY_BUDGET)
+        self.caen.tracer = self.tracer
+        self.latency_panel = LatencyPanel(self.tracer)
+        self.tabWidget.addTab(self.latency_panel, "Latency")
+        self.metrics_timer = QTimer()
+        self.metrics_timer.timeout.connect(self.publish_latency_metrics)
+        self.metrics_timer.start(METRICS_INTERVAL)
         
         # Connect button signals
         self.checkIDPB.clicked.connect(self.run_check_id)
@@ -422,14 +490,11 @@ class MainApp(integration_gui.Ui_MainWindow):
         plt.colorbar(self.im, cax=self.cax1)
 
         # Second plot: Trend
-        self.time = []
-        self.min_values = []
-        self.max_values = []
-        self.avg_values = []
+        self.thermal_history = TimeSeriesBuffer(TREND_HISTORY, ("min", "max", "avg"))
 
-        self.line_min, = self.ax2.plot(self.time, self.min_values, label='Min')
-        self.line_max, = self.ax2.plot(self.time, self.max_values, label='Max')
-        self.line_avg, = self.ax2.plot(self.time, self.avg_values, label='Avg')
+        self.line_min, = self.ax2.plot([], [], label='Min')
+        self.line_max, = self.ax2.plot([], [], label='Max')
+        self.line_avg, = self.ax2.plot([], [], label='Avg')
         
         # SSA/MPA trend lines
         self.line_ssa_mean, = self.ax2.plot([], [], label='SSA Mean', linestyle='-', marker='s', markersize=3)
@@ -445,6 +510,69 @@ class MainApp(integration_gui.Ui_MainWindow):
         layout = QVBoxLayout(self.plotWidget)
         layout.addWidget(self.canvas)
 
+        # MQTT handlers only store samples, a GUI timer redraws at most plot_max_fps times per second:
+        # the image and the trend lines are blitted, a full draw_idle only happens when the trend axes rescale
+        self.plot_lock = threading.Lock()
+        self.latest_frame = None
+        self.trend_dirty = False
+        self.ph2acf_linestyle = '-'
+        self.drawn_linestyle = '-'
+        self.trend_lines = (
+            self.line_min, self.line_max, self.line_avg,
+            self.line_ssa_mean, self.line_ssa_max, self.line_mpa_mean, self.line_mpa_max,
+        )
+        self.plot_blitter = BlitManager(self.canvas, [self.im, *self.trend_lines])
+        self.plot_timer = QTimer()
+        self.plot_timer.timeout.connect(self.refresh_plots)
+        self.plot_timer.start(int(1000 / max(self.plot_max_fps, 0.1)))
+
+    def refresh_plots(self):
+        """Draw the samples received since the last refresh, on the GUI thread"""
+        try:
+            # Lines are reduced to a min/max envelope of two points per pixel of the axis
+            max_points = 2 * axis_pixel_width(self.ax2)
+            with self.plot_lock:
+                frame, self.latest_frame = self.latest_frame, None
+                trend_dirty, self.trend_dirty = self.trend_dirty, False
+                if trend_dirty:
+                    # set_data keeps references, hand over reduced copies the MQTT thread will not touch.
+                    # envelope() caches the reduced history, under the lock it only reduces the new samples
+                    thermal = [self.thermal_history.envelope(column, max_points) for column in ("min", "max", "avg")]
+                    ph2acf = [self.ph2acf_history.envelope(column, max_points) for column in PH2ACF_COLUMNS]
+                    ls = self.ph2acf_linestyle
+
+            if frame is not None:
+                # Update image plot
+                self.im.set_data(frame)
+                self.im.set_clim(18, 35)
+                # Update max temperature display
+                self.tMaxLabel.setText(f"Tmax: {self.max_temperature:.1f}")
+
+            if trend_dirty:
+                for line, (times, values) in zip(self.trend_lines, thermal + ph2acf):
+                    line.set_data(times, values)
+                for line in self.trend_lines[3:]:
+                    line.set_linestyle(ls)
+
+                self.ax2.relim()
+
+            # The legend shows the line style, it is part of the cached background
+            if trend_dirty and (ls != self.drawn_linestyle or not self.trends_in_view()):
+                self.drawn_linestyle = ls
+                self.ax2.autoscale_view()
+                x0, x1 = self.ax2.get_xlim()
+                self.ax2.set_xlim(x0, x1 + TREND_HEADROOM * (x1 - x0), auto=None)
+                self.canvas.draw_idle()
+            elif frame is not None or trend_dirty:
+                self.plot_blitter.update()
+        except Exception as e:
+            self.log_output(f"Plot Error: {str(e)}")
+
+    def trends_in_view(self):
+        """True if the trend data fits in the current limits of the trend axes"""
+        view, data = self.ax2.viewLim, self.ax2.dataLim
+        return view.x0 <= data.x0 and data.x1 <= view.x1 and view.y0 <= data.y0 and data.y1 <= view.y1
+
     def get_settings_file(self):
         """Get the settings file path"""
         config_file = os.path.join(os.path.expanduser("~/.config/integration_ui"), 'settings.yaml')
@@ -479,6 +607,7 @@ class MainApp(integration_gui.Ui_MainWindow):
                 self.airCommandLE.setText(settings.get('air_command', 'air.sh {airOn}'))
                 self.ph2acfTopicLE.setText(settings.get('ph2acf_topic', '/ph2acf/data'))
                 self.resultsUrlLE.setText(settings.get('results_url', 'file:Results/html/latest/index.html'))
+                self.plot_max_fps = float(settings.get('plot_max_fps', PLOT_MAX_FPS))
                 
         except FileNotFoundError:
             # Use defaults if no settings file exists
@@ -489,6 +618,10 @@ class MainApp(integration_gui.Ui_MainWindow):
         base_url = self.dbEndpointLE.text().rstrip('/')
         return f"{base_url}/{endpoint.lstrip('/')}" if endpoint else base_url
 
+    def db_client(self):
+        """Pooled client of the database in the settings"""
+        return get_client(self.get_api_url())
+
     def save_settings(self):
         """Save settings to YAML file"""
         settings = {
@@ -502,6 +635,7 @@ class MainApp(integration_gui.Ui_MainWindow):
             'air_command': self.airCommandLE.text(),
             'ph2acf_topic': self.ph2acfTopicLE.text(),
             'results_url': self.resultsUrlLE.text(),
+            'plot_max_fps': self.plot_max_fps,
         }
         
         try:
@@ -572,8 +706,18 @@ class MainApp(integration_gui.Ui_MainWindow):
         except Exception as e:
             self.log_output(f"MQTT Disconnect Error: {str(e)}")
 
+    def publish_latency_metrics(self):
+        """Publish the shutdown latency histograms and refresh the debug panel"""
+        try:
+            self.latency_panel.refresh()
+            if self.client:
+                self.client.publish(METRICS_TOPIC, self.tracer.to_json())
+        except Exception as e:
+            self.log_output(f"Latency metrics error: {str(e)}")
+
     def on_mqtt_message(self, client, userdata, msg):
         """Handle MQTT messages with error protection"""
+        received = time.perf_counter()
 #        print(msg.topic)
         if msg.topic == "shellies/ventola/status/switch:0" : 
             j=json.loads(msg.payload) 
@@ -595,155 +739,57 @@ class MainApp(integration_gui.Ui_MainWindow):
             # Only process if fuseId matches (and is not None)
             fuse_id_msg = data.get("LpGBT_OG0_fuseId")
             if self.current_fuse_id is not None and fuse_id_msg is not None and int(fuse_id_msg) == int(self.current_fuse_id):
-                # We have matching data, extract temperatures
-                ssa_temps = []
-                mpa_temps = []
-                missing_any_offset = False
-                
-                offsets = {}
-                if self.current_module_data:
-                    if "temperature_offset" in self.current_module_data:
-                        offsets = self.current_module_data["temperature_offset"]
-                    else:
-                        # Look for alternative keys starting with 'temperature_offset'
-                        variants = sorted([k for k in self.current_module_data.keys() if k.startswith("temperature_offset")])
-                        if variants:
-                            offsets = self.current_module_data[variants[0]]
-                
-                if not isinstance(offsets, dict):
-                    offsets = {}
-                print(offsets)
-                for key, value in data.items():
-                    if key.endswith("_temp"):
-                        # Extract hybrid and chip from key like SSA_H0_C0_temp
-                        print(key,value)
-                        parts = key.split('_')
-                        if len(parts) >= 3:
-                            ctype = parts[0] # SSA or MPA (though MPA often encoded as SSA in some Ph2_ACF versions)
-                            hybrid = parts[1] # H0 or H1
-                            chip = parts[2]   # C0, C1, ...
-                            
-                            # Clean up indices
-                            h_idx = hybrid[1:] if hybrid.startswith('H') else hybrid
-                            c_idx = chip[1:] if chip.startswith('C') else chip
-                            
-                            # Construct offset key like SSA_H0_0
-                            # Note: The mapping provided in prompt says SSA_H0_0, MPA_H0_8 etc.
-                            # We need to determine if it's SSA or MPA based on the chip index or key name.
-                            # User said "SSA/MPA mean and max". 
-                            # Let's use the provided mapping logic: keys like SSA_H0_0
-                            offset_key = f"{ctype}_{hybrid}_{c_idx}"
-                            
-                            temp = float(value)
-                            if offset_key in offsets:
-                                temp += float(offsets[offset_key])
-                            else:
-                                missing_any_offset = True
-                            
-                            if ctype == "SSA":
-                                ssa_temps.append(temp)
-                            elif ctype == "MPA":
-                                mpa_temps.append(temp)
-                            else:
-                                # Fallback/Mixed
-                                ssa_temps.append(temp)
-                
+                # Slots and offsets are resolved once, a message is one lookup pass and a vector add
+                readings = self.ph2acf_schema.read(data)
+                temps, missing_any_offset = self.ph2acf_offsets.apply(readings)
+                stats = self.ph2acf_schema.stats(temps)
+                ssa_mean, ssa_max = stats["SSA"]
+                mpa_mean, mpa_max = stats["MPA"]
+
                 now = datetime.now()
-                # Update trend
-                self.ph2acf_time.append(now)
-                
-                # Keep maximum 600 values for Ph2ACF data
-                if len(self.ph2acf_time) > 600:
-                    self.ph2acf_time.pop(0)
-                    self.ssa_mean_values.pop(0)
-                    self.ssa_max_values.pop(0)
-                    self.mpa_mean_values.pop(0)
-                    self.mpa_max_values.pop(0)
-
-                # SSA Stats
-                if ssa_temps:
-                    self.ssa_mean_values.append(np.mean(ssa_temps))
-                    self.ssa_max_values.append(np.max(ssa_temps))
-                else:
-                    self.ssa_mean_values.append(np.nan)
-                    self.ssa_max_values.append(np.nan)
-                    
-                # MPA Stats
-                if mpa_temps:
-                    self.mpa_mean_values.append(np.mean(mpa_temps))
-                    self.mpa_max_values.append(np.max(mpa_temps))
-                else:
-                    self.mpa_mean_values.append(np.nan)
-                    self.mpa_max_values.append(np.nan)
-                
-                print(f"DEBUG: SSA Mean: {self.ssa_mean_values[-1] if ssa_temps else 'N/A'}")
-                
-                # Update plot lines
-                # Set line style based on offset presence
-                ls = '--' if missing_any_offset else '-'
-                
-                self.line_ssa_mean.set_data(self.ph2acf_time, self.ssa_mean_values)
-                self.line_ssa_mean.set_linestyle(ls)
-                self.line_ssa_max.set_data(self.ph2acf_time, self.ssa_max_values)
-                self.line_ssa_max.set_linestyle(ls)
-                
-                self.line_mpa_mean.set_data(self.ph2acf_time, self.mpa_mean_values)
-                self.line_mpa_mean.set_linestyle(ls)
-                self.line_mpa_max.set_data(self.ph2acf_time, self.mpa_max_values)
-                self.line_mpa_max.set_linestyle(ls)
-                
-                self.ax2.relim()
-                self.ax2.autoscale_view()
-                self.canvas.draw()
-                
+                # Only the samples are stored here, refresh_plots draws them on the GUI thread
+                with self.plot_lock:
+                    # Update trend with the SSA and MPA stats
+                    self.ph2acf_history.append(now, ssa_mean, ssa_max, mpa_mean, mpa_max)
+
+                    # Set line style based on offset presence
+                    self.ph2acf_linestyle = '--' if missing_any_offset else '-'
+                    self.trend_dirty = True
+
           except Exception as e:
             self.log_output(f"Ph2ACF Message Error: {str(e)}")
 
         elif msg.topic == self.mqttTopicLE.text():
           try:
-            flo_arr = [
-                struct.unpack("f", msg.payload[i : i + 4])[0]
-                for i in range(0, len(msg.payload), 4)
-            ]
-            
-            # Update image plot
-            self.im.set_data(np.array(flo_arr).reshape(24, 32))
-            self.im.set_clim(18, 35)
-            
-            # Update trend plot
-            now = datetime.now()
-            self.time.append(now)
-            
-            self.min_values.append(min(flo_arr))
-            self.max_values.append(max(flo_arr))
-            self.avg_values.append(np.mean(flo_arr))
-            data={ "min": min(flo_arr), "max": max(flo_arr), "avg":np.mean(flo_arr) }
+            trace = self.tracer.start(received, topic=msg.topic)
+            frame = decode_frame(msg.payload)
+            t_min, t_max, t_avg = frame_stats(frame)
+            trace.mark("decode")
+
+            # Decide on the shutdown before any plotting
+            self.max_temperature = t_max
+            safe_off = self.max_temperature > 45
+            shutdown = self.max_temperature > 50
+            trace.mark("decision")
+            if safe_off :
+                self.caen.safe_lv_off(trace)
+            if shutdown :
+                self.caen.off(self.caen.channels["HV"], trace)
+                self.caen.off(self.caen.channels["LV"], trace)
+            if not safe_off:
+                # Nothing to acknowledge
+                self.tracer.finish(trace)
+
+            data={ "min": t_min, "max": t_max, "avg": t_avg }
             ret=client.publish("/integration/thermalcamera",json.dumps(data))
-            
-    
-            # Update max temperature display
-            self.max_temperature = max(flo_arr)
-            self.tMaxLabel.setText(f"Tmax: {self.max_temperature:.1f}")
-            if self.max_temperature > 45 :
-                self.caenGUI.safe_lv_off()
-            if self.max_temperature > 50 :
-                self.caenGUI.off(self.caenGUI.channels["HV"])
-                self.caenGUI.off(self.caenGUI.channels["LV"])
-            # Keep maximum 600 values
-            if len(self.time) > 600:
-                self.time.pop(0)
-                self.min_values.pop(0)
-                self.max_values.pop(0)
-                self.avg_values.pop(0)
-
-            self.line_min.set_data(self.time, self.min_values)
-            self.line_max.set_data(self.time, self.max_values)
-            self.line_avg.set_data(self.time, self.avg_values)
-            self.ax2.relim()
-            self.ax2.autoscale_view()
-            
-            self.canvas.draw()
-            
+
+            # Only the samples are stored here, refresh_plots draws them on the GUI thread
+            now = datetime.now()
+            with self.plot_lock:
+                self.latest_frame = frame
+                self.thermal_history.append(now, t_min, t_max, t_avg)
+                self.trend_dirty = True
+
           except Exception as e:
             self.log_output(f"MQTT Message Error: {str(e)}")
         else:
@@ -1014,11 +1060,7 @@ class MainApp(integration_gui.Ui_MainWindow):
             if data:
                 self.log_output(f"With data: {data}")
             
-            response = requests.request(
-                method=method.lower(),
-                url=url,
-                json=data if data else None
-            )
+            response = self.db_client().request(method, endpoint, json=data if data else None)
                 
             if response.status_code != 200 and response.status_code != 201:
                 error_msg = f"API Error ({response.status_code}): {response.text}"
@@ -1265,6 +1307,8 @@ class MainApp(integration_gui.Ui_MainWindow):
                         )
         except Exception as e:
             self.log_output(f"Error disconnecting: {str(e)}")
+        finally:
+            self.snapshots.invalidate()
 
     def connect_power(self):
         self.log_output("=== Connecting Power ===")
@@ -1283,10 +1327,10 @@ class MainApp(integration_gui.Ui_MainWindow):
             method='POST',
             data=data
         )
+        self.snapshots.invalidate()
         
         # Update connection status and LEDs
         self.update_connection_status()
-        self.update_connection_leds()
 
     def connect_fiber(self):
         self.log_output("=== Connecting Fiber ===")
@@ -1306,10 +1350,10 @@ class MainApp(integration_gui.Ui_MainWindow):
             method='POST',
             data=data
         )
+        self.snapshots.invalidate()
         
         # Update connection status and LEDs
         self.update_connection_status()
-        self.update_connection_leds()
 
     def apply_settings(self):
         """Apply current settings"""
@@ -1352,6 +1396,7 @@ class MainApp(integration_gui.Ui_MainWindow):
                     method="POST",
                     data=data
                 )
+            self.snapshots.invalidate()
                 
             # Update the display
             self.update_module_list()
@@ -1366,13 +1411,8 @@ class MainApp(integration_gui.Ui_MainWindow):
 
         self.load_module_details()
         module_id=self.moduleLE.text()
-        query={"cable": module_id, "side": "crateSide"}
-        response = requests.post(
-                self.get_api_url('snapshot'),
-                json=query
-        )
-        if response.status_code == 200:
-            snapshot = response.json()
+        snapshot = self.snapshots.get(module_id, "crateSide") if module_id else None
+        if snapshot is not None:
             print("LOADED:",snapshot.get("1",None))
             print("LOADED:",snapshot.get("3",None))
             fiber=snapshot.get("1",None)
@@ -1398,7 +1438,27 @@ class MainApp(integration_gui.Ui_MainWindow):
        # print(str(fiber[0])+";"+str(fiber[1]//2),power[0]+";"+str(power[1]))
         self.update_connection_status()
 
+    def connection_snapshot_keys(self):
+        """(cable, side) of every snapshot the connection labels and LEDs need"""
+        keys = []
+        module_id = self.moduleLE.text()
+        if module_id:
+            keys.append((module_id, "crateSide"))
+        for cable in (self.powerCB.currentText(), self.fiberCB.currentText()):
+            cable = cable.split(";")[0]
+            if cable:
+                keys += [(cable, "detSide"), (cable, "crateSide")]
+        return keys
+
     def update_connection_status(self):
+        """Update the connection status, fetching the missing snapshots in the background first"""
+        keys = self.connection_snapshot_keys()
+        if self.snapshots.fresh(keys):
+            self.show_connection_status()
+        else:
+            self.snapshots.prefetch(keys, self.snapshot_emitter.ready.emit)
+
+    def show_connection_status(self):
         """Update the connection status labels showing both connection directions"""
         try:
             power_id = self.powerCB.currentText()
@@ -1488,14 +1548,9 @@ class MainApp(integration_gui.Ui_MainWindow):
         """Get both detSide and crateSide endpoints for a fiber connection"""
         try:
             # Get detSide path
-            data={"cable": fiber_id, "side": "detSide"}
-            det_response = requests.post(
-                f"{self.dbEndpointLE.text()}/snapshot",
-                json=data
-            )
-            if det_response.status_code != 200:
+            det_snapshot = self.snapshots.get(fiber_id, "detSide")
+            if det_snapshot is None:
                 return None, None 
-            det_snapshot = det_response.json()
             det_endpoint = None
 
             if fiber_id_slot != "" :
@@ -1511,15 +1566,8 @@ class MainApp(integration_gui.Ui_MainWindow):
             # Get crateSide path from the module
             #f det_endpoint:
             if True:
-                data={"cable": fiber_id, "side": "crateSide"}
-                
-
-                crate_response = requests.post(
-                    f"{self.dbEndpointLE.text()}/snapshot",
-                    json=data
-                )
-                if crate_response.status_code == 200:
-                    crate_snapshot = crate_response.json()
+                crate_snapshot = self.snapshots.get(fiber_id, "crateSide")
+                if crate_snapshot is not None:
                     print("Crate",crate_snapshot)
                     #     Crate {'1': {'crate_port': 'A', 'det_port': '1', 'connections': [{'cable': 'D3', 'line': 1, 'det_port': ['A'], 'crate_port': ['P12']}, {'cable': 'FC7OT5', 'line': 1, 'det_port': ['OG0'], 'crate_port': []}]}, '2': {'crate_port': 'A', 'det_port': '1', 'connections': [{'cable': 'D3', 'line': 2, 'det_port': ['A'], 'crate_port': ['P12']}, {'cable': 'FC7OT5', 'line': 2, 'det_port': ['OG0'], 'crate_port': []}]}, '3': {'crate_port': 'A', 'det_port': '2', 'connections': [{'cable': 'D3', 'line': 3, 'det_port': ['A'], 'crate_port': ['P34']}, {'cable': 'FC7OT5', 'line': 3, 'det_port': ['OG1'], 'crate_port': []}]}, '4': {'crate_port': 'A', 'det_port': '2', 'connections': [{'cable': 'D3', 'line': 4, 'det_port': ['A'], 'crate_port': ['P34']}, {'cable': 'FC7OT5', 'line': 4, 'det_port': ['OG1'], 'crate_port': []}]}, '5': {'crate_port': 'A', 'det_port': '3', 'connections': [{'cable': 'D3', 'line': 5, 'det_port': ['A'], 'crate_port': ['P56']}, {'cable': 'FC7OT5', 'line': 5, 'det_port': ['OG2'], 'crate_port': []}]}, '6': {'crate_port': 'A', 'det_port': '3', 'connections': [{'cable': 'D3', 'line': 6, 'det_port': ['A'], 'crate_port': ['P56']}, {'cable': 'FC7OT5', 'line': 6, 'det_port': ['OG2'], 'crate_port': []}]}, '7': {'crate_port': 'A', 'det_port': '4', 'connections': [{'cable': 'D3', 'line': 7, 'det_port': ['A'], 'crate_port': ['P78']}, {'cable': 'FC7OT5', 'line': 7, 'det_port': ['OG3'], 'crate_port': []}]}, '8': {'crate_port': 'A', 'det_port': '4', 'connections': [{'cable': 'D3', 'line': 8, 'det_port': ['A'], 'crate_port': ['P78']}, {'cable': 'FC7OT5', 'line': 8, 'det_port': ['OG3'], 'crate_port': []}]}, '9': {'crate_port': 'A', 'det_port': '5', 'connections': [{'cable': 'D3', 'line': 9, 'det_port': ['A'], 'crate_port': ['P910']}, {'cable': 'FC7OT5', 'line': 9, 'det_port': ['OG4'], 'crate_port': []}]}, '10': {'crate_port': 'A', 'det_port': '5', 'connections': [{'cable': 'D3', 'line': 10, 'det_port': ['A'], 'crate_port': ['P910']}, {'cable': 'FC7OT5', 'line': 10, 'det_port': ['OG4'], 'crate_port': []}]}, '11': {'crate_port': 'A', 'det_port': '6', 'connections': [{'cable': 'D3', 'line': 11, 'det_port': ['A'], 'crate_port': ['P1112']}, {'cable': 'FC7OT5', 'line': 11, 'det_port': ['OG5'], 'crate_port': []}]}, '12': {'crate_port': 'A', 'det_port': '6', 'connections': [{'cable': 'D3', 'line': 12, 'det_port': ['A'], 'crate_port': ['P1112']}, {'cable': 'FC7OT5', 'line': 12, 'det_port': ['OG5'], 'crate_port': []}]}}
 
@@ -1545,12 +1593,8 @@ class MainApp(integration_gui.Ui_MainWindow):
             self.log_output("No module ID provided")
             return ret
         try:
-            response = requests.post(
-                self.get_api_url('snapshot'),
-                json={"cable": module_id, "side": "crateSide"}
-            )
-            if response.status_code == 200:
-                snapshot = response.json()
+            snapshot = self.snapshots.get(module_id, "crateSide")
+            if snapshot is not None:
                 print("json:",snapshot)
                 for line in snapshot:
                     if snapshot[line]["connections"]:
@@ -1576,16 +1620,10 @@ class MainApp(integration_gui.Ui_MainWindow):
         """Get both detSide and crateSide endpoints for power connections"""
         try:
             # Get detSide path
-            query={"cable": power_id, "side": "detSide"}
-
-            det_response = requests.post(
-                self.get_api_url('snapshot'),
-                json=query
-            )
-            if det_response.status_code != 200:
+            det_snapshot = self.snapshots.get(power_id, "detSide")
+            if det_snapshot is None:
                 return None, []
 
-            det_snapshot = det_response.json()
             det_endpoint = None
 
             if power_id_slot != "" :
@@ -1603,12 +1641,8 @@ class MainApp(integration_gui.Ui_MainWindow):
             # Get crateSide path from the module
 #            if det_endpoint:
             if True:
-                crate_response = requests.post(
-                    self.get_api_url('snapshot'),
-                    json={"cable": power_id, "side": "crateSide"}
-                )
-                if crate_response.status_code == 200:
-                    crate_snapshot = crate_response.json()
+                crate_snapshot = self.snapshots.get(power_id, "crateSide")
+                if crate_snapshot is not None:
                     crate_endpoints = []
                     #print("PCrate_pre",crate_snapshot)
 #PCrate_pre {'1': {'crate_port': 'HV1', 'det_port': 'A', 'connections': [{'cable': 'H36', 'line': 1, 'det_port': ['A'], 'crate_port': ['A']}, {'cable': 'ASLOT2', 'line': 1, 'det_port': ['1'], 'crate_port': []}]}, 
@@ -1935,7 +1969,7 @@ class MainApp(integration_gui.Ui_MainWindow):
 
         # If we get here, all validations passed
         # First get current module data
-        response = requests.get(self.get_api_url(f'modules/{module_id}'))
+        response = self.db_client().get(f'modules/{module_id}')
         if response.status_code != 200:
             self.show_error_dialog(f"Error fetching module data: {response.text}")
             return
@@ -1975,7 +2009,7 @@ class MainApp(integration_gui.Ui_MainWindow):
             return
             
         # First get current module data
-        response = requests.get(self.get_api_url(f'modules/{module_id}'))
+        response = self.db_client().get(f'modules/{module_id}')
         if response.status_code != 200:
             self.log_output(f"Error fetching module: {response.text}")
             return
@@ -2022,10 +2056,11 @@ class MainApp(integration_gui.Ui_MainWindow):
             return
             
         try:
-            response = requests.get(self.get_api_url(f'modules/{module_id}'))
+            response = self.db_client().get(f'modules/{module_id}')
             if response.status_code == 200:
                 module_data = response.json()
                 self.current_module_data=module_data
+                self.ph2acf_offsets = TemperatureOffsets(self.ph2acf_schema, module_offsets(module_data))
                 self.current_module_id = module_id
                 
                 # Fetch Fuse ID
@@ -2033,11 +2068,9 @@ class MainApp(integration_gui.Ui_MainWindow):
                 self.log_output(f"Module {module_id} loaded. Fuse ID: {self.current_fuse_id}")
                 
                 # Reset Ph2ACF plots for new module
-                self.ph2acf_time = []
-                self.ssa_mean_values = []
-                self.ssa_max_values = []
-                self.mpa_mean_values = []
-                self.mpa_max_values = []
+                with self.plot_lock:
+                    self.ph2acf_history.clear()
+                    self.trend_dirty = True
                 
                 self.module_db.ui.moduleNameLabel.setText(module_id)
                 self.module_db.populate_details_tree(module_data)
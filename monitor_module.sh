@@ -109,96 +109,16 @@ cleanup() {
 # Set up signal handlers for clean exit
 trap cleanup SIGINT SIGTERM
 
-# Function to get calibration offset for a given field
-get_calibration_offset() {
-    local field_name=$1
-    offset=$(echo "$CALIBRATION_DATA" | jq -r ".temperature_offsets.\"$field_name\" // 0" 2>/dev/null)
-    echo "$offset"
-}
-
-# Function to parse and display temperature data
-parse_temperature_data() {
-    local mqtt_line=$1
-    local timestamp=$(date '+%Y-%m-%d %H:%M:%S')
-    
-    echo "[$timestamp] Raw MQTT data: $mqtt_line"
-    
-    # Parse JSON fields using jq
-    counter=$(echo "$mqtt_line" | jq -r '.counter // "N/A"' 2>/dev/null)
-    mqtt_timestamp=$(echo "$mqtt_line" | jq -r '.timestamp // "N/A"' 2>/dev/null)
-    beboardid=$(echo "$mqtt_line" | jq -r '.BeBoardId // "N/A"' 2>/dev/null)
-    fuseid=$(echo "$mqtt_line" | jq -r ".\"LpGBT_OG${OG_NUMBER}_fuseId\" // \"N/A\"" 2>/dev/null)
-    
-    echo "  Metadata:"
-    echo "    counter: $counter"
-    echo "    mqtt_timestamp: $mqtt_timestamp"
-    echo "    BeBoardId: $beboardid"
-    echo "    LpGBT_OG${OG_NUMBER}_fuseId: $fuseid"
-    
-    echo "  Temperature readings (Raw | Calibrated):"
-    
-    # Get all temperature field names using jq
-    temp_fields=$(echo "$mqtt_line" | jq -r 'keys[] | select(test("_temp$"))' 2>/dev/null)
-    
-    for field_name in $temp_fields; do
-        field_value=$(echo "$mqtt_line" | jq -r ".\"$field_name\"" 2>/dev/null)
-        
-        # Process SSA and MPA temperature fields
-        if [[ "$field_name" =~ (SSA|MPA)_H[0-9]+_C[0-9]+_temp ]]; then
-            # Extract chip type (SSA or MPA)
-            chip_type=$(echo "$field_name" | grep -oE '^(SSA|MPA)')
-            
-            # Extract the numbers after H and after the second underscore
-            h_num=$(echo "$field_name" | sed -E 's/.*_H([0-9]+)_.*/\1/')
-            c_num=$(echo "$field_name" | sed -E 's/.*_H[0-9]+_C([0-9]+)_temp/\1/')
-            
-            # Convert H number using modulo 2
-            h_converted=$((h_num % 2))
-            converted_name="${chip_type}_H${h_converted}_${c_num}"
-            
-            # Debug the conversion process
-            echo "    Converting: $field_name -> H$h_num(mod 2)=H$h_converted -> $converted_name"
-            
-            # Get calibration offset for this field
-            calibration_offset=$(get_calibration_offset "$converted_name")
-            
-            # Calculate calibrated temperature (RAW + OFFSET)
-            calibrated_temp=$(echo "$field_value + $calibration_offset" | bc -l)
-            calibrated_temp=$(printf "%6.2f" "$calibrated_temp")
-            field_value=$(printf "%6.2f" "$field_value")
-            
-            echo "    $field_name -> $converted_name: $field_value°C | $calibrated_temp°C (offset: $calibration_offset)"
-        else
-            # For other temperature fields, just show raw value
-            field_value=$(printf "%6.2f" "$field_value")
-            echo "    $field_name: $field_value°C | $field_value°C (no calibration)"
-        fi
-    done
-    echo "----------------------------------------"
-}
-
 # Start monitoring
 echo "Starting monitoring session for $MONITOR_TIME seconds..."
 echo "Listening to MQTT topic: /ph2acf/#"
 echo "========================================="
 
-# Calculate end time
-END_TIME=$(($(date +%s) + MONITOR_TIME))
-
-# Monitor MQTT messages for the specified time
-while [ $(date +%s) -lt $END_TIME ]; do
-    # Get one MQTT message with a timeout
-    mqtt_output=$(timeout 5 mosquitto_sub -h 192.168.0.45 -t '/ph2acf/#' -C 1 2>/dev/null)
-    
-    if [ $? -eq 0 ] && [ -n "$mqtt_output" ]; then
-        parse_temperature_data "$mqtt_output"
-    else
-        echo "[$(date '+%Y-%m-%d %H:%M:%S')] No MQTT data received in last 5 seconds..."
-    fi
-    
-    # Small delay to prevent overwhelming output
-    sleep 1
-done
+# One subscriber and one parser for the whole session, key parsing and calibration are shared
+# with the GUIs and every key is parsed once instead of once per message
+timeout "$MONITOR_TIME" mosquitto_sub -h 192.168.0.45 -t '/ph2acf/#' 2>/dev/null \
+    | python3 -u /home/thermal/integration_tools/coldroom/ph2acf_schema.py --offsets "$TEMP_OFFSETS" \
+        --metadata counter timestamp BeBoardId "LpGBT_OG${OG_NUMBER}_fuseId"
 
 # Call cleanup function
 cleanup
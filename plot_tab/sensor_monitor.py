@@ -11,6 +11,10 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 import matplotlib.dates as mdates
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.decimation import axis_pixel_width, lttb
+
 verbose = 0
 
 class PlotWidget(QWidget):
@@ -52,9 +56,15 @@ class PlotWidget(QWidget):
         else:
             colors = ['#4C72B0', '#55A868', '#C44E52', '#8172B2', '#CCB974']
             has_artists = False
+            # Long ranges are reduced to about one marker per pixel, LTTB keeps the shape and the spikes
+            max_points = axis_pixel_width(self.ax)
             
             for i, (sensor_name, sensor_timestamps, sensor_values) in enumerate(zip(sensor_names, timestamps, values)):
                 if sensor_timestamps and sensor_values:
+                    sensor_timestamps, sensor_values = lttb(
+                        sensor_timestamps, [value if value is not None else float("nan") for value in sensor_values],
+                        max_points
+                    )
                     color = colors[i % len(colors)]
                     self.ax.plot(sensor_timestamps, sensor_values, 
                                marker='o', markersize=4,
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Micro-benchmark of the thermal frame decoder against the old per-element struct.unpack path
+# example usage: python3 scripts/bench_thermal_decoder.py --repeat 2000
+import argparse
+import base64
+import os
+import struct
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.thermal_decoder import decode_frame, FRAME_ROWS, FRAME_COLS
+
+
+def legacy_decode_raw(payload):
+    flo_arr = [struct.unpack("f", payload[i : i + 4])[0] for i in range(0, len(payload), 4)]
+    return np.array(flo_arr).reshape(24, 32)
+
+
+def legacy_decode_base64(payload):
+    image_data = base64.b64decode(payload)
+    flo_arr = [struct.unpack("f", image_data[i : i + 4])[0] for i in range(0, len(image_data), 4)]
+    return np.flip(np.rot90(np.array(flo_arr).reshape(24, 32)), axis=0)
+
+
+def run(label, func, repeat):
+    seconds = timeit.timeit(func, number=repeat)
+    per_frame = seconds / repeat * 1e6
+    print(f"{label:<28} {per_frame:10.1f} us/frame  {repeat / seconds:10.0f} frames/s")
+    return per_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thermal frame decoding")
+    parser.add_argument("--repeat", type=int, default=1000, help="Number of frames to decode per case")
+    args = parser.parse_args()
+
+    frame = (np.random.rand(FRAME_ROWS, FRAME_COLS) * 30 + 10).astype(np.float32)
+    raw_payload = frame.tobytes()
+    b64_payload = base64.b64encode(raw_payload).decode()
+
+    # Both paths must agree before timing them
+    assert np.allclose(legacy_decode_raw(raw_payload), decode_frame(raw_payload))
+    assert np.allclose(legacy_decode_base64(b64_payload), decode_frame(b64_payload, encoding="base64", orient=True))
+
+    print(f"Decoding {args.repeat} frames of {FRAME_ROWS}x{FRAME_COLS} float32")
+    legacy = run("legacy raw (integration)", lambda: legacy_decode_raw(raw_payload), args.repeat)
+    new = run("frombuffer raw", lambda: decode_frame(raw_payload), args.repeat)
+    print(f"{'speedup':<28} {legacy / new:10.1f}x")
+    legacy = run("legacy base64 (coldroom)", lambda: legacy_decode_base64(b64_payload), args.repeat)
+    new = run("frombuffer base64", lambda: decode_frame(b64_payload, encoding="base64", orient=True), args.repeat)
+    print(f"{'speedup':<28} {legacy / new:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Record the coldroom MQTT traffic into a bag file and replay it into the System clients without a broker
+# example usage:
+#   python3 scripts/replay_mqtt.py record run.bag.gz --duration 600
+#   python3 scripts/replay_mqtt.py replay run.bag.gz --speed 10
+#   python3 scripts/replay_mqtt.py replay run.bag.gz --fast --bench
+import argparse
+import logging
+import os
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.mqtt_bag import MQTTRecorder, MQTTReplayer, read_bag
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "settings_coldroom.yaml")
+
+
+def offline_system():
+    """System with all MQTT clients registered on its shared connection, without a broker"""
+    from coldroom.system import System
+    from coldroom.module_temperatures_gui import ModuleTempMQTT
+
+    system = System(connect=False)
+    ModuleTempMQTT(system).loop_start()
+    return system
+
+
+def record(args, settings):
+    topics = offline_system().mqtt.router.filters
+    recorder = MQTTRecorder(settings["mqtt"]["broker"], settings["mqtt"]["port"], topics, args.bag)
+    recorder.start()
+    print(f"Recording {len(topics)} topics to {args.bag}, Ctrl+C to stop")
+    started = time.time()
+    try:
+        while args.duration is None or time.time() - started < args.duration:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        recorder.stop()
+    print(f"Recorded {recorder.writer.count} messages in {time.time() - started:.0f} s")
+
+
+def replay(args, settings):
+    from coldroom.frame_archive import ThermalFrameArchive
+
+    system = offline_system()
+    if args.archive and system._thermalcamera is not None:
+        system._thermalcamera._archive = ThermalFrameArchive(args.archive)
+
+    # Every message goes through the same topic router as live traffic
+    handlers = [("#", lambda client, userdata, msg: system.mqtt.dispatch(msg.topic, msg.payload))]
+    replayer = MQTTReplayer(handlers, speed=None if args.fast else args.speed)
+    count = replayer.replay(read_bag(args.bag))
+    print(f"Replayed {count} messages in {replayer.elapsed:.2f} s ({count / replayer.elapsed:.0f} msg/s), "
+          f"{replayer.errors} handler errors")
+
+    if args.bench:
+        print(f"{'topic':<50} {'msgs':>7} {'msg/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for topic, stats in replayer.report().items():
+            print(
+                f"{topic:<50} {stats['messages']:>7} {stats['rate']:>10.0f} {stats['p50']:>8.3f} "
+                f"{stats['p95']:>8.3f} {stats['p99']:>8.3f} {stats['max']:>8.3f}"
+            )
+    if system._thermalcamera is not None and system._thermalcamera._archive is not None:
+        system._thermalcamera._archive.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay the coldroom MQTT traffic")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record all subscribed topics into a bag file")
+    record_parser.add_argument("bag", help="Bag file, compressed if it ends with .gz")
+    record_parser.add_argument("--duration", type=float, default=None, help="Recording time in seconds")
+
+    replay_parser = subparsers.add_parser("replay", help="Feed a bag file to the System clients, no broker needed")
+    replay_parser.add_argument("bag", help="Bag file")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor, 1 is real time")
+    replay_parser.add_argument("--fast", action="store_true", help="Replay as fast as possible")
+    replay_parser.add_argument("--bench", action="store_true", help="Report handler latency percentiles per topic")
+    replay_parser.add_argument("--archive", default=None, help="Archive replayed thermal frames to this directory")
+    parser.add_argument("--log-level", default="WARNING", help="Logging level of the clients")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level)
+    with open(SETTINGS_FILE, "r") as f:
+        settings = yaml.safe_load(f)
+
+    if args.command == "record":
+        record(args, settings)
+    else:
+        replay(args, settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import unittest
+import sys
+import os
+import socket
+import socketserver
+import threading
+import time
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from caen.caen_client import BUFFER_SIZE, HEADER, CAENClient, encode_message
+
+
+class FakeCAENHandler(socketserver.BaseRequestHandler):
+    """Answers every packet with the same packet number, keeps the connection open"""
+
+    def handle(self):
+        self.server.connections += 1
+        buffer = b""
+        while True:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            buffer += chunk
+            while len(buffer) >= HEADER.size:
+                length, number = HEADER.unpack_from(buffer)
+                if len(buffer) < length:
+                    break
+                message = buffer[HEADER.size : length].decode()
+                buffer = buffer[length:]
+                if message == "Silent":
+                    continue
+                if message == "Close":
+                    return
+                if message.startswith("Big:"):
+                    reply = "x" * int(message[4:])
+                elif message.startswith("GetStatus"):
+                    reply = f"GetStatus,caen_LV7.1_Voltage:{number}.0,caen_LV7.1_IsOn:1"
+                else:
+                    reply = f"{message} done"
+                self.request.sendall(encode_message(reply, number))
+
+
+class FakeCAENServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeCAENHandler)
+        self.connections = 0
+
+
+class TestCAENClient(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeCAENServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = CAENClient("127.0.0.1", self.server.server_address[1], timeout=1.0)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_pipelined_requests_share_one_connection(self):
+        futures = [self.client.request(f"TurnOn,PowerSupplyId:caen,ChannelId:LV7.{i}") for i in range(20)]
+        status = self.client.request("GetStatus,PowerSupplyId:caen")
+        for i, future in enumerate(futures):
+            self.assertEqual(future.result(2), f"TurnOn,PowerSupplyId:caen,ChannelId:LV7.{i} done")
+        self.assertIn("caen_LV7.1_Voltage:21.0", status.result(2))
+        self.assertEqual(self.server.connections, 1)
+
+    def test_replies_larger_than_the_buffer(self):
+        sizes = [10, BUFFER_SIZE - 5, 3 * BUFFER_SIZE, 7]
+        futures = [self.client.request(f"Big:{size}", decode=lambda body: (type(body), len(body))) for size in sizes]
+        for size, future in zip(sizes, futures):
+            self.assertEqual(future.result(5), (memoryview, size))
+        self.assertEqual(self.client.call("Again"), "Again done")
+
+    def test_commands_without_reply(self):
+        sent = [self.client.send(f"TurnOff,PowerSupplyId:caen,ChannelId:LV7.{i}") for i in range(5)]
+        self.assertEqual([future.result(0) for future in sent], [None] * 5)
+        # The replies the fake server still sends to the commands are dropped
+        self.assertIn("caen_LV7.1_Voltage:6.0", self.client.call("GetStatus,PowerSupplyId:caen"))
+        self.assertTrue(self.client.connected)
+
+    def test_reconnects_after_close(self):
+        self.assertEqual(self.client.call("TurnOff,PowerSupplyId:caen,ChannelId:LV7.1"), "TurnOff,PowerSupplyId:caen,ChannelId:LV7.1 done")
+        with self.assertRaises(ConnectionError):
+            self.client.call("Close")
+        self.assertEqual(self.client.call("Again"), "Again done")
+        self.assertEqual(self.server.connections, 2)
+
+    def test_deadline(self):
+        started = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            self.client.call("Silent", timeout=0.3)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertFalse(self.client.connected)
+        self.assertEqual(self.client.call("Again"), "Again done")
+
+    def test_dead_server_fails_fast(self):
+        with socket.socket() as free:
+            free.bind(("127.0.0.1", 0))
+            port = free.getsockname()[1]
+        client = CAENClient("127.0.0.1", port)
+        with self.assertRaises(OSError):
+            client.call("GetStatus,PowerSupplyId:caen")
+        # Within the backoff delay no connection is attempted
+        started = time.monotonic()
+        with self.assertRaises(ConnectionError):
+            client.call("GetStatus,PowerSupplyId:caen")
+        self.assertLess(time.monotonic() - started, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
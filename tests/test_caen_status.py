@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from caen.caen_client import CAENClient
+from caen.caen_status import CAENStatusPoller, any_on, parse_status
+from tests.test_caen_client import FakeCAENServer
+
+
+class TestParseStatus(unittest.TestCase):
+    def test_parse(self):
+        status = parse_status("GetStatus,caen_LV7.1_Voltage:10.5,caen_LV7.1_IsOn:1,caen_HV0.1_Current:bad,other:2")
+        self.assertEqual(status, {"caen_LV7.1_Voltage": 10.5, "caen_LV7.1_IsOn": 1.0})
+
+    def test_columns(self):
+        reply = memoryview(
+            b"GetStatus,caen_LV7.1_IsOn:1,caen_LV7.1_Voltage:10.5,caen_LV7.1_Current:2,"
+            b"caen_HV0.11_IsOn:0,caen_HV0.11_Voltage:1.5,caen_HV0.11_Current:0.25,caen_HV0.12_IsOn:1"
+        )
+        status = parse_status(reply)
+        self.assertEqual(status.channels, ("LV7.1", "HV0.11", "HV0.12"))
+        np.testing.assert_array_equal(status.column("IsOn"), [1.0, 0.0, 1.0])
+        values = status.select(["HV0.11", "LV9.9", "LV7.1"])
+        np.testing.assert_array_equal(values[0], [0.0, 1.5, 0.25])
+        self.assertTrue(np.isnan(values[1]).all())
+        np.testing.assert_array_equal(values[2], [1.0, 10.5, 2.0])
+        self.assertTrue(np.isnan(status.column("Power")).all())
+        self.assertTrue(status.any_on(["HV0.11", "HV0.12"]))
+        self.assertFalse(status.any_on(["HV0.11", "LV9.9"]))
+        self.assertEqual(status.value("HV0.12", "Voltage", 0), 0)
+        self.assertEqual(status["caen_HV0.11_Current"], 0.25)
+        self.assertEqual(len(status.to_dict()), 7)
+
+    def test_any_on(self):
+        self.assertTrue(any_on({"caen_LV6.1_IsOn": 1.0}, ["LV6.1"]))
+        self.assertFalse(any_on(parse_status(""), ["LV6.1"]))
+
+
+class TestCAENStatusPoller(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeCAENServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = CAENClient("127.0.0.1", self.server.server_address[1], timeout=1.0)
+        self.poller = CAENStatusPoller("127.0.0.1", self.server.server_address[1], interval=0.05, client=self.client)
+
+    def tearDown(self):
+        self.poller.stop()
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_one_poll_for_all_subscribers(self):
+        received = {"a": [], "b": []}
+        self.poller.subscribe(received["a"].append)
+        self.poller.subscribe(received["b"].append)
+        deadline = time.monotonic() + 2
+        while len(received["b"]) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.poller.stop()
+        # Both views see the same snapshots, each parsed once from one reply
+        count = min(len(received["a"]), len(received["b"]))
+        self.assertGreaterEqual(count, 3)
+        for a, b in zip(received["a"][:count], received["b"][:count]):
+            self.assertIs(a, b)
+        # The fake server echoes the packet number as the voltage, one GetStatus per poll
+        voltages = [snapshot["caen_LV7.1_Voltage"] for snapshot in received["a"]]
+        self.assertEqual(voltages, sorted(set(voltages)))
+        self.assertEqual(self.server.connections, 1)
+
+    def test_no_poll_without_subscribers(self):
+        self.poller.start()
+        time.sleep(0.2)
+        self.assertIsNone(self.poller.latest)
+        self.assertEqual(self.server.connections, 0)
+
+    def test_errors_and_unsubscribe(self):
+        errors = []
+        snapshots = []
+        failing = CAENStatusPoller("127.0.0.1", 1, interval=0.05, client=CAENClient("127.0.0.1", 1, connect_timeout=0.2))
+        failing.subscribe(snapshots.append, errors.append)
+        deadline = time.monotonic() + 2
+        while not errors and time.monotonic() < deadline:
+            time.sleep(0.01)
+        failing.unsubscribe(snapshots.append)
+        failing.stop()
+        self.assertTrue(errors)
+        self.assertEqual(snapshots, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import sys
+import os
+
+from PyQt5.QtWidgets import QApplication, QFrame, QLabel
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from caen.caen_status import parse_status
+from caen.channel_display import ChannelDisplay, init_led, set_led
+
+
+class TestChannelDisplay(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def test_only_changed_channels(self):
+        display = ChannelDisplay(["LV7.1", "LV7.2", "HV0.1"])
+        first = parse_status("caen_LV7.1_IsOn:1,caen_LV7.1_Voltage:10,caen_LV7.1_Current:2,caen_LV7.2_IsOn:0")
+        self.assertEqual([channel for channel, _ in display.changed(first)], ["LV7.1", "LV7.2"])
+        self.assertEqual(display.changed(first), [])
+        second = parse_status("caen_LV7.1_IsOn:1,caen_LV7.1_Voltage:10.2,caen_LV7.1_Current:2,caen_LV7.2_IsOn:0")
+        changed = display.changed(second)
+        self.assertEqual([channel for channel, _ in changed], ["LV7.1"])
+        self.assertEqual(list(changed[0][1]), [1.0, 10.2, 2.0])
+
+    def test_text_and_led(self):
+        display = ChannelDisplay(["LV7.1"])
+        label = QLabel()
+        self.assertTrue(display.set_text("LV7.1", label, "V: 10.0V"))
+        self.assertFalse(display.set_text("LV7.1", label, "V: 10.0V"))
+        self.assertEqual(label.text(), "V: 10.0V")
+
+        led = QFrame()
+        init_led(led)
+        self.assertEqual(led.property("led"), "off")
+        self.assertFalse(set_led(led, "off"))
+        self.assertTrue(set_led(led, "on"))
+        self.assertEqual(led.property("led"), "on")
+
+
+if __name__ == "__main__":
+    unittest.main()
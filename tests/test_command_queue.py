@@ -0,0 +1,174 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from caen.caen_client import CAENClient
+from caen.caen_status import parse_status
+from caen.command_queue import CAENCommandQueue, CommandResult
+from tests.test_caen_client import FakeCAENServer
+
+
+class ManualClient:
+    """Records the sent messages, replies only when answer() is called"""
+
+    ip = "fake"
+    port = 0
+    timeout = 1.0
+
+    def __init__(self):
+        self.sent = []
+        self.futures = []
+        self.lock = threading.Lock()
+
+    def request(self, message, decode=None, expect_reply=True):
+        future = Future()
+        with self.lock:
+            self.sent.append(message)
+            if expect_reply:
+                self.futures.append(future)
+            else:
+                future.set_result(None)
+        return future
+
+    def answer(self):
+        with self.lock:
+            futures, self.futures = self.futures, []
+        for future in futures:
+            future.set_result("done")
+
+    def wait_sent(self, count):
+        deadline = time.monotonic() + 2
+        while len(self.sent) < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return len(self.sent)
+
+
+class TestCAENCommandQueue(unittest.TestCase):
+    def setUp(self):
+        self.client = ManualClient()
+        self.queue = CAENCommandQueue(self.client, max_in_flight=1)
+
+    def tearDown(self):
+        self.queue.close()
+
+    def test_turn_off_first_and_status_collapsed(self):
+        first = self.queue.submit("TurnOn,PowerSupplyId:caen,ChannelId:LV7.1", expect_reply=True)
+        self.assertEqual(self.client.wait_sent(1), 1)
+        # Queued behind the unanswered TurnOn
+        status = self.queue.submit("GetStatus,PowerSupplyId:caen")
+        again = self.queue.submit("GetStatus,PowerSupplyId:caen")
+        on = self.queue.submit("TurnOn,PowerSupplyId:caen,ChannelId:LV7.2", expect_reply=True)
+        off = self.queue.submit("TurnOff,PowerSupplyId:caen,ChannelId:LV7.1", expect_reply=True)
+        self.assertIs(status, again)
+        self.assertEqual(len(self.queue), 3)
+
+        for count in range(2, 5):
+            self.client.answer()
+            self.client.wait_sent(count)
+        self.client.answer()
+        self.assertEqual(
+            self.client.sent,
+            [
+                "TurnOn,PowerSupplyId:caen,ChannelId:LV7.1",
+                "TurnOff,PowerSupplyId:caen,ChannelId:LV7.1",
+                "TurnOn,PowerSupplyId:caen,ChannelId:LV7.2",
+                "GetStatus,PowerSupplyId:caen",
+            ],
+        )
+        for future in (first, status, on, off):
+            result = future.result(2)
+            self.assertIsInstance(result, CommandResult)
+            self.assertEqual(result.reply, "done")
+            self.assertGreaterEqual(result.wait, 0)
+            self.assertGreaterEqual(result.round_trip, 0)
+        self.assertGreater(status.result().wait, off.result().wait)
+
+    def test_commands_without_reply_free_the_slot(self):
+        status = self.queue.submit("GetStatus,PowerSupplyId:caen")
+        self.client.wait_sent(1)
+        # Behind the unanswered poll, the commands wait for the slot but not for replies of their own
+        off = self.queue.submit("TurnOff,PowerSupplyId:caen,ChannelId:LV7.1")
+        on = self.queue.submit("TurnOn,PowerSupplyId:caen,ChannelId:LV7.2")
+        self.client.answer()
+        self.assertEqual(off.result(2).reply, None)
+        self.assertEqual(on.result(2).reply, None)
+        self.assertEqual(status.result(2).reply, "done")
+        self.assertEqual(self.client.wait_sent(3), 3)
+
+    def test_turn_off_drops_queued_commands_of_its_channel(self):
+        status = self.queue.submit("GetStatus,PowerSupplyId:caen")
+        self.client.wait_sent(1)
+        on = self.queue.submit("TurnOn,PowerSupplyId:caen,ChannelId:LV6.1")
+        voltage = self.queue.submit("SetVoltage,PowerSupplyId:caen,ChannelId:LV6.1,Voltage:10")
+        other = self.queue.submit("TurnOn,PowerSupplyId:caen,ChannelId:LV6.2")
+        off = self.queue.submit("TurnOff,PowerSupplyId:caen,ChannelId:LV6.1")
+        self.client.answer()
+        for future in (on, voltage):
+            with self.assertRaises(RuntimeError):
+                future.result(2)
+        self.assertIsNone(off.result(2).reply)
+        self.assertIsNone(other.result(2).reply)
+        self.assertEqual(status.result(2).reply, "done")
+        self.assertEqual(
+            self.client.sent,
+            [
+                "GetStatus,PowerSupplyId:caen",
+                "TurnOff,PowerSupplyId:caen,ChannelId:LV6.1",
+                "TurnOn,PowerSupplyId:caen,ChannelId:LV6.2",
+            ],
+        )
+
+    def test_supply_turn_off_drops_all_queued_commands(self):
+        self.queue.submit("GetStatus,PowerSupplyId:caen")
+        self.client.wait_sent(1)
+        on = self.queue.submit("TurnOn,PowerSupplyId:caen,ChannelId:LV6.1")
+        other = self.queue.submit("TurnOn,PowerSupplyId:other,ChannelId:LV6.1")
+        self.queue.submit("TurnOff,PowerSupplyId:caen")
+        self.client.answer()
+        with self.assertRaises(RuntimeError):
+            on.result(2)
+        self.assertIsNone(other.result(2).reply)
+        self.assertNotIn("TurnOn,PowerSupplyId:caen,ChannelId:LV6.1", self.client.sent)
+
+    def test_close_fails_queued(self):
+        self.queue.submit("TurnOn,PowerSupplyId:caen,ChannelId:LV7.1", expect_reply=True)
+        self.client.wait_sent(1)
+        queued = self.queue.submit("GetStatus,PowerSupplyId:caen")
+        self.queue.close()
+        with self.assertRaises(RuntimeError):
+            queued.result(1)
+        with self.assertRaises(RuntimeError):
+            self.queue.submit("GetStatus,PowerSupplyId:caen")
+
+
+class TestCommandQueueServer(unittest.TestCase):
+    def test_replies(self):
+        server = FakeCAENServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = CAENClient("127.0.0.1", server.server_address[1], timeout=1.0)
+        queue = CAENCommandQueue(client)
+        try:
+            futures = [queue.submit(f"TurnOn,PowerSupplyId:caen,ChannelId:LV7.{i}") for i in range(10)]
+            status = queue.submit("GetStatus,PowerSupplyId:caen", decode=parse_status)
+            for future in futures:
+                self.assertIsNone(future.result(2).reply)
+            # The fake server answers the commands too, those replies must not reach the poll
+            self.assertEqual(status.result(2).reply.value("LV7.1", "IsOn"), 1.0)
+            echo = queue.submit("Echo", expect_reply=True)
+            self.assertEqual(echo.result(2).reply, "Echo done")
+            self.assertEqual(server.connections, 1)
+        finally:
+            queue.close()
+            client.close()
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
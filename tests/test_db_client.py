@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.client import DBClient, get_client
+from db.utils import get_module_details, iter_module_endpoints
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    unavailable = 0
+    clients = set()
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        Handler.clients.add(self.client_address)
+        if self.path.startswith("/flaky") and Handler.unavailable > 0:
+            Handler.unavailable -= 1
+            self._reply(503, {})
+        elif self.path.startswith("/modules/"):
+            self._reply(200, {"moduleName": self.path.split("/")[-1]})
+        else:
+            self._reply(404, {})
+
+    def do_POST(self):
+        Handler.clients.add(self.client_address)
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length))
+        if "side" in body:
+            # crateSide snapshot of a module, line 1 to the FC7 and line 3 to an LV slot
+            n = body["cable"][-1]
+            self._reply(200, {
+                "1": {"connections": [{"cable": "FC7OT5", "line": 1, "det_port": [f"OG{n}"], "crate_port": []}]},
+                "3": {"connections": [{"cable": "XSLOT7", "line": int(n), "det_port": ["down"], "crate_port": []}]},
+            })
+        else:
+            self._reply(200, body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDBClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_keep_alive_and_stats(self):
+        Handler.clients.clear()
+        client = DBClient(self.base_url, backoff=0)
+        for i in range(10):
+            self.assertEqual(client.get(f"modules/M{i}").json()["moduleName"], f"M{i}")
+        self.assertEqual(client.post(self.base_url + "snapshot", json={"cable": "P001"}).json(), {"cable": "P001"})
+        self.assertEqual(client.get("missing").status_code, 404)
+        # Every request went through the same pooled connection
+        self.assertEqual(len(Handler.clients), 1)
+
+        stats = client.stats()
+        self.assertEqual(stats["GET /modules"]["count"], 10)
+        self.assertEqual(stats["GET /modules"]["errors"], 0)
+        self.assertEqual(stats["POST /snapshot"]["count"], 1)
+        self.assertEqual(stats["GET /missing"]["errors"], 1)
+        self.assertGreaterEqual(stats["GET /modules"]["max_ms"], stats["GET /modules"]["mean_ms"])
+        client.close()
+
+    def test_retries_unavailable(self):
+        Handler.unavailable = 2
+        client = DBClient(self.base_url, backoff=0)
+        self.assertEqual(client.get("flaky").status_code, 404)
+        self.assertEqual(Handler.unavailable, 0)
+        client.close()
+
+    def test_shared_clients(self):
+        self.assertIs(get_client(self.base_url), get_client(self.base_url.rstrip("/")))
+        self.assertIsNot(get_client(self.base_url), get_client("http://127.0.0.2:5000"))
+
+
+    def test_module_hydration(self):
+        module = {"moduleName": "PS_40_05_IBA-00001", "hwId": "42", "temperature_offsets": {"SSA_H0_0": 1.0}}
+        self.assertEqual(get_module_details(module), {"speed": "5G", "fuseId": 42, "temperature_offsets": {"SSA_H0_0": 1.0}})
+
+        names = [f"PS_40_05_IBA-0000{i}" for i in range(1, 7)]
+        endpoints = dict(iter_module_endpoints(names, db_url=self.base_url.rstrip("/"), max_workers=3))
+        self.assertEqual(sorted(endpoints), names)
+        self.assertEqual(endpoints[names[2]], {"LV": "LV7.3", "HV": None, "FC7": "FC7OT5_OG3"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.decimation import decimate, lttb
+
+
+class TestLTTB(unittest.TestCase):
+    def test_keeps_ends_and_spikes(self):
+        x = np.arange(200000, dtype=float)
+        y = np.sin(x / 5000)
+        y[77777] = 10.0
+        xs, ys = lttb(x, y, 500)
+        self.assertEqual(len(xs), 500)
+        self.assertEqual(xs[0], 0)
+        self.assertEqual(xs[-1], x[-1])
+        self.assertIn(77777, xs)
+        self.assertTrue(np.all(np.diff(xs) > 0))
+
+    def test_datetimes_and_nan(self):
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        x = [start + timedelta(minutes=i) for i in range(5000)]
+        y = np.linspace(0, 1, 5000)
+        y[::100] = np.nan
+        xs, ys = lttb(x, y, 300)
+        self.assertEqual(len(xs), 300)
+        self.assertFalse(np.isnan(ys).any())
+        self.assertIsInstance(xs[0], datetime)
+
+    def test_short_series(self):
+        xs, ys = decimate([1, 2, 3], [1.0, 2.0, 3.0], 100, method="lttb")
+        np.testing.assert_array_equal(ys, [1.0, 2.0, 3.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
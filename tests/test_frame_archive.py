@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.frame_archive import ThermalFrameArchive
+
+
+class TestThermalFrameArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rng = np.random.default_rng(5)
+        self.archive = ThermalFrameArchive(self.tmp.name, chunk_frames=16)
+        self.frames = (self.rng.random((50, 32, 24)) * 20).astype(np.float32)
+        self.positions = self.rng.random(50) * 360
+        self.cameras = np.arange(50) % 4
+        for i in range(50):
+            self.archive.append(
+                self.cameras[i], self.positions[i], self.frames[i], self.frames[i].min(), self.frames[i].max(), 100.0 + i
+            )
+
+    def tearDown(self):
+        self.archive.close()
+        self.tmp.cleanup()
+
+    def reference(self, start=None, end=None, camera=None, angle_min=None, angle_max=None):
+        times = 100.0 + np.arange(50)
+        positions = self.positions.astype(np.float32)
+        mask = np.ones(50, dtype=bool)
+        if start is not None:
+            mask &= times >= start
+        if end is not None:
+            mask &= times < end
+        if camera is not None:
+            mask &= self.cameras == camera
+        if angle_min is not None:
+            if angle_min <= angle_max:
+                mask &= (positions >= angle_min) & (positions <= angle_max)
+            else:
+                mask &= (positions >= angle_min) | (positions <= angle_max)
+        return np.flatnonzero(mask)
+
+    def test_frames(self):
+        self.assertEqual(len(self.archive), 50)
+        np.testing.assert_array_equal(self.archive.frame(20), self.frames[20])
+        records, frames = self.archive.frames([3, 49, 17])
+        np.testing.assert_array_equal(frames, self.frames[[3, 49, 17]])
+        np.testing.assert_array_equal(records["camera"], self.cameras[[3, 49, 17]])
+        with self.assertRaises(IndexError):
+            self.archive.frame(50)
+
+    def test_queries(self):
+        for criteria in [
+            {},
+            {"start": 110, "end": 140},
+            {"start": 115.5},
+            {"end": 100},
+            {"camera": 2, "start": 120},
+            {"angle_min": 40, "angle_max": 200},
+            {"angle_min": 300, "angle_max": 30, "start": 105, "end": 148},
+        ]:
+            np.testing.assert_array_equal(self.archive.query(**criteria), self.reference(**criteria), str(criteria))
+
+    def test_reopen(self):
+        self.archive.close()
+        self.archive = ThermalFrameArchive(self.tmp.name, chunk_frames=16)
+        self.assertEqual(len(self.archive), 50)
+        self.archive.append(1, 10.0, self.frames[0], 0, 20, timestamp=50.0)
+        # Timestamps never go back in time
+        records, frames = self.archive.frames([50])
+        self.assertEqual(records["timestamp"][0], 149.0)
+        np.testing.assert_array_equal(self.archive.query(start=120, camera=1), np.append(self.reference(start=120, camera=1), 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.hotspots import HotspotTracker, detect_hotspots
+from coldroom.module_roi import ModuleROIIndex
+
+
+class TestDetectHotspots(unittest.TestCase):
+    def test_regions(self):
+        frame = np.full((32, 24), 20.0, dtype=np.float32)
+        frame[2:5, 3:6] = 40.0
+        frame[3, 4] = 45.0
+        frame[20:22, 10] = 30.0
+        frame[30, 20] = 50.0  # single pixel, below min_area
+
+        hotspots = sorted(detect_hotspots(frame, delta=5.0, min_area=2), key=lambda h: -h["peak"])
+        self.assertEqual(len(hotspots), 2)
+        self.assertEqual(hotspots[0]["area"], 9)
+        self.assertEqual(hotspots[0]["peak"], 45.0)
+        self.assertAlmostEqual(hotspots[0]["row"], 3.0)
+        self.assertAlmostEqual(hotspots[0]["col"], 4.0)
+        self.assertAlmostEqual(hotspots[0]["mean"], (8 * 40 + 45) / 9)
+        self.assertEqual(hotspots[1]["area"], 2)
+
+    def test_uniform_frame(self):
+        self.assertEqual(detect_hotspots(np.full((32, 24), 20.0, dtype=np.float32)), [])
+
+
+class TestHotspotTracker(unittest.TestCase):
+    def setUp(self):
+        roi = ModuleROIIndex({"M1": {"angular_position": 20.0, "side": "13"}}, 18)
+        self.tracker = HotspotTracker(roi, match_distance=3.0, growth_threshold=0.5, clear_after=2)
+
+    def test_lifecycle(self):
+        events = self.tracker.update("Front", 10, 20, [{"angle": 20.0, "area": 4, "peak": 40.0}], 0.0)
+        self.assertEqual([e["event"] for e in events], ["new"])
+        self.assertEqual(events[0]["module"], "M1")
+
+        # Same hotspot seen slightly shifted and warming up
+        events = self.tracker.update("Front", 12, 20, [{"angle": 21.0, "area": 6, "peak": 43.0}], 1.0)
+        self.assertEqual([e["event"] for e in events], ["growing"])
+        self.assertEqual(len(self.tracker.tracks), 1)
+
+        # Other side does not match
+        events = self.tracker.update("Back", 10, 20, [{"angle": 21.0, "area": 6, "peak": 43.0}], 2.0)
+        self.assertEqual([e["event"] for e in events], ["new"])
+        self.assertIsNone(events[0]["module"])
+
+        # Front camera looking elsewhere does not clear it, looking at it twice does
+        self.assertEqual(self.tracker.update("Front", 100, 20, [], 3.0), [])
+        self.assertEqual(self.tracker.update("Front", 15, 20, [], 4.0), [])
+        events = self.tracker.update("Front", 15, 20, [], 5.0)
+        self.assertEqual([e["event"] for e in events], ["cleared"])
+        self.assertEqual(len(self.tracker.tracks), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
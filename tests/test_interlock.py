@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import threading
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.interlock import MODULES, InterlockEngine, default_interlock_rules, lv_off_action, module_channels
+from coldroom.status_store import StatusStore
+
+
+class TestInterlockEngine(unittest.TestCase):
+    def setUp(self):
+        self.store = StatusStore()
+        self.engine = InterlockEngine(self.store)
+        self.commands = []
+        self.alarms = []
+        self.acted = threading.Event()
+
+        def publish_alarm(message):
+            self.alarms.append(message)
+            self.acted.set()
+
+        action = lv_off_action(self.commands.append, lambda: self.engine.status, publish_alarm)
+        for rule in default_interlock_rules(action):
+            self.engine.add_rule(rule)
+        self.store.update(MODULES, module_channels({"M1": {"LV": "LV6.1", "HV": "HV0.1"}, "M2": {"LV": "LV6.2"}}))
+        self.store.update("cleanroom", {"dewpoint": 5.0})
+        self.store.update("coldroom", {"ch_temperature": {"value": 15.0}})
+        self.store.update("marta", {"fsm_state": "RUNNING", "TT05_CO2": 15.0, "TT06_CO2": 16.0})
+        self.store.update("caen", {"caen_LV6.1_IsOn": 1.0, "caen_LV6.2_IsOn": 0.0})
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def test_lv_switched_off_below_dew_point(self):
+        self.engine.start()
+        self.store.update("marta", {"fsm_state": "RUNNING", "TT05_CO2": 4.0, "TT06_CO2": 16.0})
+        self.assertTrue(self.acted.wait(2))
+        self.assertEqual(
+            self.commands,
+            ["TurnOff,PowerSupplyId:caen,ChannelId:LV6.1", "TurnOff,PowerSupplyId:caen,ChannelId:LV6.2"],
+        )
+        self.assertIn("lv_dew_point", self.alarms[0])
+        report = self.engine.latency_report()
+        self.assertEqual(report["actions"], 1)
+        self.assertLess(report["max"], 500)
+
+    def test_rule_reevaluated_when_channels_assigned(self):
+        self.store.update(MODULES, {"LV": [], "HV": []})
+        self.store.update("marta", {"fsm_state": "RUNNING", "TT05_CO2": 4.0, "TT06_CO2": 16.0})
+        self.engine.start()
+        self.assertFalse(self.acted.wait(0.2))
+        # CAEN already reports LV6.1 on, the assignment alone must trip the rule
+        self.store.update(MODULES, {"LV": ["LV6.1"], "HV": []})
+        self.assertTrue(self.acted.wait(2))
+        self.assertEqual(self.commands, ["TurnOff,PowerSupplyId:caen,ChannelId:LV6.1"])
+
+    def test_lv_off_channels_not_on(self):
+        self.store.update("caen", {"caen_LV6.1_IsOn": 0.0, "caen_LV6.2_IsOn": 0.0})
+        self.engine.apply(self.store.snapshot())
+        changes = self.store.update("marta", {"fsm_state": "RUNNING", "TT05_CO2": 4.0, "TT06_CO2": 16.0})
+        self.engine.process(changes, 0.0)
+        self.assertEqual(self.commands, [])
+
+    def test_only_affected_rules_are_evaluated(self):
+        rules = {rule.name: rule for rule in self.engine.rules}
+        self.engine.apply(self.store.snapshot())
+        self.engine.process(self.store.update("cleanroom", {"dewpoint": 4.0}), 0.0)
+        self.assertEqual(rules["lv_dew_point"].evaluations, 1)
+        self.assertEqual(rules["lv_marta"].evaluations, 0)
+        self.assertEqual(self.commands, [])
+
+    def test_rule_waits_for_its_inputs(self):
+        engine = InterlockEngine(StatusStore())
+        rule = default_interlock_rules(lambda rule, message: None)[0]
+        engine.add_rule(rule)
+        engine.process(engine.status_store.update("cleanroom", {"dewpoint": 30.0}), 0.0)
+        self.assertEqual(rule.evaluations, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.module_roi import ModuleROIIndex
+
+
+class TestModuleROIIndex(unittest.TestCase):
+    """Compare the vectorized per-module statistics with a per-module loop"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(3)
+        self.number_of_modules = 18
+        width = 360 / (self.number_of_modules / 2)
+        self.modules = {}
+        for slot in range(1, self.number_of_modules + 1):
+            front = slot <= self.number_of_modules / 2
+            self.modules[f"M{slot}"] = {
+                "angular_position": (slot - 1) % (self.number_of_modules / 2) * width + (width / 2) * front,
+                "side": "13" if front else "24",
+            }
+        self.modules["unmounted"] = {"angular_position": -1, "side": "Undefined"}
+        self.index = ModuleROIIndex(self.modules, self.number_of_modules)
+
+    def panorama(self):
+        return (self.rng.random((32, 360)) * 15 + 20).astype(np.float32)
+
+    def reference(self, panoramas, module_name):
+        """Statistics of one module by slicing every panorama of its side"""
+        info = self.modules[module_name]
+        half_width = self.index.module_angular_width * 0.8 / 2
+        columns = np.arange(
+            int(round(info["angular_position"] - half_width)), int(round(info["angular_position"] + half_width)) + 1
+        ) % 360
+        pixels = []
+        for side, panorama, covered in panoramas:
+            if {"Front": "13", "Back": "24"}[side] != info["side"]:
+                continue
+            selected = columns[covered[columns]]
+            pixels.append(panorama[:, selected].ravel())
+        pixels = np.concatenate(pixels)
+        return pixels.min(), pixels.max(), pixels.mean()
+
+    def test_matches_reference(self):
+        covered = np.ones(360, dtype=bool)
+        partial = np.zeros(360, dtype=bool)
+        partial[90:200] = True
+        panoramas = [
+            ("Front", self.panorama(), covered),
+            ("Front", self.panorama(), partial),
+            ("Back", self.panorama(), covered),
+        ]
+        stats = self.index.compute(panoramas)
+        self.assertEqual(len(stats), self.number_of_modules)
+        self.assertNotIn("unmounted", stats)
+        for module_name, module_stats in stats.items():
+            t_min, t_max, t_mean = self.reference(panoramas, module_name)
+            self.assertAlmostEqual(module_stats["min"], t_min, places=5)
+            self.assertAlmostEqual(module_stats["max"], t_max, places=5)
+            self.assertAlmostEqual(module_stats["mean"], t_mean, places=4)
+
+    def test_uncovered_modules_are_skipped(self):
+        covered = np.zeros(360, dtype=bool)
+        covered[0:60] = True
+        stats = self.index.compute([("Front", self.panorama(), covered)])
+        self.assertTrue(stats)
+        for module_name in stats:
+            self.assertEqual(self.modules[module_name]["side"], "13")
+            self.assertLess(self.modules[module_name]["angular_position"], 80)
+
+    def test_wraps_around(self):
+        index = ModuleROIIndex({"M": {"angular_position": 0.0, "side": "13"}}, 18)
+        panorama = np.full((32, 360), 20.0, dtype=np.float32)
+        panorama[:, 355] = 30.0
+        stats = index.compute([("Front", panorama, np.ones(360, dtype=bool))])
+        self.assertEqual(stats["M"]["max"], 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.mqtt_bag import BagWriter, MQTTReplayer, read_bag
+
+
+class TestMQTTBag(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.messages = [
+            (1000.0, "/MARTA/status", b'{"TT06_CO2": -30.1}'),
+            (1000.1, "/thermalcamera/camera0", b"\x00\x01\x02" * 100),
+            (1000.2, "/coldroom/state", b"{}"),
+            (1000.3, "/thermalcamera/camera1", b""),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name):
+        path = os.path.join(self.tmp.name, name)
+        with BagWriter(path) as writer:
+            for message in self.messages:
+                writer.write(*message)
+        return path
+
+    def test_roundtrip(self):
+        for name in ("run.bag", "run.bag.gz"):
+            self.assertEqual(list(read_bag(self.write(name))), self.messages)
+
+    def test_not_a_bag(self):
+        path = os.path.join(self.tmp.name, "other")
+        with open(path, "wb") as f:
+            f.write(b"something else")
+        with self.assertRaises(ValueError):
+            list(read_bag(path))
+
+    def test_replay(self):
+        received = {"thermal": [], "all": []}
+        handlers = [
+            ("/thermalcamera/#", lambda client, userdata, msg: received["thermal"].append((msg.topic, msg.payload))),
+            ("#", lambda client, userdata, msg: received["all"].append(msg.topic)),
+            ("/coldroom/#", lambda client, userdata, msg: 1 / 0),
+        ]
+        replayer = MQTTReplayer(handlers, speed=None)
+        self.assertEqual(replayer.replay(read_bag(self.write("run.bag"))), 4)
+        self.assertEqual(received["thermal"], [(t, p) for _, t, p in self.messages if t.startswith("/thermalcamera")])
+        self.assertEqual(received["all"], [t for _, t, _ in self.messages])
+        self.assertEqual(replayer.errors, 1)
+
+        report = replayer.report()
+        # Routed to two handlers but replayed once
+        self.assertEqual(report["/coldroom/state"]["messages"], 1)
+        self.assertEqual(len(replayer.latencies["/coldroom/state"]), 2)
+        self.assertEqual(report["/MARTA/status"]["messages"], 1)
+        self.assertEqual(sum(stats["messages"] for stats in report.values()), 4)
+        self.assertAlmostEqual(report["/MARTA/status"]["rate"], 1 / replayer.elapsed)
+        self.assertLessEqual(report["/MARTA/status"]["p50"], report["/MARTA/status"]["max"])
+
+    def test_replay_speed(self):
+        replayer = MQTTReplayer([("#", lambda client, userdata, msg: None)], speed=3.0)
+        started = time.perf_counter()
+        replayer.replay(self.messages)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.3 / 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
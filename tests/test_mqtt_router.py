@@ -0,0 +1,73 @@
+import unittest
+import sys
+import os
+
+import paho.mqtt.client as mqtt
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.mqtt_router import MQTTConnection, TopicRouter
+
+
+class TestTopicRouter(unittest.TestCase):
+    FILTERS = [
+        "/MARTA/#",
+        "/coldroom/#",
+        "/thermalcamera/state",
+        "/thermalcamera/camera0",
+        "/thermalcamera/+",
+        "/ble/CO2-1",
+        "/alarm",
+        "/environment/HumAndTemp001/#",
+        "shellies/coldroomair/status/switch:0",
+        "+/+/status/#",
+        "#",
+    ]
+    TOPICS = [
+        "/MARTA/status",
+        "/MARTA",
+        "/coldroom/state/door",
+        "/thermalcamera/state",
+        "/thermalcamera/camera0",
+        "/thermalcamera/camera0/raw",
+        "/ble/CO2-1",
+        "/ble/CO2-2",
+        "/alarm",
+        "/environment/HumAndTemp001/temperature",
+        "shellies/coldroomair/status/switch:0",
+        "$SYS/broker/uptime",
+    ]
+
+    def test_matches_paho(self):
+        router = TopicRouter()
+        for topic_filter in self.FILTERS:
+            router.add(topic_filter, topic_filter)
+        for topic in self.TOPICS:
+            expected = sorted(f for f in self.FILTERS if mqtt.topic_matches_sub(f, topic))
+            self.assertEqual(sorted(router.match(topic)), expected, topic)
+
+    def test_remove(self):
+        router = TopicRouter()
+        router.add("/a/#", "first")
+        router.add("/a/#", "second")
+        router.remove("/a/#", "first")
+        self.assertEqual(router.match("/a/b"), ["second"])
+        router.remove("/a/#", "second")
+        self.assertEqual(router.match("/a/b"), [])
+        self.assertEqual(router.filters, [])
+
+
+class TestMQTTConnection(unittest.TestCase):
+    def test_dispatch(self):
+        connection = MQTTConnection("localhost", 1883)
+        received = []
+        connection.subscribe("/thermalcamera/+", lambda topic, payload: received.append((topic, payload)))
+        connection.subscribe("/thermalcamera/state", lambda topic, payload: 1 / 0)
+        connection.dispatch("/thermalcamera/state", b"{}")
+        connection.dispatch("/MARTA/status", b"{}")
+        self.assertEqual(received, [("/thermalcamera/state", b"{}")])
+
+
+if __name__ == "__main__":
+    unittest.main()
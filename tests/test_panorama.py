@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.thermal_frame_store import ThermalFrameStore
+from coldroom.panorama import PanoramaAccumulator, normalize_panorama
+from coldroom.module_temperatures_gui import ModuleTemperaturesTAB
+
+try:
+    from scipy.ndimage import zoom
+except ImportError:
+    zoom = None
+
+
+class TestPanoramaAccumulator(unittest.TestCase):
+    """Compare the incremental panorama with a full restitch of all positions"""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(1)
+        self.store = ThermalFrameStore(bin_width=1.0, depth=5)
+        self.offset = 180
+        self.fov = 20
+
+    def add_frames(self, positions):
+        for position in positions:
+            frame = (self.rng.random((32, 24)) * 15 + 20).astype(np.float32)
+            self.store.add(position, frame)
+
+    def full_restitch(self, fov):
+        gui = SimpleNamespace(get_camera_fov=lambda camera_name: fov)
+        bins, images = self.store.latest_frames()
+        positions = self.store.bin_positions[bins] + self.offset
+        _, panorama = ModuleTemperaturesTAB.stitch_multiple_images(gui, images, positions, 20, 35, "camera1")
+        return panorama
+
+    def test_matches_full_restitch(self):
+        # FOV of 24 degrees gives a 360 column panorama, so no resampling is involved
+        accumulator = PanoramaAccumulator(self.store, 24, self.offset, output_width=360)
+        self.add_frames(np.arange(0, 360, 7.5))
+        accumulator.update()
+        self.add_frames([15.0, 30.2, 352.0])  # replace some positions
+        self.assertEqual(accumulator.update(), 3)
+        np.testing.assert_allclose(accumulator.panorama(), self.full_restitch(accumulator.fov), atol=1e-4)
+
+    @unittest.skipIf(zoom is None, "scipy not available")
+    def test_resampling_matches_zoom(self):
+        accumulator = PanoramaAccumulator(self.store, self.fov, self.offset)
+        self.add_frames(np.arange(0, 360, 3.3))
+        accumulator.update()
+        panorama = self.full_restitch(self.fov)
+        expected = zoom(panorama, (1, 360 / panorama.shape[1]), order=1)
+        # zoom() drops the last column to cval in constant mode, the accumulator keeps it
+        np.testing.assert_allclose(accumulator.panorama()[:, :-1], expected[:, :-1], atol=1e-3)
+
+    def test_only_changed_frames_are_folded(self):
+        accumulator = PanoramaAccumulator(self.store, self.fov, self.offset)
+        self.add_frames(np.arange(0, 360, 10.0))
+        self.assertEqual(accumulator.update(), 36)
+        self.assertEqual(accumulator.update(), 0)
+        self.add_frames([40.0])
+        self.assertEqual(accumulator.update(), 1)
+
+    def test_reconfigure_and_clear(self):
+        accumulator = PanoramaAccumulator(self.store, self.fov, self.offset)
+        self.add_frames(np.arange(0, 360, 10.0))
+        accumulator.update()
+        self.assertFalse(accumulator.configure(self.fov, self.offset))
+        self.assertTrue(accumulator.configure(25, self.offset))
+        self.assertEqual(accumulator.update(), 36)
+        self.store.clear()
+        accumulator.update()
+        self.assertTrue(accumulator.empty)
+        self.assertFalse(accumulator.panorama().any())
+
+    def test_normalize_panorama(self):
+        panorama = np.array([[20.0, 25.0, 30.0, np.nan]], dtype=np.float32)
+        np.testing.assert_array_equal(normalize_panorama(panorama, 20, 30), [[0, 127, 255, 0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
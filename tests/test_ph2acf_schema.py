@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.ph2acf_schema import TemperatureOffsets, TemperatureSchema, module_offsets, parse_temperature_key
+
+
+class TestTemperatureSchema(unittest.TestCase):
+    def test_parse_both_key_forms(self):
+        self.assertEqual(parse_temperature_key("SSA_BE0_H7_C6_temp"), ("SSA", 1, 6))
+        self.assertEqual(parse_temperature_key("MPA_H0_C9_temp"), ("MPA", 0, 9))
+        self.assertIsNone(parse_temperature_key("LpGBT_OG0_fuseId"))
+        self.assertIsNone(parse_temperature_key("SSA_H0_C0_temperature"))
+
+    def test_slots_are_stable(self):
+        schema = TemperatureSchema()
+        first = schema.read({"SSA_H0_C0_temp": 20.0, "MPA_BE0_H1_C8_temp": 30.0, "counter": 4})
+        self.assertEqual(schema.names, ["SSA_H0_0", "MPA_H1_8"])
+        second = schema.read({"MPA_BE0_H3_C8_temp": 31.0, "SSA_BE0_H2_C0_temp": 21.0, "SSA_H0_C1_temp": 22.0})
+        self.assertEqual(schema.names, ["SSA_H0_0", "MPA_H1_8", "SSA_H0_1"])
+        np.testing.assert_array_equal(first, [20.0, 30.0])
+        np.testing.assert_array_equal(second, [21.0, 31.0, 22.0])
+        self.assertEqual(schema.to_dict(first), {"SSA_H0_0": 20.0, "MPA_H1_8": 30.0})
+
+    def test_offsets_and_stats(self):
+        schema = TemperatureSchema()
+        module = {"temperature_offsets": {"SSA_H0_0": 1.0, "SSA_H0_1": -2.0, "MPA_H0_8": 0.5}}
+        offsets = TemperatureOffsets(schema, module_offsets(module))
+        readings = schema.read({"SSA_H0_C0_temp": 20.0, "SSA_H0_C1_temp": 30.0, "MPA_H0_C8_temp": 10.0})
+        calibrated, missing = offsets.apply(readings)
+        np.testing.assert_allclose(calibrated, [21.0, 28.0, 10.5])
+        self.assertFalse(missing)
+        stats = schema.stats(calibrated)
+        self.assertAlmostEqual(stats["SSA"][0], 24.5)
+        self.assertAlmostEqual(stats["SSA"][1], 28.0)
+        self.assertAlmostEqual(stats["MPA"][1], 10.5)
+
+        # A new chip without offset grows the vector and is flagged
+        readings = schema.read({"SSA_H1_C3_temp": 25.0})
+        calibrated, missing = offsets.apply(readings)
+        self.assertTrue(missing)
+        self.assertEqual(calibrated[-1], 25.0)
+        self.assertTrue(np.isnan(schema.stats(calibrated)["MPA"][0]))
+
+    def test_module_without_offsets(self):
+        self.assertEqual(module_offsets({}), {})
+        self.assertEqual(module_offsets({"temperature_offset": "n/a"}), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.snapshot_cache import SnapshotCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class FakeServer:
+    """Answers POST /snapshot slowly and counts the requests"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def post(self, url, json=None, timeout=None):
+        with self.lock:
+            self.requests.append((url, json["cable"], json["side"]))
+        time.sleep(self.delay)
+        if json["cable"] == "missing":
+            return FakeResponse(404, None)
+        return FakeResponse(200, {"1": {"connections": [{"cable": json["cable"] + "_" + json["side"]}]}})
+
+
+class TestSnapshotCache(unittest.TestCase):
+    def test_ttl_and_invalidation(self):
+        server = FakeServer()
+        cache = SnapshotCache(lambda: "http://db:5000/", ttl=60, post=server.post)
+        first = cache.get("P001", "detSide")
+        self.assertEqual(first["1"]["connections"][0]["cable"], "P001_detSide")
+        self.assertIs(cache.get("P001", "detSide"), first)
+        self.assertEqual(server.requests, [("http://db:5000/snapshot", "P001", "detSide")])
+        self.assertIsNone(cache.get("missing", "detSide"))
+        self.assertIsNone(cache.get("missing", "detSide"))
+        self.assertEqual(len(server.requests), 2)
+        self.assertTrue(cache.fresh([("P001", "detSide"), ("missing", "detSide")]))
+
+        cache.invalidate("P001")
+        self.assertFalse(cache.fresh([("P001", "detSide")]))
+        self.assertTrue(cache.fresh([("missing", "detSide")]))
+        cache.get("P001", "detSide")
+        self.assertEqual(len(server.requests), 3)
+
+        cache.ttl = 0
+        cache.invalidate()
+        cache.get("P001", "detSide")
+        cache.get("P001", "detSide")
+        self.assertEqual(len(server.requests), 5)
+        cache.close()
+
+    def test_in_flight_requests_are_shared(self):
+        server = FakeServer(delay=0.2)
+        cache = SnapshotCache("http://db:5000", post=server.post)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("D3", "crateSide"))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(result is results[0] for result in results))
+
+        done = threading.Event()
+        keys = [("D3", "crateSide"), ("D3", "detSide"), ("H48", "detSide"), ("D3", "detSide")]
+        cache.prefetch(keys, done.set)
+        self.assertTrue(done.wait(5))
+        self.assertTrue(cache.fresh(keys))
+        self.assertEqual(len(server.requests), 3)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
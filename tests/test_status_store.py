@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.status_store import StatusStore
+
+
+class TestStatusStore(unittest.TestCase):
+    def setUp(self):
+        self.store = StatusStore()
+        self.events = []
+        self.store.add_listener(self.events.append)
+
+    def test_only_changed_keys_are_notified(self):
+        self.store.update("marta", {"fsm_state": "IDLE", "TT05_CO2": 20.0})
+        self.assertEqual(len(self.events[0]), 2)
+        changes = self.store.update("marta", {"fsm_state": "IDLE", "TT05_CO2": 18.5})
+        self.assertEqual([(c.key, c.old, c.new) for c in changes], [("TT05_CO2", 20.0, 18.5)])
+        self.assertEqual(self.store.update("marta", {"fsm_state": "IDLE", "TT05_CO2": 18.5}), [])
+        self.assertEqual(len(self.events), 2)
+
+    def test_versions(self):
+        self.store.update("coldroom", {"light": 0, "running": 1})
+        version = self.store.version
+        self.store.update("coldroom", {"light": 1, "running": 1})
+        self.assertEqual(self.store.key_version("coldroom", "light"), version + 1)
+        self.assertEqual(self.store.changed_since(version), [("coldroom", "light")])
+        self.assertEqual(self.store.key_version("coldroom", "door"), 0)
+
+    def test_in_place_mutation_is_detected(self):
+        status = {"ch_temperature": {"value": 15.0, "status": 1}}
+        self.store.update("coldroom", status)
+        status["ch_temperature"]["value"] = 14.0
+        changes = self.store.update("coldroom", status)
+        self.assertEqual(changes[0].old["value"], 15.0)
+        self.assertEqual(changes[0].new["value"], 14.0)
+
+    def test_scalar_and_removed_keys(self):
+        self.store.update("alarm", "MyKratos: door")
+        self.assertEqual(self.store.get("alarm"), "MyKratos: door")
+        self.store.update("co2_sensor", {"CO2": 500, "T": 20})
+        changes = self.store.update("co2_sensor", {"CO2": 500})
+        self.assertEqual([(c.key, c.old, c.new) for c in changes], [("T", 20, None)])
+
+    def test_listener_errors_do_not_stop_updates(self):
+        self.store.add_listener(lambda changes: 1 / 0)
+        self.store.update("cleanroom", {"temperature": 21.0})
+        self.assertEqual(self.store.get("cleanroom", "temperature"), 21.0)
+        self.assertEqual(len(self.store.snapshot()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.hotspot_worker import HotspotWorker
+from coldroom.stitching_worker import StitchingWorker
+
+
+class LatestFrameWorker(StitchingWorker):
+    """Returns the number of the newest frame instead of stitching panoramas"""
+
+    def process(self):
+        return {"frame": self.system.latest_frame}
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestStitchingWorker(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.system = SimpleNamespace(latest_frame=0)
+        self.worker = LatestFrameWorker(self.system, {}, {}, interval=0.02)
+        self.results = []
+        # Received on the worker thread, there is no event loop in the test
+        self.worker.results_ready.connect(self.results.append, Qt.DirectConnection)
+        self.worker.start()
+
+    def tearDown(self):
+        self.worker.stop()
+
+    def frame(self, number):
+        self.system.latest_frame = number
+        self.worker.on_frame("camera0", 0)
+
+    def test_one_result_until_acknowledged(self):
+        self.frame(1)
+        self.assertTrue(wait_for(lambda: len(self.results) == 1))
+        # The GUI has not drawn the first result, the frames are coalesced instead of queued
+        for number in range(2, 50):
+            self.frame(number)
+            time.sleep(0.005)
+        time.sleep(0.2)
+        self.assertEqual(self.results, [{"frame": 1}])
+
+        self.worker.acknowledge()
+        self.assertTrue(wait_for(lambda: len(self.results) == 2))
+        self.assertEqual(self.results[1], {"frame": 49})
+        time.sleep(0.1)
+        self.assertEqual(len(self.results), 2)
+
+    def test_no_result_without_frame(self):
+        time.sleep(0.1)
+        self.assertEqual(self.results, [])
+        self.worker.acknowledge()
+        time.sleep(0.1)
+        self.assertEqual(self.results, [])
+
+    def test_stop_while_waiting_for_acknowledge(self):
+        self.frame(1)
+        self.assertTrue(wait_for(lambda: len(self.results) == 1))
+        self.frame(2)
+        started = time.monotonic()
+        self.worker.stop()
+        self.assertTrue(self.worker.isFinished())
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(len(self.results), 1)
+
+
+class TestHotspotWorkerQueue(unittest.TestCase):
+    def test_oldest_frames_dropped(self):
+        images = {}
+        system = SimpleNamespace(settings={}, _thermalcamera=SimpleNamespace(_images=images))
+        worker = HotspotWorker(system, {}, {}, max_queued_frames=3)
+        for number in range(5):
+            images["camera0"] = np.full((2, 2), float(number))
+            worker.on_frame("camera0", number)
+        self.assertEqual(worker.dropped_frames, 2)
+        self.assertEqual([position for _, position, _, _ in worker._queue], [2, 3, 4])
+
+
+if __name__ == "__main__":
+    unittest.main()
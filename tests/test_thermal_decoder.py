@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import base64
+import struct
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.thermal_decoder import decode_frame, frame_stats, FRAME_BYTES
+
+
+class TestThermalDecoder(unittest.TestCase):
+    """Test the shared thermal frame decoder against the per-element struct path"""
+
+    def setUp(self):
+        self.frame = (np.arange(768, dtype=np.float32) / 10.0 + 15.0).reshape(24, 32)
+        self.raw = self.frame.tobytes()
+
+    def legacy_decode(self, payload):
+        flo_arr = [struct.unpack("f", payload[i : i + 4])[0] for i in range(0, len(payload), 4)]
+        return np.array(flo_arr).reshape(24, 32)
+
+    def test_raw_matches_legacy(self):
+        decoded = decode_frame(self.raw)
+        self.assertEqual(decoded.dtype, np.float32)
+        self.assertEqual(decoded.shape, (24, 32))
+        np.testing.assert_array_equal(decoded, self.legacy_decode(self.raw))
+
+    def test_base64_oriented_matches_legacy(self):
+        payload = base64.b64encode(self.raw).decode()
+        decoded = decode_frame(payload, encoding="base64", orient=True)
+        expected = np.flip(np.rot90(self.legacy_decode(self.raw)), axis=0)
+        self.assertEqual(decoded.shape, (32, 24))
+        np.testing.assert_array_equal(decoded, expected)
+
+    def test_orientation_is_a_view(self):
+        decoded = decode_frame(self.raw, orient=True)
+        self.assertFalse(decoded.flags.owndata)
+        self.assertFalse(decoded.flags.writeable)
+
+    def test_invalid_length(self):
+        with self.assertRaises(ValueError):
+            decode_frame(self.raw[:-4])
+        with self.assertRaises(ValueError):
+            decode_frame(b"\x00" * (FRAME_BYTES + 4))
+
+    def test_unknown_encoding(self):
+        with self.assertRaises(ValueError):
+            decode_frame(self.raw, encoding="hex")
+
+    def test_frame_stats(self):
+        t_min, t_max, t_avg = frame_stats(decode_frame(self.raw))
+        self.assertAlmostEqual(t_min, float(self.frame.min()), places=4)
+        self.assertAlmostEqual(t_max, float(self.frame.max()), places=4)
+        self.assertAlmostEqual(t_avg, float(self.frame.mean()), places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
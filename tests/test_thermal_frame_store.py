@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.thermal_frame_store import ThermalFrameStore
+
+
+class TestThermalFrameStore(unittest.TestCase):
+    """Test the fixed-size thermal frame store"""
+
+    def setUp(self):
+        self.store = ThermalFrameStore(bin_width=1.0, depth=3)
+
+    def frame(self, value):
+        return np.full((32, 24), value, dtype=np.float32)
+
+    def test_memory_is_preallocated(self):
+        nbytes = self.store.nbytes
+        for i in range(2000):
+            self.store.add(i * 0.37, self.frame(i))
+        self.assertEqual(self.store.nbytes, nbytes)
+        self.assertEqual(self.store.frames.shape, (360, 3, 32, 24))
+
+    def test_jitter_is_quantized(self):
+        for position in (10.0, 10.2, 9.8, 370.1):
+            self.store.add(position, self.frame(position))
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(list(self.store.filled_bins()), [10])
+
+    def test_latest_frames_and_ring_wrap(self):
+        for value in range(5):
+            self.store.add(45.0, self.frame(value))
+        self.store.add(90.0, self.frame(100))
+        bins, frames = self.store.latest_frames()
+        self.assertEqual(list(bins), [45, 90])
+        self.assertEqual(frames.shape, (2, 32, 24))
+        self.assertEqual(frames[0, 0, 0], 4)
+        self.assertEqual(frames[1, 0, 0], 100)
+        self.assertEqual(self.store.counts[45], 3)
+
+    def test_temperature_range(self):
+        self.store.add(0.0, self.frame(20), min_temperature=19.0, max_temperature=25.0)
+        self.store.add(180.0, self.frame(30))
+        bins, min_temps, max_temps = self.store.temperature_range()
+        self.assertEqual(list(bins), [0, 180])
+        np.testing.assert_array_equal(min_temps, [19.0, 30.0])
+        np.testing.assert_array_equal(max_temps, [25.0, 30.0])
+
+    def test_clear(self):
+        self.store.add(12.0, self.frame(1))
+        self.store.clear()
+        self.assertEqual(len(self.store), 0)
+        bins, frames = self.store.latest_frames()
+        self.assertEqual(len(bins), 0)
+        self.assertEqual(frames.shape, (0, 32, 24))
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            ThermalFrameStore(bin_width=0)
+        with self.assertRaises(ValueError):
+            ThermalFrameStore(depth=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.timeseries import TimeSeriesBuffer, minmax_envelope
+
+
+class TestTimeSeriesBuffer(unittest.TestCase):
+    def test_wraps_and_stays_contiguous(self):
+        buffer = TimeSeriesBuffer(5, ("min", "max"))
+        start = datetime(2025, 1, 1)
+        for i in range(12):
+            buffer.append(start + timedelta(seconds=i), i, 10 * i)
+        self.assertEqual(len(buffer), 5)
+        np.testing.assert_array_equal(buffer.values("min"), [7, 8, 9, 10, 11])
+        np.testing.assert_array_equal(buffer.values("max"), [70, 80, 90, 100, 110])
+        self.assertEqual(buffer.times()[0], np.datetime64(start + timedelta(seconds=7), "ms"))
+        self.assertTrue(buffer.values("min").flags["C_CONTIGUOUS"])
+        self.assertEqual(buffer.last("max"), 110)
+        buffer.clear()
+        self.assertEqual(len(buffer.times()), 0)
+        self.assertIsNone(buffer.last("min"))
+
+    def test_incremental_envelope(self):
+        values = np.sin(np.linspace(0, 50, 30000))
+        values[::1000] = np.nan
+        values[23456] = 9.0
+        start = datetime(2025, 1, 1)
+        incremental = TimeSeriesBuffer(10000, ("avg",))
+        for i, value in enumerate(values):
+            incremental.append(start + timedelta(seconds=i), value)
+            if i % 97 == 0:
+                # The bucket size grows with the history, then the ring wraps
+                incremental.envelope("avg", 400)
+
+        once = TimeSeriesBuffer(10000, ("avg",))
+        for i, value in enumerate(values):
+            once.append(start + timedelta(seconds=i), value)
+        times, reduced = incremental.envelope("avg", 400)
+        expected_times, expected = once.envelope("avg", 400)
+        np.testing.assert_array_equal(times, expected_times)
+        np.testing.assert_array_equal(reduced, expected)
+        self.assertLessEqual(len(reduced), 404)
+        self.assertTrue(np.all(np.diff(times.astype(np.int64)) > 0))
+        self.assertEqual(np.nanmin(reduced), np.nanmin(once.values("avg")))
+        self.assertEqual(np.nanmax(reduced), 9.0)
+
+
+class TestMinMaxEnvelope(unittest.TestCase):
+    def test_keeps_spikes(self):
+        y = np.sin(np.linspace(0, 20, 100000))
+        y[12345] = 50.0
+        y[54321] = -50.0
+        y[:10] = np.nan
+        x = np.arange(len(y))
+        xs, ys = minmax_envelope(x, y, 1000)
+        self.assertLessEqual(len(ys), 1000)
+        self.assertIn(12345, xs)
+        self.assertIn(54321, xs)
+        self.assertTrue(np.all(np.diff(xs) > 0))
+        self.assertEqual(np.nanmax(ys), 50.0)
+
+    def test_short_series_unchanged(self):
+        xs, ys = minmax_envelope([0, 1, 2], [3.0, 1.0, 2.0], 100)
+        np.testing.assert_array_equal(ys, [3.0, 1.0, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
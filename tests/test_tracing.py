@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+import json
+
+# Add the parent directory to sys.path to import the modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coldroom.tracing import LATENCY_BINS_MS, LatencyTracer
+
+
+class TestLatencyTracer(unittest.TestCase):
+    def test_histograms(self):
+        tracer = LatencyTracer(budget=0.5)
+        for i in range(10):
+            trace = tracer.start(received=100.0)
+            trace.mark("decode", 100.001)
+            trace.mark("decision", 100.002)
+            if i % 2:
+                trace.mark("enqueue", 100.003)
+                trace.mark("send", 100.010)
+                trace.mark("send", 100.500)  # only the first send counts
+                trace.mark("ack", 102.0)
+            tracer.finish(trace)
+
+        summary = tracer.summary()
+        self.assertEqual(summary["decode"]["count"], 10)
+        self.assertEqual(summary["ack"]["count"], 5)
+        self.assertAlmostEqual(summary["send"]["max"], 10.0, places=3)
+        self.assertEqual(len(summary["decision"]["counts"]), len(LATENCY_BINS_MS) + 1)
+        self.assertEqual(tracer.over_budget, 5)
+
+        published = json.loads(tracer.to_json())
+        self.assertEqual(published["over_budget"], 5)
+        self.assertEqual(published["stages"]["ack"]["count"], 5)
+
+    def test_empty(self):
+        summary = LatencyTracer().summary()
+        self.assertIsNone(summary["ack"]["p99"])
+        self.assertEqual(summary["ack"]["count"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()